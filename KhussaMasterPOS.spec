@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('inventory\\templates', 'inventory\\templates'), ('staticfiles', 'staticfiles')],
-    hiddenimports=[],
+    hiddenimports=['uvicorn.logging', 'uvicorn.loops.asyncio', 'uvicorn.protocols.http.h11_impl'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -11,6 +11,13 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shoe_inventory.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# Needed for the live stock stream (/api/stream/): serve with an ASGI server, e.g.
+#   uvicorn config.asgi:application
 application = get_asgi_application()
+
+# maintenance jobs (SCHEDULER_ENABLED=1); every worker may start it, DB leases pick one runner per job
+from inventory import scheduler  # noqa: E402
+
+scheduler.start()
@@ -0,0 +1,83 @@
+"""
+Read-replica routing.
+
+- GET/HEAD requests whose path starts with one of settings.REPLICA_READ_PATHS
+  read from settings.REPLICA_DB_ALIAS (reports, exports, listings, admin ledger browsing)
+- everything else, every write, every read inside a transaction on the
+  primary, and session / auth reads (PRIMARY_APPS: a login or session write
+  must be visible on the next request) go to "default"
+- read-your-writes: a request that wrote sets a short-lived cookie that pins
+  the client's following requests to the primary
+- no replica configured = the router is a no-op
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+PIN_COOKIE = "db_pin"
+PRIMARY_APPS = ("sessions", "auth", "contenttypes")
+
+_use_replica: ContextVar[bool] = ContextVar("use_replica", default=False)
+_wrote: ContextVar[bool] = ContextVar("db_wrote", default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, "REPLICA_DB_ALIAS", "replica")
+    return alias if alias in settings.DATABASES else None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        if not alias or not _use_replica.get() or _wrote.get():
+            return "default"
+        if model._meta.app_label in PRIMARY_APPS:
+            return "default"
+        if connections["default"].in_atomic_block:
+            return "default"
+        return alias
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        _wrote.set(False)
+        _use_replica.set(
+            replica_alias() is not None
+            and request.method in ("GET", "HEAD")
+            and PIN_COOKIE not in request.COOKIES
+            and request.path.startswith(tuple(getattr(settings, "REPLICA_READ_PATHS", ())))
+        )
+
+    def _finish(self, response):
+        if _wrote.get() and replica_alias():
+            response.set_cookie(
+                PIN_COOKIE, "1",
+                max_age=int(getattr(settings, "REPLICA_PIN_SECONDS", 10)),
+                httponly=True, samesite="Lax",
+            )
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        self._start(request)
+        return self._finish(self.get_response(request))
+
+    async def __acall__(self, request):
+        self._start(request)
+        return self._finish(await self.get_response(request))
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 import sys
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -76,6 +77,7 @@ MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # ✅ important for EXE/static
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "config.replica.ReplicaMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -111,22 +113,113 @@ WSGI_APPLICATION = "config.wsgi.application"
 
 
 # -------------------------
-# Database (Render PostgreSQL)
+# Database
+#   DB_MODE=postgres (default): Render PostgreSQL
+#   DB_MODE=sqlite: local file in RUNTIME_DIR for standalone shops (WAL, see config/sqlite_wal)
 # -------------------------
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.getenv("DB_NAME", "khussa_master"),
-        "USER": os.getenv("DB_USER", "khussa_master_user"),
-        "PASSWORD": os.getenv("DB_PASSWORD", "jURKda69qKhRsPpkyLrqmfQGbkx6ibMK"),  # ✅ never hardcode
-        "HOST": os.getenv("DB_HOST", "dpg-d555ep95pdvs73buafig-a.virginia-postgres.render.com"),
-        "PORT": os.getenv("DB_PORT", "5432"),
-        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
-        "OPTIONS": {
-            "sslmode": os.getenv("DB_SSLMODE", "require"),
-        },
+DB_MODE = os.getenv("DB_MODE", "postgres").strip().lower()
+
+if DB_MODE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "config.sqlite_wal",
+            "NAME": os.getenv("DB_PATH") or str(RUNTIME_DIR / "khussa_master.sqlite3"),
+            "OPTIONS": {
+                "timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "20000")) / 1000,
+            },
+            # tests: a file, not :memory:, so threaded tests share one database
+            "TEST": {
+                "NAME": os.getenv("DB_TEST_PATH") or os.path.join(tempfile.gettempdir(), "test_khussa_master.sqlite3"),
+            },
+        }
     }
-}
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("DB_NAME", "khussa_master"),
+            "USER": os.getenv("DB_USER", "khussa_master_user"),
+            "PASSWORD": os.getenv("DB_PASSWORD", "jURKda69qKhRsPpkyLrqmfQGbkx6ibMK"),  # ✅ never hardcode
+            "HOST": os.getenv("DB_HOST", "dpg-d555ep95pdvs73buafig-a.virginia-postgres.render.com"),
+            "PORT": os.getenv("DB_PORT", "5432"),
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+            "OPTIONS": {
+                "sslmode": os.getenv("DB_SSLMODE", "require"),
+            },
+        }
+    }
+
+
+# -------------------------
+# Read replica (optional)
+#   postgres: DB_REPLICA_HOST (+ DB_REPLICA_PORT/NAME/USER/PASSWORD, default = primary's)
+#   sqlite:   DB_REPLICA_PATH
+# Reports / exports / listings (REPLICA_READ_PATHS, GET only) read from it;
+# a client that just wrote is pinned to the primary for REPLICA_PIN_SECONDS.
+# -------------------------
+REPLICA_DB_ALIAS = "replica"
+
+if DB_MODE == "sqlite" and os.getenv("DB_REPLICA_PATH"):
+    DATABASES[REPLICA_DB_ALIAS] = {**DATABASES["default"], "NAME": os.getenv("DB_REPLICA_PATH")}
+elif DB_MODE != "sqlite" and os.getenv("DB_REPLICA_HOST"):
+    _primary = DATABASES["default"]
+    DATABASES[REPLICA_DB_ALIAS] = {
+        **_primary,
+        "HOST": os.getenv("DB_REPLICA_HOST"),
+        "PORT": os.getenv("DB_REPLICA_PORT", _primary["PORT"]),
+        "NAME": os.getenv("DB_REPLICA_NAME", _primary["NAME"]),
+        "USER": os.getenv("DB_REPLICA_USER", _primary["USER"]),
+        "PASSWORD": os.getenv("DB_REPLICA_PASSWORD", _primary["PASSWORD"]),
+    }
+
+if REPLICA_DB_ALIAS in DATABASES:
+    DATABASES[REPLICA_DB_ALIAS]["TEST"] = {"MIRROR": "default"}
+
+DATABASE_ROUTERS = ["config.replica.ReplicaRouter"]
+
+REPLICA_READ_PATHS = [
+    p.strip()
+    for p in os.getenv(
+        "REPLICA_READ_PATHS",
+        "/reports/,/products/,/admin-ui/customers/,/admin-ui/locations/,"
+        "/api/valuation/cogs/,/admin/inventory/stockledger/",
+    ).split(",")
+    if p.strip()
+]
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "10"))
+
+
+# -------------------------
+# Invoice totals (inventory/totals.py)
+# -------------------------
+INVOICE_TAX_RATE = os.getenv("INVOICE_TAX_RATE", "0")          # percent
+INVOICE_TAX_INCLUSIVE = os.getenv("INVOICE_TAX_INCLUSIVE", "0").lower() in ("1", "true", "yes")
+INVOICE_ROUNDING = os.getenv("INVOICE_ROUNDING", "0.01")       # e.g. "1" = whole rupees
+
+
+# -------------------------
+# Thermal receipts (inventory/escpos.py)
+# -------------------------
+RECEIPT_PRINTER = os.getenv("RECEIPT_PRINTER", "")              # tcp://192.168.1.50:9100 or file:///tmp/receipts.bin
+RECEIPT_WIDTH = int(os.getenv("RECEIPT_WIDTH", "48"))           # chars per line: 48 = 80mm, 32 = 58mm
+RECEIPT_HEADER = os.getenv("RECEIPT_HEADER", "")                # default: location name
+RECEIPT_FOOTER = os.getenv("RECEIPT_FOOTER", "Thank you for shopping!")
+
+
+# -------------------------
+# Maintenance jobs (inventory/scheduler.py)
+# -------------------------
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "0").lower() in ("1", "true", "yes")
+SCHEDULER_TICK = int(os.getenv("SCHEDULER_TICK", "30"))         # seconds between due checks
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "2"))    # job threads per process
+
+
+# -------------------------
+# Stock posting locks (inventory/locking.py)
+# -------------------------
+#   rows (default): lock Product + StockBalance rows
+#   advisory: lock per (location, product); Postgres advisory locks, SQLite write lock up front
+POSTING_LOCK_MODE = os.getenv("POSTING_LOCK_MODE", "rows")
 
 
 # -------------------------
@@ -143,6 +236,9 @@ TIME_ZONE = "Asia/Karachi"
 USE_I18N = True
 USE_TZ = True
 
+# customer phones are stored as national digits ("+92 300-..." -> "0300...")
+PHONE_COUNTRY_CODE = os.getenv("PHONE_COUNTRY_CODE", "92")
+
 
 # -------------------------
 # Static / Media (EXE friendly)
@@ -159,6 +255,10 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = RUNTIME_DIR / "media"
 
+# product thumbnails (inventory/thumbnails.py): widths in px, WebP/JPEG quality
+THUMBNAIL_SIZES = [int(s) for s in os.getenv("THUMBNAIL_SIZES", "96,320,800").split(",") if s.strip()]
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+
 
 # -------------------------
 # Default PK
@@ -169,6 +269,9 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # -------------------------
 # DRF (simple)
 # -------------------------
+# POS endpoints are open on the shop LAN; destructive ones (stock repair,
+# cancellations, repricing ...) set their own session authentication and
+# staff permission classes in api_views.
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [],
     "DEFAULT_PERMISSION_CLASSES": [],
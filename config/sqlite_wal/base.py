@@ -0,0 +1,32 @@
+"""
+SQLite backend for standalone (single shop) installs.
+
+- applies WAL + performance pragmas on every new connection
+- starts every atomic() block with BEGIN IMMEDIATE: SQLite ignores
+  select_for_update(), so posting services are serialized by taking the
+  write lock up front instead of failing with "database is locked" when a
+  read transaction tries to upgrade to a write.
+"""
+import os
+
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_MB', '256')) * 1024 * 1024}",
+    f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_MB', '64')) * 1024}",
+    f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '20000'))}",
+)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
@@ -1,13 +1,18 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from inventory.thumbnails import THUMB_DIR, serve_thumbnail
+
 urlpatterns = [
     path("admin/", admin.site.urls),
 
     path("", include("inventory.urls")),
     path("api/", include("inventory.api_urls")),
+
+    # content-hash thumbnails, long-cached
+    re_path(rf"^{settings.MEDIA_URL.lstrip('/')}{THUMB_DIR}/(?P<name>[0-9a-f]+_\d+\.(?:webp|jpg))$", serve_thumbnail),
 ]
 
 if settings.DEBUG:
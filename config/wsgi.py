@@ -1,5 +1,5 @@
 """
-WSGI config for shoe_inventory project.
+WSGI config for the khussa inventory project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shoe_inventory.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# maintenance jobs (SCHEDULER_ENABLED=1); every worker may start it, DB leases pick one runner per job
+from inventory import scheduler  # noqa: E402
+
+scheduler.start()
@@ -1,19 +1,163 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
 from .models import (
     Product, Customer, StockLocation, StockBalance, StockLedger,
-    Invoice, InvoiceLine, Return, ReturnLine
+    Invoice, InvoiceLine, Return, ReturnLine,
+    StockTransfer, StockTransferLine,
+    CountSession, CountSessionLine,
+    PriceList, PriceListItem,
+    DayClosing, DemandForecast,
+    ProductFamily, PriceHistory,
+    ScheduledJob, JobRun,
 )
 
+# ---------------------------
+# Large tables (ledger, balances, document lines)
+# ---------------------------
+class EstimatedCountPaginator(Paginator):
+    """
+    Unfiltered changelists of big tables use the planner's row estimate
+    (Postgres pg_class.reltuples) instead of COUNT(*). Filtered lists, small
+    tables and other databases keep the exact count.
+    """
+    estimate_above = 100_000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        conn = connections[getattr(qs, "db", "default")]
+        if conn.vendor == "postgresql" and not qs.query.where:
+            with conn.cursor() as cur:
+                cur.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [qs.model._meta.db_table])
+                row = cur.fetchone()
+            if row and row[0] > self.estimate_above:
+                return int(row[0])
+        return super().count
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # skips the second, unfiltered COUNT(*)
+    list_per_page = 50
+
+@admin.register(StockLedger)
+class StockLedgerAdmin(LargeTableAdmin):
+    list_display = ("date_time", "movement_type", "product_sku", "location", "qty", "unit_cost", "unit_selling_price", "reference_no")
+    list_select_related = ("product", "location")
+    list_filter = ("movement_type", "location")
+    date_hierarchy = "date_time"
+    search_fields = ("=product__sku", "=reference_no")
+    raw_id_fields = ("product",)
+    ordering = ("-id",)
+
+    @admin.display(description="SKU", ordering="product__sku")
+    def product_sku(self, obj):
+        return obj.product.sku
+
+@admin.register(StockBalance)
+class StockBalanceAdmin(LargeTableAdmin):
+    list_display = ("product", "location", "on_hand_qty", "reserved_qty", "last_updated")
+    list_select_related = ("product", "location")
+    list_filter = ("location",)
+    search_fields = ("=product__sku",)
+    raw_id_fields = ("product",)
+
+@admin.register(Invoice)
+class InvoiceAdmin(LargeTableAdmin):
+    list_display = ("invoice_no", "date", "location", "customer", "status", "grand_total")
+    list_select_related = ("location", "customer")
+    list_filter = ("status", "location")
+    date_hierarchy = "date"
+    search_fields = ("=invoice_no",)
+    raw_id_fields = ("customer",)
+    ordering = ("-id",)
+
+@admin.register(InvoiceLine)
+class InvoiceLineAdmin(LargeTableAdmin):
+    list_display = ("invoice", "product", "qty", "returned_qty", "unit_price", "discount", "line_total")
+    list_select_related = ("invoice", "product")
+    search_fields = ("=invoice__invoice_no", "=product__sku")
+    raw_id_fields = ("invoice", "product")
+    ordering = ("-id",)
+
+@admin.register(Return)
+class ReturnAdmin(LargeTableAdmin):
+    list_display = ("return_no", "date", "location", "invoice", "total_refund")
+    list_select_related = ("location", "invoice")
+    list_filter = ("location",)
+    date_hierarchy = "date"
+    search_fields = ("=return_no", "=invoice__invoice_no")
+    raw_id_fields = ("invoice", "customer")
+    ordering = ("-id",)
+
+@admin.register(ReturnLine)
+class ReturnLineAdmin(LargeTableAdmin):
+    list_display = ("return_doc", "product", "qty", "unit_price", "line_total")
+    list_select_related = ("return_doc", "product")
+    search_fields = ("=return_doc__return_no", "=product__sku")
+    raw_id_fields = ("return_doc", "product")
+    ordering = ("-id",)
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ("product_name", "sku", "color", "size", "selling_price", "is_active")
     search_fields = ("product_name", "sku", "barcode_value")
 
+class VariantInline(admin.TabularInline):
+    model = Product
+    fields = ("sku", "color", "size", "selling_price", "is_active")
+    extra = 0
+
+@admin.register(ProductFamily)
+class ProductFamilyAdmin(admin.ModelAdmin):
+    list_display = ("code", "name", "selling_price", "is_active")
+    search_fields = ("code", "name")
+    inlines = [VariantInline]
+
+@admin.register(PriceHistory)
+class PriceHistoryAdmin(admin.ModelAdmin):
+    list_display = ("product", "valid_from", "cost", "selling_price", "reason")
+    list_select_related = ("product",)
+    search_fields = ("product__sku", "product__product_name", "reason")
+    raw_id_fields = ("product",)
+
+class PriceListItemInline(admin.TabularInline):
+    model = PriceListItem
+    raw_id_fields = ("product",)
+    extra = 0
+
+@admin.register(PriceList)
+class PriceListAdmin(admin.ModelAdmin):
+    list_display = ("name", "customer_type", "location", "priority", "valid_from", "valid_to", "is_active")
+    list_filter = ("customer_type", "location", "is_active")
+    inlines = [PriceListItemInline]
+
 admin.site.register(Customer)
 admin.site.register(StockLocation)
-admin.site.register(StockBalance)
-admin.site.register(StockLedger)
-admin.site.register(Invoice)
-admin.site.register(InvoiceLine)
-admin.site.register(Return)
-admin.site.register(ReturnLine)
+admin.site.register(StockTransfer)
+admin.site.register(StockTransferLine)
+admin.site.register(CountSession)
+admin.site.register(CountSessionLine)
+admin.site.register(DayClosing)
+
+@admin.register(DemandForecast)
+class DemandForecastAdmin(admin.ModelAdmin):
+    list_display = ("product", "location", "daily_rate", "forecast_qty", "on_hand", "days_of_cover", "computed_at")
+    list_select_related = ("product", "location")
+    list_filter = ("location",)
+    search_fields = ("=product__sku",)
+    raw_id_fields = ("product",)
+
+@admin.register(ScheduledJob)
+class ScheduledJobAdmin(admin.ModelAdmin):
+    list_display = ("name", "enabled", "next_run_at", "last_status", "last_duration_ms", "last_started_at", "lease_owner", "lease_until")
+    list_editable = ("enabled",)
+
+@admin.register(JobRun)
+class JobRunAdmin(LargeTableAdmin):
+    list_display = ("name", "started_at", "duration_ms", "status", "owner")
+    list_filter = ("status", "name")
+    date_hierarchy = "started_at"
+    ordering = ("-id",)
@@ -0,0 +1,240 @@
+# inventory/analytics.py
+"""
+Sales analytics for footwear variants (NumPy).
+
+The data is pulled once per request as three small aggregates
+(ledger sales per product, on-hand per product, product attributes) and
+turned into arrays aligned on product; everything else is vectorized:
+
+- size x color matrix: np.add.at into a (sizes, colors) grid
+- ABC / Pareto: sort by revenue, cumulative share, np.searchsorted on the
+  class thresholds
+- sell-through: sold / (sold + on hand), element-wise
+
+Results are cached in-process keyed on the last StockLedger id, so they
+are recomputed only after a stock movement (sale, void, receipt, ...).
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from django.db.models import Case, DecimalField, F, IntegerField, Q, Sum, When
+
+ABC_THRESHOLDS = (0.80, 0.95)  # cumulative revenue share closing class A, B
+CACHE_SIZE = 64
+
+_cache: OrderedDict = OrderedDict()
+_lock = threading.Lock()
+
+
+@dataclass
+class SalesFrame:
+    product_ids: np.ndarray
+    sku: np.ndarray
+    name: np.ndarray
+    color: np.ndarray
+    size: np.ndarray
+    sold: np.ndarray      # units, net of cancelled invoices and returns
+    revenue: np.ndarray
+    on_hand: np.ndarray
+
+
+def last_ledger_id() -> int:
+    from .models import StockLedger
+
+    return StockLedger.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def cached(kind: str, params: dict, fn):
+    """fn() result for (kind, params), reused until the ledger moves."""
+    key = (kind, tuple(sorted((k, str(v)) for k, v in params.items() if v not in (None, ""))), last_ledger_id())
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    value = fn()
+    with _lock:
+        _cache[key] = value
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return value
+
+
+def load_frame(date_from=None, date_to=None, location_id=None, name: str = "") -> SalesFrame:
+    from .models import Product, StockBalance, StockLedger
+
+    products = Product.objects.all()
+    if name:
+        products = products.filter(product_name__iexact=name)
+    rows = list(products.order_by("id").values_list("id", "sku", "product_name", "color", "size"))
+    if not rows:
+        e = np.zeros(0)
+        return SalesFrame(e.astype(np.int64), *(e.astype(object),) * 4, e, e, e)
+
+    ids, sku, pname, color, size = zip(*rows)
+    ids = np.array(ids, dtype=np.int64)
+    pos = {pid: i for i, pid in enumerate(ids.tolist())}
+
+    # sales: OUT rows minus VOID rows (cancelled invoices) minus RETURN rows
+    # (at the refunded price), one GROUP BY
+    sign = Case(When(movement_type__in=("VOID", "RETURN"), then=-1), default=1, output_field=IntegerField())
+    ledger = StockLedger.objects.filter(
+        Q(movement_type__in=("OUT", "VOID"), reference_type="INV") | Q(movement_type="RETURN")
+    )
+    if name:
+        ledger = ledger.filter(product_id__in=ids.tolist())
+    if location_id:
+        ledger = ledger.filter(location_id=location_id)
+    if date_from is not None:
+        ledger = ledger.filter(date_time__gte=date_from)
+    if date_to is not None:
+        ledger = ledger.filter(date_time__lt=date_to)
+    sales = ledger.values("product_id").annotate(
+        q=Sum(sign * F("qty")),
+        r=Sum(sign * F("qty") * F("unit_selling_price"), output_field=DecimalField()),
+    ).values_list("product_id", "q", "r")
+
+    stock = StockBalance.objects.all()
+    if name:
+        stock = stock.filter(product_id__in=ids.tolist())
+    if location_id:
+        stock = stock.filter(location_id=location_id)
+    stock = stock.values("product_id").annotate(q=Sum("on_hand_qty")).values_list("product_id", "q")
+
+    sold = np.zeros(len(ids))
+    revenue = np.zeros(len(ids))
+    on_hand = np.zeros(len(ids))
+    for pid, q, r in sales:
+        if pid in pos:
+            sold[pos[pid]] = q or 0
+            revenue[pos[pid]] = float(r or 0)
+    for pid, q in stock:
+        if pid in pos:
+            on_hand[pos[pid]] = q or 0
+
+    return SalesFrame(
+        product_ids=ids,
+        sku=np.array(sku, dtype=object),
+        name=np.array(pname, dtype=object),
+        color=np.array([c or "-" for c in color], dtype=object),
+        size=np.array([s or "-" for s in size], dtype=object),
+        sold=sold,
+        revenue=revenue,
+        on_hand=np.maximum(on_hand, 0),
+    )
+
+
+def _sell_through(sold, on_hand):
+    base = sold + on_hand
+    return np.divide(sold, base, out=np.zeros_like(sold, dtype=np.float64), where=base > 0)
+
+
+def size_sort_key(s: str):
+    # numeric sizes in numeric order (6.5 < 7 < 40), then letter sizes
+    try:
+        return (0, float(s), "")
+    except ValueError:
+        return (1, 0.0, s)
+
+
+# -----------------------------
+# Size x color matrix
+# -----------------------------
+def size_color_matrix(frame: SalesFrame) -> dict:
+    colors, ci = np.unique(frame.color.astype(str), return_inverse=True)
+    usizes, si = np.unique(frame.size.astype(str), return_inverse=True)
+    # re-rank sizes into shoe order
+    sizes = sorted(usizes.tolist(), key=size_sort_key)
+    rank = np.array([sizes.index(s) for s in usizes.tolist()], dtype=np.int64)
+    si = rank[si] if len(si) else si
+    colors = colors.tolist()
+
+    sold = np.zeros((len(sizes), len(colors)))
+    on_hand = np.zeros((len(sizes), len(colors)))
+    np.add.at(sold, (si, ci), frame.sold)
+    np.add.at(on_hand, (si, ci), frame.on_hand)
+    st = _sell_through(sold, on_hand)
+
+    return {
+        "sizes": sizes,
+        "colors": colors,
+        "sold": sold.astype(int).tolist(),
+        "on_hand": on_hand.astype(int).tolist(),
+        "sell_through": np.round(st, 4).tolist(),
+        "size_totals": {"sold": sold.sum(axis=1).astype(int).tolist(), "on_hand": on_hand.sum(axis=1).astype(int).tolist()},
+        "color_totals": {"sold": sold.sum(axis=0).astype(int).tolist(), "on_hand": on_hand.sum(axis=0).astype(int).tolist()},
+    }
+
+
+def matrix_csv_rows(m: dict):
+    yield ["size \\ color", *m["colors"], "total sold"]
+    for i, size in enumerate(m["sizes"]):
+        yield [
+            size,
+            *(f"{m['sold'][i][j]} / {m['on_hand'][i][j]} ({m['sell_through'][i][j]:.0%})" for j in range(len(m["colors"]))),
+            m["size_totals"]["sold"][i],
+        ]
+    yield ["total sold", *m["color_totals"]["sold"], sum(m["size_totals"]["sold"])]
+
+
+# -----------------------------
+# ABC classification
+# -----------------------------
+def abc_classes(frame: SalesFrame, thresholds=ABC_THRESHOLDS) -> list[dict]:
+    order = np.argsort(-frame.revenue, kind="stable")
+    rev = frame.revenue[order]
+    total = rev.sum()
+    share = rev / total if total > 0 else np.zeros_like(rev)
+    cum = np.cumsum(share)
+    # an item belongs to the class whose threshold its cumulative share
+    # (before adding itself) has not reached yet
+    cls = np.array(list("ABC"))[np.searchsorted(np.asarray(thresholds), cum - share, side="right")]
+    cls[rev <= 0] = "C"
+
+    st = _sell_through(frame.sold, frame.on_hand)[order]
+    return [
+        {
+            "sku": frame.sku[i],
+            "name": frame.name[i],
+            "color": frame.color[i],
+            "size": frame.size[i],
+            "sold": int(frame.sold[i]),
+            "revenue": round(float(frame.revenue[i]), 2),
+            "share": round(float(s), 4),
+            "cumulative_share": round(float(c), 4),
+            "class": k,
+            "sell_through": round(float(t), 4),
+        }
+        for i, s, c, k, t in zip(order.tolist(), share, cum, cls.tolist(), st)
+    ]
+
+
+def abc_summary(rows: list[dict]) -> dict:
+    out = {k: {"skus": 0, "revenue": 0.0} for k in "ABC"}
+    for r in rows:
+        out[r["class"]]["skus"] += 1
+        out[r["class"]]["revenue"] += r["revenue"]
+    return {k: {"skus": v["skus"], "revenue": round(v["revenue"], 2)} for k, v in out.items()}
+
+
+# -----------------------------
+# Sell-through per SKU
+# -----------------------------
+def sell_through(frame: SalesFrame) -> list[dict]:
+    st = _sell_through(frame.sold, frame.on_hand)
+    order = np.array(sorted(range(len(st)), key=lambda i: (-st[i], frame.sku[i])), dtype=np.int64)
+    return [
+        {
+            "sku": frame.sku[i],
+            "name": frame.name[i],
+            "color": frame.color[i],
+            "size": frame.size[i],
+            "sold": int(frame.sold[i]),
+            "on_hand": int(frame.on_hand[i]),
+            "sell_through": round(float(st[i]), 4),
+        }
+        for i in order.tolist()
+    ]
@@ -1,12 +1,52 @@
 from django.urls import path
 from .api_views import (
-    ScanProduct, CreateInvoice,
-    InvoiceDetail, CreateReturn
+    scan_product, customer_search, location_list, catalog,
+    analytics_size_color, analytics_abc, analytics_sell_through,
+    CreateInvoice, QuoteInvoice, CancelInvoices,
+    invoice_detail, invoice_receipt, PrintReceipt, CreateReturn,
+    CreateTransfer,
+    StockValue, CostOfGoodsSold,
+    ReconcileStock,
+    OpenCountSession, CountSessionDetail, AddCountScans, CloseCountSession,
+    CloseDay, DayClosingList,
+    DemandForecastList, RefreshForecasts,
+    FamilyStockMatrix, CreateSizeRun,
+    BulkReprice, ProductPriceHistory,
+    JobList,
 )
+from .realtime import stock_stream
 
 urlpatterns = [
-    path("scan/", ScanProduct.as_view()),
+    path("scan/", scan_product),
+    path("customers/search/", customer_search),
+    path("locations/", location_list),
+    path("catalog/", catalog),
     path("invoices/create/", CreateInvoice.as_view()),
-    path("invoices/detail/", InvoiceDetail.as_view()),
+    path("invoices/quote/", QuoteInvoice.as_view()),
+    path("invoices/cancel/", CancelInvoices.as_view()),
+    path("invoices/detail/", invoice_detail),
+    path("invoices/receipt/", invoice_receipt),
+    path("invoices/receipt/print/", PrintReceipt.as_view()),
     path("returns/create/", CreateReturn.as_view()),
+    path("transfers/create/", CreateTransfer.as_view()),
+    path("valuation/stock/", StockValue.as_view()),
+    path("valuation/cogs/", CostOfGoodsSold.as_view()),
+    path("stock/reconcile/", ReconcileStock.as_view()),
+    path("counts/open/", OpenCountSession.as_view()),
+    path("counts/detail/", CountSessionDetail.as_view()),
+    path("counts/scan/", AddCountScans.as_view()),
+    path("counts/close/", CloseCountSession.as_view()),
+    path("closings/", DayClosingList.as_view()),
+    path("closings/close/", CloseDay.as_view()),
+    path("analytics/size-color/", analytics_size_color),
+    path("analytics/abc/", analytics_abc),
+    path("analytics/sell-through/", analytics_sell_through),
+    path("forecasts/", DemandForecastList.as_view()),
+    path("forecasts/refresh/", RefreshForecasts.as_view()),
+    path("families/stock/", FamilyStockMatrix.as_view()),
+    path("families/size-run/", CreateSizeRun.as_view()),
+    path("products/reprice/", BulkReprice.as_view()),
+    path("products/price-history/", ProductPriceHistory.as_view()),
+    path("jobs/", JobList.as_view()),
+    path("stream/", stock_stream),
 ]
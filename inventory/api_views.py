@@ -1,9 +1,20 @@
 # inventory/api_views.py
 from __future__ import annotations
 
+import hashlib
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404
-from django.db.models import Sum
+from django.db.models import Count, Max, Q, Sum
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition, require_GET
 
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import SAFE_METHODS, BasePermission, IsAdminUser
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -12,65 +23,294 @@ from .models import (
     Product,
     Invoice,
     InvoiceLine,
-    ReturnLine,
     StockLocation,
     Customer,
 )
+from .pricing import cached_book, price_book
+from .totals import QuoteLine, compute_totals
 from .services import (
     LineItem,
+    ReturnValidationError,
+    cancel_invoices,
     create_invoice_with_lines,
     create_return_with_lines,
+    create_transfer_with_lines,
+    resolve_scanned_codes,
+    open_count_session,
+    add_count_scans,
+    close_count_session,
 )
+from .utils import normalize_phone
 
 
 # -------------------------------------------------
-# Scan Product (SKU / Barcode)
+# Permissions
 # -------------------------------------------------
-class ScanProduct(APIView):
+class StaffWrites(BasePermission):
+    """Reads stay open; writes need a staff user."""
+
+    def has_permission(self, request, view):
+        return request.method in SAFE_METHODS or bool(request.user and request.user.is_staff)
+
+
+class StaffOnly:
+    """
+    Mixin for destructive / maintenance endpoints (cancel, reprice ...):
+    staff session login (e.g. via /admin/), so POSTs need the X-CSRFToken header.
+    """
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+
+# -------------------------------------------------
+# Scan Product (SKU / Barcode)  -- async, no DRF thread per scan
+# -------------------------------------------------
+@require_GET
+async def scan_product(request):
     """
     GET /api/scan/?code=SLG42
-    GET /api/scan/?code=BARCODE123
+    GET /api/scan/?code=BARCODE123&location_id=1&customer_type=wholesale
     """
+    code = (request.GET.get("code") or "").strip()
+    if not code:
+        return JsonResponse({"detail": "Provide code."}, status=400)
 
-    def get(self, request):
-        code = (request.query_params.get("code") or "").strip()
-        if not code:
-            return Response({"detail": "Provide code."}, status=400)
-
-        product = (
-            Product.objects.filter(sku=code).first()
-            or Product.objects.filter(barcode_value=code).first()
-            or Product.objects.filter(barcode=code).first()
-        )
+    # one round trip for SKU and barcode; SKU match wins
+    product = None
+    async for p in Product.objects.filter(Q(sku=code) | Q(barcode_value=code))[:2]:
+        if p.sku == code or product is None:
+            product = p
 
-        if not product:
-            return Response({"detail": "Product not found."}, status=404)
+    if not product:
+        return JsonResponse({"detail": "Product not found."}, status=404)
+
+    # price list resolution is in-memory; only a stale book costs a rebuild
+    book = cached_book() or await sync_to_async(price_book)()
+    try:
+        location_id = int(request.GET.get("location_id") or 0) or None
+    except ValueError:
+        location_id = None
+
+    return JsonResponse({
+        "sku": product.sku,
+        "name": product.product_name,
+        "price": str(book.price_for(
+            product,
+            customer_type=(request.GET.get("customer_type") or "retail").strip(),
+            location_id=location_id,
+        )),
+        "active": bool(getattr(product, "is_active", False)),
+    })
+
+
+# -------------------------------------------------
+# POS pickers (lazy, paged)  -- async
+# -------------------------------------------------
+PICKER_LIMIT = 20
+PICKER_MAX_LIMIT = 50
+
+
+def _picker_limit(request) -> int:
+    try:
+        return max(1, min(int(request.GET.get("limit") or PICKER_LIMIT), PICKER_MAX_LIMIT))
+    except ValueError:
+        return PICKER_LIMIT
+
+
+@require_GET
+async def customer_search(request):
+    """
+    GET /api/customers/search/?q=ali&limit=20
+    GET /api/customers/search/?q=0300
+    GET /api/customers/search/?q=%2B92%20300
+    Name prefix (case-insensitive) or phone prefix; both are indexed. Phones
+    are stored normalised (utils.normalize_phone), so "0300-123" and "+92 300"
+    are searched as "0300123" and "0300".
+    """
+    q = (request.GET.get("q") or "").strip()
+    if not q:
+        return JsonResponse({"results": []})
+
+    cond = Q(name__istartswith=q)
+    digits = "".join(ch for ch in q if ch.isdigit())
+    if digits and len(digits) == len(q.replace(" ", "").replace("-", "").lstrip("+")):
+        cond |= Q(phone__startswith=normalize_phone(q))
+
+    qs = (
+        Customer.objects.filter(cond)
+        .order_by("name")
+        .values("id", "name", "phone", "customer_type")[:_picker_limit(request)]
+    )
+    return JsonResponse({"results": [c async for c in qs]})
 
-        return Response({
-            "sku": product.sku,
-            "name": product.product_name,
-            "price": str(
-                getattr(product, "selling_price", None)
-                or getattr(product, "price", None)
-                or "0"
-            ),
-            "active": bool(getattr(product, "is_active", False)),
-        })
+
+@require_GET
+async def location_list(request):
+    """
+    GET /api/locations/?q=sh&limit=20
+    GET /api/locations/?limit=20&after=<next>   -> following page
+    Keyset paged by (unique) name: "next" is the cursor of the next page, null on the last.
+    """
+    q = (request.GET.get("q") or "").strip()
+    after = (request.GET.get("after") or "").strip()
+    limit = _picker_limit(request)
+    qs = StockLocation.objects.all()
+    if q:
+        qs = qs.filter(name__istartswith=q)
+    if after:
+        qs = qs.filter(name__gt=after)
+    rows = [loc async for loc in qs.order_by("name").values("id", "name")[:limit + 1]]
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return JsonResponse({"results": rows, "next": rows[-1]["name"] if more else None})
+
+
+# -------------------------------------------------
+# Catalog sync (terminal-side product cache)
+# -------------------------------------------------
+CATALOG_FIELDS = ["sku", "barcode", "name", "base_price", "active"]
+# rows saved just before `since` may commit after it: re-send a small window
+CATALOG_SINCE_OVERLAP = timedelta(seconds=60)
+
+
+def _catalog_since(request):
+    raw = (request.GET.get("since") or "").strip()
+    if not raw:
+        return None
+    dt = parse_datetime(raw.replace(" ", "+"))  # "+" of the offset arrives as a space
+    if dt is None:
+        raise ValueError("since must be an ISO datetime (use the previous response's cursor).")
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def _catalog_qs(request):
+    qs = Product.objects.all()
+    since = _catalog_since(request)
+    if since is not None:
+        qs = qs.filter(updated_at__gte=since - CATALOG_SINCE_OVERLAP)
+    return qs
+
+
+def _catalog_state(request):
+    """(rows, newest updated_at, max id, total products) - one aggregate, memoised per request."""
+    if not hasattr(request, "_catalog_state"):
+        try:
+            agg = _catalog_qs(request).aggregate(n=Count("id"), last=Max("updated_at"), top=Max("id"))
+            total = Product.objects.count() if request.GET.get("since") else agg["n"]
+            request._catalog_state = (agg["n"], agg["last"], agg["top"], total)
+        except ValueError:
+            request._catalog_state = None
+    return request._catalog_state
+
+
+def _catalog_etag(request):
+    state = _catalog_state(request)
+    if state is None:
+        return None
+    n, last, top, total = state
+    key = f"{request.GET.get('since', '')}|{n}|{last.isoformat() if last else ''}|{top}|{total}"
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def _catalog_last_modified(request):
+    state = _catalog_state(request)
+    return state[1] if state else None
+
+
+@require_GET
+@condition(etag_func=_catalog_etag, last_modified_func=_catalog_last_modified)
+def catalog(request):
+    """
+    GET /api/catalog/                 full catalog
+    GET /api/catalog/?since=<cursor>  only products changed since the cursor
+    Compact rows: {"fields": [...], "rows": [[sku, barcode, name, base_price, active], ...],
+                   "cursor": "<pass as ?since= next time>", "total": <all products>}
+    base_price is the product's own selling price: price lists (customer type /
+    location / dates) are not applied here and their edits do not move the
+    cursor or ETag. Use /api/invoices/quote/ for the price actually charged.
+    Send If-None-Match with the last ETag: 304 when nothing changed.
+    Rows are upserts keyed by SKU (deactivated products come back with active=false);
+    a terminal whose local count differs from "total" should do a full sync.
+    """
+    try:
+        qs = _catalog_qs(request)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+
+    rows = [
+        [sku, barcode or sku, name, str(price), active]
+        for sku, barcode, name, price, active in qs.order_by("id").values_list(
+            "sku", "barcode_value", "product_name", "selling_price", "is_active",
+        )
+    ]
+    _, last, _, total = _catalog_state(request)
+    resp = JsonResponse({
+        "fields": CATALOG_FIELDS,
+        "rows": rows,
+        "full": not request.GET.get("since"),
+        "cursor": (last or timezone.now()).isoformat(),
+        "total": total,
+    })
+    resp["Cache-Control"] = "private, no-cache"
+    return resp
 
 
 # -------------------------------------------------
 # Create Invoice (POS)
 # -------------------------------------------------
+def _parse_items(items_in):
+    """
+    [{"sku","qty","discount"?,"discount_pct"?}] -> list[LineItem]; ValueError on bad input.
+    Prices come from the price book: an item "price" is ignored.
+    """
+    if not items_in:
+        raise ValueError("No items provided.")
+
+    items: list[LineItem] = []
+    for i in items_in:
+        try:
+            sku = i["sku"]
+            qty = int(i["qty"])
+            discount = Decimal(str(i.get("discount") or 0))
+            discount_pct = Decimal(str(i.get("discount_pct") or 0))
+        except Exception:
+            raise ValueError("Invalid item payload.")
+
+        if not sku or qty <= 0:
+            raise ValueError("Each item requires sku and qty >= 1.")
+        if discount < 0 or not (0 <= discount_pct <= 100):
+            raise ValueError("Discount must be >= 0 and discount_pct between 0 and 100.")
+
+        items.append(LineItem(sku=sku, qty=qty, discount=discount, discount_pct=discount_pct))
+    return items
+
+
+def _parse_doc_discount(data):
+    try:
+        discount = Decimal(str(data.get("discount") or 0))
+        discount_pct = Decimal(str(data.get("discount_pct") or 0))
+    except Exception:
+        raise ValueError("Invalid discount.")
+    if discount < 0 or not (0 <= discount_pct <= 100):
+        raise ValueError("Discount must be >= 0 and discount_pct between 0 and 100.")
+    return discount, discount_pct
+
+
 class CreateInvoice(APIView):
     """
     POST:
     {
       "location_id": 1,
       "customer_id": 2,   # optional
+      "discount": "100",  # optional, invoice level (amount and/or discount_pct)
       "items": [
-        {"sku": "SLG42", "qty": 2, "price": "2500"}
+        {"sku": "SLG42", "qty": 2, "discount_pct": "10"}
       ]
     }
+    Unit prices come from the price book for the customer type + location;
+    an item "price" sent by the client is ignored.
     """
 
     def post(self, request):
@@ -84,33 +324,16 @@ class CreateInvoice(APIView):
             if customer_id else None
         )
 
-        items_in = request.data.get("items") or []
-        if not items_in:
-            return Response({"detail": "No items provided."}, status=400)
-
-        items: list[LineItem] = []
-        for i in items_in:
-            try:
-                sku = i["sku"]
-                qty = int(i["qty"])
-                price = i.get("price")
-            except Exception:
-                return Response({"detail": "Invalid item payload."}, status=400)
-
-            if not sku or qty <= 0:
-                return Response(
-                    {"detail": "Each item requires sku and qty >= 1."},
-                    status=400,
-                )
-
-            items.append(LineItem(sku=sku, qty=qty, price=price))
-
         try:
+            items = _parse_items(request.data.get("items") or [])
+            discount, discount_pct = _parse_doc_discount(request.data)
             invoice = create_invoice_with_lines(
                 location=location,
                 customer=customer,
                 items=items,
                 created_by=request.user if request.user.is_authenticated else None,
+                discount=discount,
+                discount_pct=discount_pct,
             )
         except ValueError as e:
             return Response({"detail": str(e)}, status=400)
@@ -119,66 +342,188 @@ class CreateInvoice(APIView):
             {
                 "invoice_id": invoice.id,
                 "invoice_no": getattr(invoice, "invoice_no", None),
+                "subtotal": str(invoice.subtotal),
+                "discount": str(invoice.discount),
+                "tax": str(invoice.tax),
+                "grand_total": str(invoice.grand_total),
             },
             status=status.HTTP_201_CREATED,
         )
 
 
 # -------------------------------------------------
-# Invoice Detail (Return UI helper)
+# Quote Invoice (totals preview, no posting)
+# -------------------------------------------------
+class QuoteInvoice(APIView):
+    """
+    POST: same payload as invoices/create/, nothing is saved.
+    Prices come from the in-memory price book for the customer type + location
+    (location_id / customer_id / customer_type optional); only SKUs the book
+    does not know are looked up, and unknown SKUs are a 400.
+    Returns gross, line_discounts, subtotal, discount, tax, rounding,
+    grand_total and the priced lines.
+    """
+
+    def post(self, request):
+        data = request.data
+        customer_type = (data.get("customer_type") or "retail").strip().lower()
+        customer_id = data.get("customer_id")
+        if customer_id:
+            customer_type = get_object_or_404(Customer, pk=customer_id).customer_type
+
+        try:
+            location_id = int(data["location_id"]) if data.get("location_id") else None
+            items = _parse_items(data.get("items") or [])
+            discount, discount_pct = _parse_doc_discount(data)
+        except (TypeError, ValueError) as e:
+            return Response({"detail": str(e) or "Invalid payload."}, status=400)
+
+        book = price_book()
+        prices = {
+            sku: book.price_for_sku(sku, customer_type=customer_type, location_id=location_id)
+            for sku in {it.sku for it in items}
+        }
+        missing = {sku for sku, price in prices.items() if price is None}
+        if missing:
+            for product in Product.objects.filter(sku__in=missing):
+                prices[product.sku] = book.price_for(product, customer_type=customer_type, location_id=location_id)
+            unknown = sorted(sku for sku in missing if prices[sku] is None)
+            if unknown:
+                return Response({"detail": f"Unknown SKU(s): {', '.join(unknown)}"}, status=400)
+
+        lines = [
+            QuoteLine(
+                sku=it.sku, qty=it.qty, unit_price=prices[it.sku],
+                discount=it.discount, discount_pct=it.discount_pct,
+            )
+            for it in items
+        ]
+
+        totals = compute_totals(lines, discount=discount, discount_pct=discount_pct)
+        return Response(totals.as_dict())
+
+
+# -------------------------------------------------
+# Invoice Detail (Return UI helper)  -- async
 # -------------------------------------------------
-class InvoiceDetail(APIView):
+@require_GET
+async def invoice_detail(request):
     """
     GET /api/invoices/detail/?invoice_no=INV-00012
     """
+    invoice_no = (request.GET.get("invoice_no") or "").strip()
+    if not invoice_no:
+        return JsonResponse({"detail": "Provide invoice_no."}, status=400)
 
-    def get(self, request):
-        invoice_no = (request.query_params.get("invoice_no") or "").strip()
-        if not invoice_no:
-            return Response({"detail": "Provide invoice_no."}, status=400)
-
-        invoice = get_object_or_404(Invoice, invoice_no=invoice_no)
-
-        # Sold quantities per SKU
-        sold_rows = (
-            InvoiceLine.objects
-            .filter(invoice=invoice)
-            .values("product__sku", "product__product_name", "unit_price")
-            .annotate(sold_qty=Sum("qty"))
-        )
+    invoice = await Invoice.objects.filter(invoice_no=invoice_no).afirst()
+    if not invoice:
+        return JsonResponse({"detail": "Not found."}, status=404)
 
-        # Already returned quantities per SKU
-        ret_rows = (
-            ReturnLine.objects
-            .filter(return_doc__invoice=invoice)
-            .values("product__sku")
-            .annotate(ret_qty=Sum("qty"))
-        )
-        ret_map = {r["product__sku"]: int(r["ret_qty"] or 0) for r in ret_rows}
-
-        lines = []
-        for r in sold_rows:
-            sku = r["product__sku"]
-            sold_qty = int(r["sold_qty"] or 0)
-            already_ret = ret_map.get(sku, 0)
-            remaining = max(sold_qty - already_ret, 0)
-
-            lines.append({
-                "sku": sku,
-                "name": r["product__product_name"],
-                "sold_qty": sold_qty,
-                "already_returned": already_ret,
-                "remaining_allowed": remaining,
-                "unit_price": str(r["unit_price"]),
-            })
+    # sold / returned per SKU straight from the lines (returned_qty is maintained on post)
+    qs = (
+        InvoiceLine.objects
+        .filter(invoice=invoice)
+        .values("product__sku", "product__product_name", "unit_price")
+        .annotate(sold_qty=Sum("qty"), ret_qty=Sum("returned_qty"))
+    )
 
-        return Response({
-            "id": invoice.id,
-            "invoice_no": invoice.invoice_no,
-            "total": str(getattr(invoice, "total_amount", "0")),
-            "lines": lines,
+    lines = []
+    async for r in qs:
+        sold_qty = int(r["sold_qty"] or 0)
+        already_ret = int(r["ret_qty"] or 0)
+
+        lines.append({
+            "sku": r["product__sku"],
+            "name": r["product__product_name"],
+            "sold_qty": sold_qty,
+            "already_returned": already_ret,
+            "remaining_allowed": max(sold_qty - already_ret, 0),
+            "unit_price": str(r["unit_price"]),
         })
 
+    return JsonResponse({
+        "id": invoice.id,
+        "invoice_no": invoice.invoice_no,
+        "total": str(invoice.grand_total),
+        "lines": lines,
+    })
+
+
+# -------------------------------------------------
+# Cancel / void invoices
+# -------------------------------------------------
+class CancelInvoices(StaffOnly, APIView):
+    """
+    POST:
+    {"invoice_id": 10, "reason": "wrong customer"}
+    or bulk:
+    {"invoice_ids": [10, 11, 12], "reason": "test day"}
+    Already cancelled invoices are reported under "skipped".
+    """
+
+    def post(self, request):
+        raw = request.data.get("invoice_ids")
+        if raw is None and request.data.get("invoice_id") is not None:
+            raw = [request.data.get("invoice_id")]
+        try:
+            ids = [int(i) for i in (raw or [])]
+        except (TypeError, ValueError):
+            return Response({"detail": "invoice_ids must be a list of integers."}, status=400)
+
+        try:
+            result = cancel_invoices(invoice_ids=ids, reason=(request.data.get("reason") or "").strip())
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(result)
+
+
+# -------------------------------------------------
+# Receipts (ESC/POS)
+# -------------------------------------------------
+@require_GET
+def invoice_receipt(request):
+    """
+    GET /api/invoices/receipt/?invoice_no=INV-00012  -> raw ESC/POS bytes (send as-is to the printer)
+    """
+    from django.http import HttpResponse
+    from .escpos import receipt_for
+
+    invoice = (
+        Invoice.objects.select_related("location", "customer")
+        .filter(invoice_no=(request.GET.get("invoice_no") or "").strip())
+        .first()
+    )
+    if not invoice:
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    resp = HttpResponse(receipt_for(invoice), content_type="application/octet-stream")
+    resp["Content-Disposition"] = f'attachment; filename="{invoice.invoice_no}.bin"'
+    return resp
+
+
+class PrintReceipt(APIView):
+    """
+    POST:
+    { "invoice_no": "INV-00012" }   # sent to settings.RECEIPT_PRINTER
+    """
+
+    def post(self, request):
+        from .escpos import get_printer, receipt_for
+
+        invoice = get_object_or_404(
+            Invoice.objects.select_related("location", "customer"),
+            invoice_no=(request.data.get("invoice_no") or "").strip(),
+        )
+        try:
+            printer = get_printer()
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        try:
+            sent = printer.send(receipt_for(invoice))
+        except OSError as e:
+            return Response({"detail": f"Printer unavailable: {e}"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({"invoice_no": invoice.invoice_no, "printed": True, "bytes": sent})
+
 
 # -------------------------------------------------
 # Create Return (WITH VALIDATION)
@@ -208,8 +553,7 @@ class CreateReturn(APIView):
         if not items_in:
             return Response({"detail": "No items provided."}, status=400)
 
-        # ---- requested return qty map ----
-        req_map: dict[str, int] = {}
+        items: list[LineItem] = []
         for i in items_in:
             sku = (i.get("sku") or "").strip()
             try:
@@ -223,84 +567,875 @@ class CreateReturn(APIView):
                     status=400,
                 )
 
-            req_map[sku] = req_map.get(sku, 0) + qty
+            items.append(LineItem(sku=sku, qty=qty, price=i.get("price")))
+
+        # sold / already returned are checked against InvoiceLine.returned_qty
+        # inside the posting transaction (see services._take_returned_qty)
+        try:
+            ret = create_return_with_lines(
+                location=location,
+                invoice=invoice,
+                customer=customer,
+                items=items,
+                created_by=request.user if request.user.is_authenticated else None,
+            )
+        except ReturnValidationError as e:
+            return Response({"detail": str(e), "items": e.items}, status=400)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
 
-        # ---- sold qty per SKU ----
-        sold_rows = (
-            InvoiceLine.objects
-            .filter(invoice=invoice)
-            .values("product__sku")
-            .annotate(sold_qty=Sum("qty"))
+        return Response(
+            {
+                "return_id": ret.id,
+                "return_no": getattr(ret, "return_no", None),
+            },
+            status=status.HTTP_201_CREATED,
         )
-        sold_map = {
-            r["product__sku"]: int(r["sold_qty"] or 0)
-            for r in sold_rows
-        }
 
-        # ---- already returned qty per SKU ----
-        ret_rows = (
-            ReturnLine.objects
-            .filter(return_doc__invoice=invoice)
-            .values("product__sku")
-            .annotate(ret_qty=Sum("qty"))
+
+# -------------------------------------------------
+# Stock Transfer (location -> location)
+# -------------------------------------------------
+class CreateTransfer(APIView):
+    """
+    POST:
+    {
+      "from_location_id": 1,
+      "to_location_id": 2,
+      "items": [{"sku": "SLG42", "qty": 12}],      # and/or
+      "scans": ["SLG42", "SLG42", "BARCODE123"],   # raw scanner codes, 1 pair each
+      "notes": "Weekly replenishment"
+    }
+    """
+
+    def post(self, request):
+        from_location = get_object_or_404(
+            StockLocation, pk=request.data.get("from_location_id")
+        )
+        to_location = get_object_or_404(
+            StockLocation, pk=request.data.get("to_location_id")
         )
-        ret_map = {
-            r["product__sku"]: int(r["ret_qty"] or 0)
-            for r in ret_rows
-        }
 
-        errors = []
-        for sku, want_qty in req_map.items():
-            sold_qty = sold_map.get(sku, 0)
-            already_ret = ret_map.get(sku, 0)
-            remaining = sold_qty - already_ret
-
-            if sold_qty <= 0:
-                errors.append({
-                    "sku": sku,
-                    "error": "This item was not sold on this invoice.",
-                })
-            elif want_qty > remaining:
-                errors.append({
-                    "sku": sku,
-                    "error": "Return qty exceeds allowed.",
-                    "sold": sold_qty,
-                    "already_returned": already_ret,
-                    "remaining_allowed": max(remaining, 0),
-                    "requested": want_qty,
-                })
-
-        if errors:
-            return Response(
+        items: list[LineItem] = []
+        for i in request.data.get("items") or []:
+            try:
+                sku = (i["sku"] or "").strip()
+                qty = int(i["qty"])
+            except Exception:
+                return Response({"detail": "Invalid item payload."}, status=400)
+
+            if not sku or qty <= 0:
+                return Response(
+                    {"detail": "Each item requires sku and qty >= 1."},
+                    status=400,
+                )
+            items.append(LineItem(sku=sku, qty=qty))
+
+        scans = [str(c).strip() for c in (request.data.get("scans") or []) if str(c).strip()]
+        if scans:
+            found = resolve_scanned_codes(scans)
+            unknown = sorted({c for c in scans if c not in found})
+            if unknown:
+                return Response(
+                    {"detail": "Unknown code(s).", "codes": unknown},
+                    status=400,
+                )
+            items.extend(LineItem(sku=found[c].sku, qty=1) for c in scans)
+
+        if not items:
+            return Response({"detail": "No items provided."}, status=400)
+
+        try:
+            transfer = create_transfer_with_lines(
+                from_location=from_location,
+                to_location=to_location,
+                items=items,
+                notes=(request.data.get("notes") or "").strip(),
+            )
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return Response(
+            {
+                "transfer_id": transfer.id,
+                "transfer_no": transfer.transfer_no,
+                "lines": transfer.lines.count(),
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+# -------------------------------------------------
+# Valuation (WAC / FIFO)
+# -------------------------------------------------
+def _parse_date(value):
+    from datetime import datetime, time
+    from django.utils import timezone
+    from django.utils.dateparse import parse_date
+
+    d = parse_date(value or "")
+    if not d:
+        return None
+    return timezone.make_aware(datetime.combine(d, time.min))
+
+
+class StockValue(APIView):
+    """
+    GET /api/valuation/stock/?location_id=1
+    Returns qty, avg cost and stock value under WAC and FIFO per SKU/location
+    as of the last revaluation (revalue_stock job / manage.py revalue_stock);
+    read-only, "last_ledger_id" tells how far the figures go.
+    """
+
+    def get(self, request):
+        from .models import StockValuation
+        from .valuation import last_processed_id
+
+        location_id = (request.query_params.get("location_id") or "").strip()
+        if location_id and not location_id.isdigit():
+            return Response({"detail": "location_id must be an integer."}, status=400)
+        qs = StockValuation.objects.select_related("product", "location").order_by("location__name", "product__sku")
+        if location_id:
+            qs = qs.filter(location_id=int(location_id))
+
+        rows = []
+        total_wac = total_fifo = Decimal("0")
+        for v in qs:
+            if not v.qty and not v.fifo_value:
+                continue
+            rows.append({
+                "sku": v.product.sku,
+                "name": v.product.product_name,
+                "location": v.location.name,
+                "qty": v.qty,
+                "avg_cost": str(v.avg_cost),
+                "wac_value": str(v.wac_value),
+                "fifo_value": str(v.fifo_value),
+            })
+            total_wac += v.wac_value
+            total_fifo += v.fifo_value
+
+        return Response({
+            "last_ledger_id": last_processed_id(),
+            "total_wac": str(total_wac),
+            "total_fifo": str(total_fifo),
+            "rows": rows,
+        })
+
+
+class CostOfGoodsSold(APIView):
+    """
+    GET /api/valuation/cogs/?date_from=2025-01-01&date_to=2025-02-01&location_id=1
+    date_to is exclusive. Without dates = all time.
+    """
+
+    def get(self, request):
+        from .valuation import cogs_between
+
+        date_from = _parse_date(request.query_params.get("date_from"))
+        date_to = _parse_date(request.query_params.get("date_to"))
+        if request.query_params.get("date_to") and date_to is None:
+            return Response({"detail": "date_to must be YYYY-MM-DD."}, status=400)
+        if request.query_params.get("date_from") and date_from is None:
+            return Response({"detail": "date_from must be YYYY-MM-DD."}, status=400)
+        location_id = (request.query_params.get("location_id") or "").strip()
+        if location_id and not location_id.isdigit():
+            return Response({"detail": "location_id must be an integer."}, status=400)
+
+        rows = cogs_between(
+            date_from=date_from,
+            date_to=date_to,
+            location_id=int(location_id) if location_id else None,
+        )
+
+        products = Product.objects.in_bulk({r["product_id"] for r in rows})
+        locations = StockLocation.objects.in_bulk({r["location_id"] for r in rows})
+
+        total_wac = sum((r["cogs_wac"] for r in rows), Decimal("0"))
+        total_fifo = sum((r["cogs_fifo"] for r in rows), Decimal("0"))
+        return Response({
+            "total_wac": str(total_wac),
+            "total_fifo": str(total_fifo),
+            "rows": [
                 {
-                    "detail": "Return validation failed.",
-                    "items": errors,
-                },
-                status=400,
+                    "sku": products[r["product_id"]].sku,
+                    "location": locations[r["location_id"]].name,
+                    "qty_sold": r["qty_sold"],
+                    "cogs_wac": str(r["cogs_wac"]),
+                    "cogs_fifo": str(r["cogs_fifo"]),
+                }
+                for r in rows
+            ],
+        })
+
+
+# -------------------------------------------------
+# Balance vs Ledger reconciliation
+# -------------------------------------------------
+class ReconcileStock(APIView):
+    """
+    GET  /api/stock/reconcile/?location_id=1     -> drift report
+    POST {"location_id": 1, "repair": "adjust"}  -> repair (adjust | balance), staff only
+    """
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [StaffWrites]
+
+    @staticmethod
+    def _rows(drift):
+        return [
+            {
+                "location_id": d.location_id,
+                "sku": d.sku,
+                "balance_qty": d.balance_qty,
+                "ledger_qty": d.ledger_qty,
+                "diff": d.diff,
+            }
+            for d in drift
+        ]
+
+    def get(self, request):
+        from .reconcile import find_drift
+
+        location_id = (request.query_params.get("location_id") or "").strip()
+        if location_id and not location_id.isdigit():
+            return Response({"detail": "location_id must be an integer."}, status=400)
+        drift = find_drift(location_ids=[int(location_id)] if location_id else None)
+        return Response({"count": len(drift), "items": self._rows(drift)})
+
+    def post(self, request):
+        from .reconcile import find_drift, repair_drift
+
+        location_id = str(request.data.get("location_id") or "").strip()
+        if location_id and not location_id.isdigit():
+            return Response({"detail": "location_id must be an integer."}, status=400)
+        if location_id:
+            location_ids = [get_object_or_404(StockLocation, pk=location_id).pk]
+        else:
+            location_ids = {d.location_id for d in find_drift()}
+
+        try:
+            fixed = repair_drift(location_ids, mode=request.data.get("repair") or "adjust")
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return Response({"repaired": len(fixed), "items": self._rows(fixed)})
+
+
+# -------------------------------------------------
+# Cycle Count sessions
+# -------------------------------------------------
+def _count_session_payload(session):
+    lines = session.lines.select_related("product").order_by("product__sku")
+    counted = [l for l in lines if l.is_counted]
+    return {
+        "id": session.id,
+        "session_no": session.session_no,
+        "location_id": session.location_id,
+        "status": session.status,
+        "lines": len(lines),
+        "counted_lines": len(counted),
+        "counted_qty": sum(l.counted_qty for l in counted),
+        "variances": [
+            {
+                "sku": l.product.sku,
+                "name": l.product.product_name,
+                "expected": l.expected_qty,
+                "counted": l.counted_qty,
+                "variance": l.variance,
+            }
+            for l in counted
+            if l.variance
+        ],
+    }
+
+
+class OpenCountSession(APIView):
+    """
+    POST {"location_id": 1, "notes": "Monthly count"}
+    """
+
+    def post(self, request):
+        location = get_object_or_404(StockLocation, pk=request.data.get("location_id"))
+        try:
+            session = open_count_session(location=location, notes=(request.data.get("notes") or "").strip())
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(_count_session_payload(session), status=status.HTTP_201_CREATED)
+
+
+class CountSessionDetail(APIView):
+    """
+    GET /api/counts/detail/?session_id=3   (live variance preview)
+    """
+
+    def get(self, request):
+        from .models import CountSession
+
+        session = get_object_or_404(CountSession, pk=request.query_params.get("session_id"))
+        return Response(_count_session_payload(session))
+
+
+class AddCountScans(APIView):
+    """
+    POST:
+    {
+      "session_id": 3,
+      "scans": ["SLG42", "SLG42", "BARCODE123"],   # 1 pair each, and/or
+      "items": [{"code": "SLG43", "qty": 12}]      # qty < 0 undoes scans
+    }
+    """
+
+    def post(self, request):
+        from .models import CountSession
+
+        session = get_object_or_404(CountSession, pk=request.data.get("session_id"))
+
+        counts: dict[str, int] = {}
+        for code in request.data.get("scans") or []:
+            code = str(code).strip()
+            if code:
+                counts[code] = counts.get(code, 0) + 1
+        for i in request.data.get("items") or []:
+            try:
+                code = str(i["code"]).strip()
+                qty = int(i["qty"])
+            except Exception:
+                return Response({"detail": "Invalid item payload."}, status=400)
+            if code and qty:
+                counts[code] = counts.get(code, 0) + qty
+
+        if not counts:
+            return Response({"detail": "No scans provided."}, status=400)
+
+        try:
+            touched = add_count_scans(session=session, counts=counts)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return Response({"lines_updated": touched})
+
+
+class CloseCountSession(APIView):
+    """
+    POST {"session_id": 3, "zero_uncounted": false}
+    """
+
+    def post(self, request):
+        from .models import CountSession
+
+        session = get_object_or_404(CountSession, pk=request.data.get("session_id"))
+        try:
+            posted = close_count_session(
+                session=session,
+                zero_uncounted=bool(request.data.get("zero_uncounted")),
             )
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return Response({
+            "session_no": session.session_no,
+            "adjustments": len(posted),
+            "net_variance": sum(v for _, v in posted),
+        })
+
+
+# -------------------------------------------------
+# Day closing (Z-report)
+# -------------------------------------------------
+def _closing_payload(z) -> dict:
+    return {
+        "id": z.id,
+        "location_id": z.location_id,
+        "business_date": z.business_date.isoformat(),
+        "closed_at": z.closed_at.isoformat(),
+        "invoice_count": z.invoice_count,
+        "subtotal": str(z.subtotal),
+        "discount": str(z.discount),
+        "tax": str(z.tax),
+        "sales_total": str(z.sales_total),
+        "units_sold": z.units_sold,
+        "return_count": z.return_count,
+        "returns_total": str(z.returns_total),
+        "units_returned": z.units_returned,
+        "net_total": str(z.net_total),
+        "cancelled_count": z.cancelled_count,
+        "cancelled_total": str(z.cancelled_total),
+        **z.summary,
+    }
+
+
+class CloseDay(StaffOnly, APIView):
+    """
+    POST {"location_id": 1, "date": "2026-10-19", "force": false}
+    date defaults to today; an already closed day is returned as stored
+    unless force=true (recompute).
+    """
+
+    def post(self, request):
+        from datetime import date
+        from .closing import close_day
+
+        location_id = str(request.data.get("location_id") or "").strip()
+        if not location_id.isdigit():
+            return Response({"detail": "location_id must be an integer."}, status=400)
+        location = get_object_or_404(StockLocation, pk=int(location_id))
+        try:
+            day = date.fromisoformat(request.data["date"]) if request.data.get("date") else None
+        except (TypeError, ValueError):
+            return Response({"detail": "date must be YYYY-MM-DD."}, status=400)
+        try:
+            closing = close_day(location=location, day=day, force=bool(request.data.get("force")))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(_closing_payload(closing))
+
+
+class DayClosingList(APIView):
+    """
+    GET /api/closings/?location_id=1&date_from=2026-10-01&date_to=2026-10-19
+    Stored closings only (nothing is recomputed), newest first, max 100.
+    """
+
+    def get(self, request):
+        from django.utils.dateparse import parse_date
+        from .models import DayClosing
+
+        location_id = (request.GET.get("location_id") or "").strip()
+        if location_id and not location_id.isdigit():
+            return Response({"detail": "location_id must be an integer."}, status=400)
+        qs = DayClosing.objects.all()
+        if location_id:
+            qs = qs.filter(location_id=int(location_id))
+        if parse_date(request.GET.get("date_from") or ""):
+            qs = qs.filter(business_date__gte=parse_date(request.GET["date_from"]))
+        if parse_date(request.GET.get("date_to") or ""):
+            qs = qs.filter(business_date__lte=parse_date(request.GET["date_to"]))
+        return Response({"results": [_closing_payload(z) for z in qs[:100]]})
+
+
+# -------------------------------------------------
+# Sales analytics (size x color, ABC, sell-through)
+# -------------------------------------------------
+def _analytics(request, kind: str, build):
+    """
+    Common params: location_id, date_from, date_to (YYYY-MM-DD), name (article),
+    format=json|csv. Cached until the next ledger movement.
+    """
+    from .analytics import cached, load_frame
+
+    params = {
+        "location_id": (request.GET.get("location_id") or "").strip(),
+        "date_from": (request.GET.get("date_from") or "").strip(),
+        "date_to": (request.GET.get("date_to") or "").strip(),
+        "name": (request.GET.get("name") or "").strip(),
+    }
+    if params["location_id"] and not params["location_id"].isdigit():
+        return None, JsonResponse({"detail": "location_id must be an integer."}, status=400)
+
+    def compute():
+        frame = load_frame(
+            date_from=_parse_date(params["date_from"]),
+            date_to=_parse_date(params["date_to"]),
+            location_id=int(params["location_id"]) if params["location_id"] else None,
+            name=params["name"],
+        )
+        return build(frame)
+
+    return cached(kind, params, compute), None
+
+
+def _csv_response(filename: str, rows):
+    import csv
+    from django.http import HttpResponse
+
+    resp = HttpResponse(content_type="text/csv")
+    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+    writer = csv.writer(resp)
+    writer.writerows(rows)
+    return resp
+
+
+def _dict_rows(rows: list[dict]):
+    if rows:
+        yield list(rows[0].keys())
+    for r in rows:
+        yield list(r.values())
+
+
+@require_GET
+def analytics_size_color(request):
+    """
+    GET /api/analytics/size-color/?name=Khussa%20Classic&location_id=1&date_from=2026-10-01
+    sizes x colors grid of units sold, on hand and sell-through.
+    """
+    from .analytics import matrix_csv_rows, size_color_matrix
+
+    data, error = _analytics(request, "size_color", size_color_matrix)
+    if error:
+        return error
+    if request.GET.get("format") == "csv":
+        return _csv_response("size_color.csv", matrix_csv_rows(data))
+    return JsonResponse(data)
+
+
+@require_GET
+def analytics_abc(request):
+    """
+    GET /api/analytics/abc/?date_from=2026-07-01&format=csv
+    SKUs by revenue with cumulative share and class (A 80% / B 15% / C rest).
+    """
+    from .analytics import abc_classes, abc_summary
+
+    rows, error = _analytics(request, "abc", abc_classes)
+    if error:
+        return error
+    if request.GET.get("format") == "csv":
+        return _csv_response("abc.csv", _dict_rows(rows))
+    return JsonResponse({"summary": abc_summary(rows), "results": rows})
+
+
+@require_GET
+def analytics_sell_through(request):
+    """
+    GET /api/analytics/sell-through/?location_id=1&date_from=2026-10-01
+    Per SKU: sold / (sold + on hand), best sellers first.
+    """
+    from .analytics import sell_through
+
+    rows, error = _analytics(request, "sell_through", sell_through)
+    if error:
+        return error
+    if request.GET.get("format") == "csv":
+        return _csv_response("sell_through.csv", _dict_rows(rows))
+    return JsonResponse({"results": rows})
+
+
+# -------------------------------------------------
+# Demand forecasts
+# -------------------------------------------------
+class DemandForecastList(APIView):
+    """
+    GET /api/forecasts/?location_id=1&max_cover=14&sku=SLG42&limit=200
+    Stored forecasts, lowest days of cover first (reorder candidates on top).
+    """
+
+    def get(self, request):
+        from .models import DemandForecast
+
+        location_id = (request.GET.get("location_id") or "").strip()
+        if location_id and not location_id.isdigit():
+            return Response({"detail": "location_id must be an integer."}, status=400)
+        qs = DemandForecast.objects.select_related("product").filter(daily_rate__gt=0)
+        if location_id:
+            qs = qs.filter(location_id=int(location_id))
+        if request.GET.get("sku"):
+            qs = qs.filter(product__sku=request.GET["sku"].strip())
+        try:
+            if request.GET.get("max_cover"):
+                qs = qs.filter(days_of_cover__lte=float(request.GET["max_cover"]))
+            limit = min(max(int(request.GET.get("limit") or 200), 1), 2000)
+        except ValueError:
+            return Response({"detail": "max_cover / limit must be numbers."}, status=400)
+
+        rows = qs.order_by("days_of_cover", "-daily_rate")[:limit]
+        return Response({"results": [
+            {
+                "sku": f.product.sku,
+                "location_id": f.location_id,
+                "daily_rate": f.daily_rate,
+                "forecast_qty": f.forecast_qty,
+                "horizon_days": f.horizon_days,
+                "on_hand": f.on_hand,
+                "days_of_cover": f.days_of_cover,
+                "method": f.method,
+                "alpha": f.alpha,
+                "computed_at": f.computed_at.isoformat(),
+            }
+            for f in rows
+        ]})
+
+
+class RefreshForecasts(StaffOnly, APIView):
+    """
+    POST {"history_days": 90, "horizon_days": 14, "method": "ses", "location_id": 1}
+    Same as `manage.py forecast_demand` (all fields optional).
+    """
 
-        # ---- build LineItems ----
-        items = [
-            LineItem(
-                sku=i["sku"],
-                qty=int(i["qty"]),
-                price=i.get("price"),
+    def post(self, request):
+        from .forecast import refresh_forecasts
+
+        try:
+            history = int(request.data.get("history_days") or 90)
+            horizon = int(request.data.get("horizon_days") or 14)
+            window = int(request.data.get("window") or 28)
+            location_id = int(request.data["location_id"]) if request.data.get("location_id") else None
+            if history < 7 or horizon < 1 or window < 1:
+                raise ValueError("history_days must be >= 7, horizon_days and window >= 1.")
+            result = refresh_forecasts(
+                history_days=history, horizon_days=horizon, method=request.data.get("method") or "ses",
+                window=min(window, history), location_id=location_id,
             )
-            for i in items_in
-        ]
+        except (TypeError, ValueError) as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(result)
+
+
+# -------------------------------------------------
+# Product families: stock matrix + size runs
+# -------------------------------------------------
+class FamilyStockMatrix(APIView):
+    """
+    GET /api/families/stock/?family_id=3            (or ?code=KC, ids comma separated)
+        &location_id=1                               optional
+    One aggregate over StockBalance grouped by family, size, color, location:
+    {"families": [{"id", "code", "name", "sizes", "colors", "locations",
+                   "stock": {location_id: {size: {color: on_hand}}}, "total"}]}
+    """
+
+    def get(self, request):
+        from .analytics import size_sort_key
+        from .models import ProductFamily, StockBalance
+
+        families = ProductFamily.objects.all()
+        if request.GET.get("family_id"):
+            try:
+                ids = [int(x) for x in request.GET["family_id"].split(",") if x.strip()]
+            except ValueError:
+                return Response({"detail": "family_id must be integers."}, status=400)
+            families = families.filter(pk__in=ids)
+        elif request.GET.get("code"):
+            families = families.filter(code__in=[c.strip().upper() for c in request.GET["code"].split(",")])
+        else:
+            return Response({"detail": "Provide family_id or code."}, status=400)
+        families = {f.pk: f for f in families}
 
-        ret = create_return_with_lines(
-            location=location,
-            invoice=invoice,
-            customer=customer,
-            items=items,
-            created_by=request.user if request.user.is_authenticated else None,
+        rows = StockBalance.objects.filter(product__family_id__in=families.keys())
+        if request.GET.get("location_id"):
+            rows = rows.filter(location_id=request.GET["location_id"])
+        rows = (
+            rows.values("product__family_id", "product__size", "product__color", "location_id", "location__name")
+            .annotate(on_hand=Sum("on_hand_qty"))
+            .order_by()
         )
 
+        out = {
+            fid: {"id": f.pk, "code": f.code, "name": f.name, "sizes": set(), "colors": set(),
+                  "locations": {}, "stock": {}, "total": 0}
+            for fid, f in families.items()
+        }
+        for r in rows:
+            fam = out[r["product__family_id"]]
+            size, color, qty = r["product__size"] or "-", r["product__color"] or "-", int(r["on_hand"] or 0)
+            fam["sizes"].add(size)
+            fam["colors"].add(color)
+            fam["locations"][r["location_id"]] = r["location__name"]
+            cell = fam["stock"].setdefault(r["location_id"], {}).setdefault(size, {})
+            cell[color] = cell.get(color, 0) + qty
+            fam["total"] += qty
+
+        for fam in out.values():
+            fam["sizes"] = sorted(fam["sizes"], key=size_sort_key)
+            fam["colors"] = sorted(fam["colors"])
+            fam["locations"] = [{"id": k, "name": v} for k, v in sorted(fam["locations"].items(), key=lambda kv: kv[1])]
+        return Response({"families": list(out.values())})
+
+
+class CreateSizeRun(StaffOnly, APIView):
+    """
+    POST:
+    {
+      "family_id": 3,                      # or "code" + "name" to create the family
+      "code": "KC", "name": "Khussa Classic",
+      "sizes": ["36", "37", "38", "39", "40"],
+      "colors": ["Black", "Gold"],
+      "cost": "900", "selling_price": "2500"   # optional, default family prices
+    }
+    """
+
+    def post(self, request):
+        from .models import ProductFamily
+        from .services import create_size_run
+
+        data = request.data
+        prices = {}
+        for field in ("cost", "selling_price"):
+            if data.get(field) in (None, ""):
+                continue
+            try:
+                prices[field] = Decimal(str(data[field]).strip())
+            except InvalidOperation:
+                return Response({"detail": f"{field} must be a number."}, status=400)
+            if not prices[field].is_finite():
+                return Response({"detail": f"{field} must be a number."}, status=400)
+
+        if data.get("family_id"):
+            family = get_object_or_404(ProductFamily, pk=data.get("family_id"))
+        else:
+            code = (data.get("code") or "").strip().upper()
+            name = (data.get("name") or "").strip()
+            if not code or not name:
+                return Response({"detail": "Provide family_id, or code and name for a new family."}, status=400)
+            family, _ = ProductFamily.objects.get_or_create(
+                code=code,
+                defaults={
+                    "name": name,
+                    "cost": prices.get("cost", Decimal("0")),
+                    "selling_price": prices.get("selling_price", Decimal("0")),
+                },
+            )
+
+        sizes, colors = data.get("sizes") or [], data.get("colors") or [""]
+        if not isinstance(sizes, list) or not isinstance(colors, list):
+            return Response({"detail": "sizes and colors must be lists."}, status=400)
+        try:
+            created, skipped = create_size_run(
+                family=family, sizes=sizes, colors=colors,
+                cost=prices.get("cost"), selling_price=prices.get("selling_price"),
+            )
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
         return Response(
             {
-                "return_id": ret.id,
-                "return_no": getattr(ret, "return_no", None),
+                "family_id": family.pk,
+                "created": [{"id": p.pk, "sku": p.sku, "size": p.size, "color": p.color} for p in created],
+                "skipped": skipped,
             },
-            status=status.HTTP_201_CREATED,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
         )
+
+
+# -------------------------------------------------
+# Bulk repricing / price history
+# -------------------------------------------------
+def _reprice_filter(data):
+    from .repricing import filter_products
+
+    return filter_products(
+        name=(data.get("name") or "").strip(),
+        color=(data.get("color") or "").strip(),
+        size=(data.get("size") or "").strip(),
+        family_id=data.get("family_id") or None,
+        sku_prefix=(data.get("sku_prefix") or "").strip(),
+        active_only=str(data.get("active_only") or "").lower() in ("1", "true", "yes"),
+    )
+
+
+class BulkReprice(StaffOnly, APIView):
+    """
+    POST:
+    {
+      "family_id": 3, "color": "Black",    # filters: name, color, size, family_id, sku_prefix, active_only
+      "field": "selling_price",            # or "cost"
+      "mode": "percent",                   # "percent" | "absolute" | "set"
+      "value": "10",
+      "step": "50",                        # optional rounding step
+      "reason": "Eid price list",
+      "dry_run": true                      # preview only
+    }
+    """
+
+    def post(self, request):
+        from .repricing import bulk_reprice, preview
+
+        data = request.data
+        qs = _reprice_filter(data)
+        if not any(data.get(k) for k in ("name", "color", "size", "family_id", "sku_prefix")):
+            return Response({"detail": "At least one filter is required."}, status=400)
+
+        kwargs = {
+            "field": data.get("field") or "selling_price",
+            "mode": data.get("mode") or "percent",
+            "value": data.get("value"),
+            "step": data.get("step") or None,
+        }
+        try:
+            if kwargs["value"] in (None, ""):
+                raise ValueError("value is required.")
+            rows = preview(qs, **kwargs)
+            matched = qs.count()
+            if data.get("dry_run"):
+                return Response({"matched": matched, "preview": rows, "applied": False})
+            changed = bulk_reprice(qs, reason=(data.get("reason") or "").strip(), **kwargs)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return Response({"matched": matched, "changed": changed, "preview": rows, "applied": True})
+
+
+class ProductPriceHistory(APIView):
+    """
+    GET ?sku=KC-BLK-38            -> all price changes of the product
+    GET ?sku=KC-BLK-38&at=2026-01-31T12:00:00  -> prices effective at that moment
+    """
+
+    def get(self, request):
+        from .models import PriceHistory
+        from .repricing import prices_at
+
+        product = get_object_or_404(Product, sku=(request.GET.get("sku") or "").strip())
+        at = request.GET.get("at")
+        if at:
+            when = parse_datetime(at)
+            if when is None:
+                return Response({"detail": "Invalid at (ISO datetime expected)."}, status=400)
+            if timezone.is_naive(when):
+                when = timezone.make_aware(when)
+            cost, price = prices_at(when, [product.pk])[product.pk]
+            return Response({"sku": product.sku, "at": when.isoformat(), "cost": str(cost), "selling_price": str(price)})
+
+        rows = PriceHistory.objects.filter(product=product).order_by("valid_from", "id")
+        return Response({
+            "sku": product.sku,
+            "history": [
+                {"valid_from": h.valid_from.isoformat(), "cost": str(h.cost),
+                 "selling_price": str(h.selling_price), "reason": h.reason}
+                for h in rows
+            ],
+        })
+
+
+# -------------------------------------------------
+# Maintenance jobs
+# -------------------------------------------------
+class JobList(APIView):
+    """
+    GET -> jobs with schedule, lease and last outcome, plus the last 20 runs of each
+    """
+
+    def get(self, request):
+        from django.db.models import F, Window
+        from django.db.models.functions import RowNumber
+
+        from .models import JobRun, ScheduledJob
+        from .scheduler import JOBS, sync_jobs
+
+        sync_jobs()
+        rows = {j.name: j for j in ScheduledJob.objects.all()}
+        runs: dict[str, list] = {}
+        recent = (
+            JobRun.objects.filter(name__in=list(JOBS))
+            .annotate(nth=Window(RowNumber(), partition_by=F("name"), order_by=F("id").desc()))
+            .filter(nth__lte=20)
+            .order_by("name", "-id")
+        )
+        for r in recent:
+            runs.setdefault(r.name, []).append({
+                "started_at": r.started_at.isoformat(), "duration_ms": r.duration_ms,
+                "status": r.status, "result": r.result,
+            })
+
+        out = []
+        for j in JOBS.values():
+            row = rows[j.name]
+            out.append({
+                "name": j.name,
+                "schedule": f"every {int(j.every.total_seconds())}s" if j.every else f"daily {j.at}",
+                "enabled": row.enabled,
+                "next_run_at": row.next_run_at.isoformat(),
+                "running": bool(row.lease_until and row.lease_until > timezone.now()),
+                "last_status": row.last_status,
+                "last_duration_ms": row.last_duration_ms,
+                "runs": runs.get(j.name, []),
+            })
+        return Response({"jobs": out})
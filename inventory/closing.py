@@ -0,0 +1,138 @@
+# inventory/closing.py
+"""
+End-of-day closing (Z-report) per location.
+
+close_day() aggregates one business day of a location with four grouped
+queries (invoices by customer type, invoice lines by customer type + SKU,
+return lines, cancelled invoices) and freezes the result into a DayClosing
+row. Reading a past closing is a single-row fetch; nothing is recomputed.
+"""
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+TOP_SKUS = 10
+ZERO = Decimal("0.00")
+
+
+def day_window(day):
+    """[start, end) of a local business day as aware datetimes."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _money(v) -> Decimal:
+    return Decimal(str(v or 0)).quantize(Decimal("0.01"))
+
+
+def build_day_summary(location_id, day) -> dict:
+    from .models import Invoice, InvoiceLine, ReturnLine
+
+    start, end = day_window(day)
+    ct = Coalesce("customer__customer_type", Value("retail"))
+
+    invoices = Invoice.objects.filter(location_id=location_id, date__gte=start, date__lt=end)
+    by_type = {
+        row["ct"]: row
+        for row in invoices.filter(status="FINAL").values(ct=ct).annotate(
+            n=Count("id"), subtotal=Sum("subtotal"), discount=Sum("discount"),
+            tax=Sum("tax"), total=Sum("grand_total"),
+        )
+    }
+
+    line_rows = (
+        InvoiceLine.objects.filter(
+            invoice__location_id=location_id, invoice__date__gte=start, invoice__date__lt=end,
+            invoice__status="FINAL",
+        )
+        .values("product__sku", "product__product_name", ct=Coalesce("invoice__customer__customer_type", Value("retail")))
+        .annotate(qty=Sum("qty"), amount=Sum("line_total"))
+    )
+    units_by_type: dict[str, int] = {}
+    per_sku: dict[str, dict] = {}
+    for r in line_rows:
+        units_by_type[r["ct"]] = units_by_type.get(r["ct"], 0) + int(r["qty"] or 0)
+        s = per_sku.setdefault(r["product__sku"], {
+            "sku": r["product__sku"], "name": r["product__product_name"], "qty": 0, "amount": ZERO,
+        })
+        s["qty"] += int(r["qty"] or 0)
+        s["amount"] += _money(r["amount"])
+
+    returns = ReturnLine.objects.filter(
+        return_doc__location_id=location_id, return_doc__date__gte=start, return_doc__date__lt=end,
+    ).aggregate(n=Count("return_doc", distinct=True), units=Sum("qty"), total=Sum("line_total"))
+
+    cancelled = invoices.filter(status="CANCELLED").aggregate(n=Count("id"), total=Sum("grand_total"))
+
+    breakdown = [
+        {
+            "customer_type": t,
+            "invoices": row["n"],
+            "units": units_by_type.get(t, 0),
+            "total": str(_money(row["total"])),
+        }
+        for t, row in sorted(by_type.items())
+    ]
+    top = sorted(per_sku.values(), key=lambda s: (-s["amount"], -s["qty"], s["sku"]))[:TOP_SKUS]
+
+    sales_total = sum((_money(r["total"]) for r in by_type.values()), ZERO)
+    returns_total = _money(returns["total"])
+    return {
+        "invoice_count": sum(r["n"] for r in by_type.values()),
+        "subtotal": sum((_money(r["subtotal"]) for r in by_type.values()), ZERO),
+        "discount": sum((_money(r["discount"]) for r in by_type.values()), ZERO),
+        "tax": sum((_money(r["tax"]) for r in by_type.values()), ZERO),
+        "sales_total": sales_total,
+        "units_sold": sum(units_by_type.values()),
+        "return_count": returns["n"] or 0,
+        "returns_total": returns_total,
+        "units_returned": int(returns["units"] or 0),
+        "net_total": sales_total - returns_total,
+        "cancelled_count": cancelled["n"] or 0,
+        "cancelled_total": _money(cancelled["total"]),
+        "summary": {
+            "by_customer_type": breakdown,
+            "top_skus": [{**s, "amount": str(s["amount"])} for s in top],
+        },
+    }
+
+
+@transaction.atomic
+def close_day(*, location, day=None, force: bool = False):
+    """
+    Freezes the Z-report of `day` (default: today) for a location.
+    Closing the same day again returns the stored record unless force=True,
+    which recomputes it (e.g. after a late cancellation).
+    """
+    from .models import DayClosing, StockLocation
+
+    day = day or timezone.localdate()
+    if day > timezone.localdate():
+        raise ValueError("Cannot close a future day.")
+
+    # one closing per location at a time: a concurrent close_day waits here and
+    # then finds the first one's row (NO KEY UPDATE: sales keep inserting meanwhile)
+    StockLocation.objects.select_for_update(no_key=True).filter(pk=location.pk).first()
+    existing = DayClosing.objects.select_for_update().filter(location=location, business_date=day).first()
+    if existing and not force:
+        return existing
+
+    fields = build_day_summary(location.pk, day)
+    if existing:
+        for k, v in fields.items():
+            setattr(existing, k, v)
+        existing.closed_at = timezone.now()
+        existing.save()
+        return existing
+    try:
+        with transaction.atomic():
+            return DayClosing.objects.create(location=location, business_date=day, **fields)
+    except IntegrityError:
+        # no row locks (SQLite): a concurrent close_day inserted it first
+        return DayClosing.objects.get(location=location, business_date=day)
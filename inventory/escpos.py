@@ -0,0 +1,169 @@
+# inventory/escpos.py
+"""
+ESC/POS receipts for 80mm thermal printers.
+
+render_receipt() lays an invoice out as plain ESC/POS bytes (fixed-width
+text, bold/double-size headings, CODE128 barcode of the invoice number,
+paper cut): no PDF, no fonts, no images. Receipts are cached in-process
+per (invoice, status), so a reprint is a dict lookup; a cancellation
+changes the status and therefore the receipt.
+
+Printers:
+- tcp://host:9100  raw socket ("JetDirect"), what most Ethernet thermal printers speak
+- file:///path     appends the bytes to a file (stand-in printer for tests / dev)
+"""
+from __future__ import annotations
+
+import socket
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.utils import timezone
+
+ESC, GS = b"\x1b", b"\x1d"
+INIT = ESC + b"@" + ESC + b"t\x00"           # reset, code page PC437
+LEFT, CENTER = ESC + b"a\x00", ESC + b"a\x01"
+BOLD_ON, BOLD_OFF = ESC + b"E\x01", ESC + b"E\x00"
+DOUBLE_ON, DOUBLE_OFF = GS + b"!\x11", GS + b"!\x00"
+CUT = GS + b"V" + bytes([66, 3])              # feed 3 lines, partial cut
+
+CACHE_SIZE = 256
+
+_cache: OrderedDict = OrderedDict()
+_lock = threading.Lock()
+
+
+def receipt_width() -> int:
+    return int(getattr(settings, "RECEIPT_WIDTH", 48))
+
+
+def _text(s: str) -> bytes:
+    return s.encode("cp437", errors="replace")
+
+
+def _money(v) -> str:
+    return f"{Decimal(str(v or 0)):,.2f}"
+
+
+def _pair(left: str, right: str, width: int) -> str:
+    left = left[: max(width - len(right) - 1, 0)]
+    return left + " " * (width - len(left) - len(right)) + right
+
+
+def barcode128(data: str) -> bytes:
+    """GS k CODE128 (code set B) with the digits printed below."""
+    payload = b"{B" + data.encode("ascii", errors="replace")[:253]
+    return (
+        GS + b"h" + bytes([80])          # height (dots)
+        + GS + b"w" + bytes([2])         # module width
+        + GS + b"H" + bytes([2])         # HRI below
+        + GS + b"k" + bytes([73, len(payload)]) + payload
+    )
+
+
+def render_receipt(invoice, lines, width: int | None = None) -> bytes:
+    """
+    invoice: Invoice with location/customer loaded.
+    lines: iterables of (name, sku, qty, unit_price, discount, line_total).
+    """
+    w = width or receipt_width()
+    header = getattr(settings, "RECEIPT_HEADER", "") or invoice.location.name
+    footer = getattr(settings, "RECEIPT_FOOTER", "")
+    rule = _text("-" * w) + b"\n"
+
+    out = [INIT, CENTER, BOLD_ON, DOUBLE_ON, _text(header[: w // 2]), b"\n", DOUBLE_OFF, BOLD_OFF]
+    if header != invoice.location.name:
+        out += [_text(invoice.location.name[:w]), b"\n"]
+    out += [b"\n", LEFT]
+    out += [
+        _text(_pair("Invoice", invoice.invoice_no, w)), b"\n",
+        _text(_pair("Date", timezone.localtime(invoice.date).strftime("%Y-%m-%d %H:%M"), w)), b"\n",
+        _text(_pair("Customer", invoice.customer_display()[:w - 10], w)), b"\n",
+        rule,
+    ]
+
+    for name, sku, qty, unit_price, discount, _line_total in lines:
+        # gross on the item line; the line discount (if any) follows it
+        gross = Decimal(str(unit_price or 0)) * qty
+        out += [_text(f"{name} {sku}"[:w]), b"\n"]
+        out += [_text(_pair(f"  {qty} x {_money(unit_price)}", _money(gross), w)), b"\n"]
+        if discount:
+            out += [_text(_pair("  discount", "-" + _money(discount), w)), b"\n"]
+
+    out += [rule, _text(_pair("Subtotal", _money(invoice.subtotal), w)), b"\n"]
+    if invoice.discount:
+        out += [_text(_pair("Discount", "-" + _money(invoice.discount), w)), b"\n"]
+    if invoice.tax:
+        out += [_text(_pair("Tax", _money(invoice.tax), w)), b"\n"]
+    out += [
+        BOLD_ON, DOUBLE_ON, _text(_pair("TOTAL", _money(invoice.grand_total), w // 2)), b"\n",
+        DOUBLE_OFF, BOLD_OFF,
+    ]
+
+    if invoice.status == "CANCELLED":
+        out += [b"\n", CENTER, BOLD_ON, _text("*** CANCELLED ***"), b"\n", BOLD_OFF, LEFT]
+
+    out += [b"\n", CENTER, barcode128(invoice.invoice_no), b"\n"]
+    if footer:
+        out += [_text(footer[:w]), b"\n"]
+    out += [LEFT, CUT]
+    return b"".join(out)
+
+
+def receipt_for(invoice) -> bytes:
+    """Receipt bytes of an invoice, rendered once per (invoice, status, width)."""
+    from .models import InvoiceLine
+
+    key = (invoice.pk, invoice.status, receipt_width())
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    lines = (
+        InvoiceLine.objects.filter(invoice_id=invoice.pk)
+        .order_by("id")
+        .values_list("product__product_name", "product__sku", "qty", "unit_price", "discount", "line_total")
+    )
+    data = render_receipt(invoice, lines)
+    with _lock:
+        _cache[key] = data
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return data
+
+
+# -----------------------------
+# Printers
+# -----------------------------
+class SocketPrinter:
+    def __init__(self, host: str, port: int = 9100, timeout: float = 3.0):
+        self.host, self.port, self.timeout = host, port, timeout
+
+    def send(self, data: bytes) -> int:
+        with socket.create_connection((self.host, self.port), timeout=self.timeout) as s:
+            s.sendall(data)
+        return len(data)
+
+
+class FilePrinter:
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, data: bytes) -> int:
+        with open(self.path, "ab") as f:
+            f.write(data)
+        return len(data)
+
+
+def get_printer(url: str | None = None):
+    url = url if url is not None else getattr(settings, "RECEIPT_PRINTER", "")
+    parts = urlsplit(url or "")
+    if parts.scheme == "tcp" and parts.hostname:
+        return SocketPrinter(parts.hostname, parts.port or 9100)
+    if parts.scheme == "file" and parts.path:
+        return FilePrinter(parts.path)
+    raise ValueError("No receipt printer configured (RECEIPT_PRINTER=tcp://host:9100 or file:///path).")
@@ -0,0 +1,165 @@
+# inventory/forecast.py
+"""
+Batch demand forecasting per product/location (NumPy).
+
+Daily net demand (OUT - RETURN - VOID) of the last `history_days` is
+aggregated by the database per product/location/day and scattered into ONE
+(series x days) matrix. Models are fitted for all series at once:
+
+- "ses": simple exponential smoothing; every alpha of ALPHAS is run as a
+  row of a (alphas x series) level matrix, the one-step-ahead squared
+  error picks the best alpha per series. The only Python loop is over the
+  days (e.g. 90), never over SKUs.
+- "ma": moving average of the last `window` days.
+
+Result per series: daily rate, forecast for the horizon and days of cover
+(on hand / daily rate), upserted into DemandForecast.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+METHODS = ("ses", "ma")
+ALPHAS = np.array([0.05, 0.1, 0.2, 0.3, 0.5], dtype=np.float32)
+
+
+@dataclass
+class DemandMatrix:
+    keys: np.ndarray      # (S, 2) product_id, location_id
+    demand: np.ndarray    # (S, T) float32 units per day, oldest day first
+    start: object         # date of column 0
+
+
+def load_demand(history_days: int = 90, location_id=None, today=None) -> DemandMatrix:
+    from .models import StockLedger
+
+    today = today or timezone.localdate()
+    start = today - timedelta(days=history_days - 1)
+    since = timezone.make_aware(datetime.combine(start, datetime.min.time()))
+
+    sign = Case(When(movement_type="OUT", then=1), default=-1, output_field=IntegerField())
+    qs = StockLedger.objects.filter(movement_type__in=("OUT", "RETURN", "VOID"), date_time__gte=since)
+    if location_id:
+        qs = qs.filter(location_id=location_id)
+    rows = list(
+        qs.annotate(day=TruncDate("date_time"))
+        .values("product_id", "location_id", "day")
+        .annotate(q=Sum(sign * F("qty")))
+        .values_list("product_id", "location_id", "day", "q")
+    )
+    if not rows:
+        return DemandMatrix(np.zeros((0, 2), dtype=np.int64), np.zeros((0, history_days), dtype=np.float32), start)
+
+    pid, loc, day, q = zip(*rows)
+    pairs = np.stack([np.array(pid, dtype=np.int64), np.array(loc, dtype=np.int64)], axis=1)
+    keys, series = np.unique(pairs, axis=0, return_inverse=True)
+    col = np.array([(d - start).days for d in day], dtype=np.int64)
+    ok = (col >= 0) & (col < history_days)
+
+    demand = np.zeros((len(keys), history_days), dtype=np.float32)
+    np.add.at(demand, (series.reshape(-1)[ok], col[ok]), np.array(q, dtype=np.float32)[ok])
+    # returns can exceed sales on a day; demand itself is never negative
+    np.maximum(demand, 0, out=demand)
+    return DemandMatrix(keys, demand, start)
+
+
+def moving_average(demand: np.ndarray, window: int = 28) -> np.ndarray:
+    return demand[:, -window:].mean(axis=1)
+
+
+def ses(demand: np.ndarray, alphas: np.ndarray = ALPHAS) -> tuple[np.ndarray, np.ndarray]:
+    """(daily rate, chosen alpha) per series; vectorized over series and alphas."""
+    S, T = demand.shape
+    if S == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+    a = alphas[:, None]                                     # (A, 1)
+    level = np.broadcast_to(demand[:, :7].mean(axis=1), (len(alphas), S)).copy()
+    sse = np.zeros((len(alphas), S), dtype=np.float32)
+    for t in range(T):
+        x = demand[:, t]                                    # (S,)
+        err = x - level
+        sse += err * err
+        level += a * err
+    best = np.argmin(sse, axis=0)
+    return level[best, np.arange(S)], alphas[best]
+
+
+def forecast(*, history_days: int = 90, method: str = "ses", window: int = 28, location_id=None):
+    """Computes all series; returns (keys, rate, alpha, on_hand, timings)."""
+    from .models import StockBalance
+
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+
+    t0 = time.perf_counter()
+    m = load_demand(history_days, location_id=location_id)
+    t1 = time.perf_counter()
+
+    if method == "ses":
+        rate, alpha = ses(m.demand)
+    else:
+        rate, alpha = moving_average(m.demand, window), np.zeros(len(m.keys), dtype=np.float32)
+    t2 = time.perf_counter()
+
+    # on hand aligned to the series keys via one sorted composite key
+    on_hand = np.zeros(len(m.keys), dtype=np.float64)
+    if len(m.keys):
+        bal = StockBalance.objects.all()
+        if location_id:
+            bal = bal.filter(location_id=location_id)
+        b = np.array(list(bal.values_list("product_id", "location_id", "on_hand_qty")), dtype=np.int64).reshape(-1, 3)
+        width = int(max(m.keys[:, 1].max(), b[:, 1].max() if len(b) else 0)) + 1
+        series_code = m.keys[:, 0] * width + m.keys[:, 1]
+        bal_code = b[:, 0] * width + b[:, 1]
+        idx = np.searchsorted(series_code, bal_code)
+        hit = (idx < len(series_code)) & (series_code[np.minimum(idx, len(series_code) - 1)] == bal_code)
+        on_hand[idx[hit]] = np.maximum(b[hit, 2], 0)
+    t3 = time.perf_counter()
+
+    return m.keys, rate.astype(np.float64), alpha, on_hand, {"load": (t1 - t0) + (t3 - t2), "fit": t2 - t1}
+
+
+def refresh_forecasts(
+    *, history_days: int = 90, horizon_days: int = 14, method: str = "ses", window: int = 28, location_id=None,
+) -> dict:
+    """Recomputes and stores every series (upsert), drops forecasts of series without demand."""
+    from .models import DemandForecast
+
+    keys, rate, alpha, on_hand, timings = forecast(
+        history_days=history_days, method=method, window=window, location_id=location_id,
+    )
+    cover = np.divide(on_hand, rate, out=np.full_like(rate, np.nan), where=rate > 1e-6)
+
+    now = timezone.now()
+    t0 = time.perf_counter()
+    objs = [
+        DemandForecast(
+            product_id=p, location_id=l, computed_at=now, method=method,
+            alpha=round(float(a), 3), daily_rate=round(float(r), 4), horizon_days=horizon_days,
+            forecast_qty=round(float(r) * horizon_days, 2), on_hand=int(h),
+            days_of_cover=None if np.isnan(c) else round(float(c), 1),
+        )
+        for (p, l), r, a, h, c in zip(keys.tolist(), rate.tolist(), alpha.tolist(), on_hand.tolist(), cover.tolist())
+    ]
+    with transaction.atomic():
+        DemandForecast.objects.bulk_create(
+            objs, batch_size=2000, update_conflicts=True,
+            unique_fields=["product", "location"],
+            update_fields=["computed_at", "method", "alpha", "daily_rate", "horizon_days",
+                           "forecast_qty", "on_hand", "days_of_cover"],
+        )
+        stale = DemandForecast.objects.filter(computed_at__lt=now)
+        if location_id:
+            stale = stale.filter(location_id=location_id)
+        removed, _ = stale.delete()
+    timings["store"] = time.perf_counter() - t0
+    return {"series": len(objs), "removed": removed, "timings": {k: round(v, 3) for k, v in timings.items()}}
@@ -0,0 +1,53 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from inventory.models import Product
+from inventory.thumbnails import thumb_quality, needs_thumbnails, render_thumbnails, thumb_sizes
+
+
+class Command(BaseCommand):
+    help = "Generate missing WebP/JPEG thumbnails for product images (parallel backfill)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Worker processes.")
+        parser.add_argument("--force", action="store_true", help="Rebuild even when thumbnails are up to date.")
+
+    def handle(self, *args, **opts):
+        products = [
+            p for p in Product.objects.exclude(product_image="").exclude(product_image__isnull=True)
+            .only("id", "sku", "product_image", "thumbnails").order_by("id")
+            if opts["force"] or needs_thumbnails(p)
+        ]
+        if not products:
+            self.stdout.write(self.style.SUCCESS("All thumbnails up to date ✅"))
+            return
+
+        media_root, sizes, quality = str(settings.MEDIA_ROOT), thumb_sizes(), thumb_quality()
+        by_id = {p.pk: p for p in products}
+        done, failed = [], 0
+
+        # workers only touch files; rows are written back here in one bulk_update
+        with ProcessPoolExecutor(max_workers=max(1, opts["workers"])) as pool:
+            futures = {
+                pool.submit(render_thumbnails, p.product_image.path, media_root, sizes, quality): p.pk
+                for p in products
+            }
+            for fut in as_completed(futures):
+                p = by_id[futures[fut]]
+                try:
+                    thumbs = fut.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{p.sku}: {e}")
+                    continue
+                thumbs["image"] = p.product_image.name
+                p.thumbnails = thumbs
+                done.append(p)
+
+        Product.objects.bulk_update(done, ["thumbnails"], batch_size=500)
+        self.stdout.write(self.style.SUCCESS(f"Thumbnails built for {len(done)} product(s)."))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} image(s) failed."))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.reconcile import REPAIR_MODES, find_drift, repair_drift
+
+
+class Command(BaseCommand):
+    help = "Compare StockBalance with StockLedger totals and optionally repair the drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--location", type=int, action="append", help="Location id (repeatable). Default: all.")
+        parser.add_argument("--workers", type=int, default=4, help="Parallel location checks.")
+        parser.add_argument(
+            "--repair", choices=REPAIR_MODES,
+            help="adjust = post ADJUST ledger rows to match balances; balance = reset balances to the ledger.",
+        )
+
+    def handle(self, *args, **opts):
+        drift = find_drift(location_ids=opts["location"], workers=opts["workers"])
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("No drift. Balances match the ledger ✅"))
+            return
+
+        for d in drift:
+            self.stdout.write(
+                f"loc={d.location_id} sku={d.sku} balance={d.balance_qty} ledger={d.ledger_qty} diff={d.diff:+d}"
+            )
+        self.stdout.write(self.style.WARNING(f"{len(drift)} drifting balance(s)."))
+
+        if not opts["repair"]:
+            return
+
+        try:
+            fixed = repair_drift({d.location_id for d in drift}, mode=opts["repair"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Repaired {len(fixed)} balance(s) ({opts['repair']})."))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.valuation import revalue
+
+
+class Command(BaseCommand):
+    help = "Update WAC/FIFO stock valuation from the stock ledger (incremental by default)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Drop stored valuation and revalue the whole ledger.")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        res = revalue(full=opts["full"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Valued {res['rows']} ledger rows over {res['series']} product/locations "
+            f"(up to ledger id {res['last_ledger_id']}) in {time.perf_counter() - t0:.2f}s"
+        ))
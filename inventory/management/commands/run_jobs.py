@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory import scheduler
+from inventory.models import ScheduledJob
+
+
+class Command(BaseCommand):
+    help = "Run maintenance jobs: list them, run one now, run what is due once, or keep scheduling in the foreground."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--list", action="store_true", help="Show jobs, schedule and last outcome.")
+        parser.add_argument("--job", action="append", help="Run this job now (repeatable), if no other process holds its lease.")
+        parser.add_argument("--once", action="store_true", help="Run every due job once and exit (e.g. from cron).")
+
+    def handle(self, *args, **opts):
+        scheduler.sync_jobs()
+
+        if opts["list"]:
+            rows = {j.name: j for j in ScheduledJob.objects.all()}
+            for j in scheduler.JOBS.values():
+                row = rows.get(j.name)
+                when = f"every {j.every}" if j.every else f"daily {j.at}"
+                self.stdout.write(
+                    f"{j.name:<18} {when:<18} next={timezone.localtime(row.next_run_at):%Y-%m-%d %H:%M} "
+                    f"last={row.last_status or '-'} ({row.last_duration_ms or 0:.0f}ms)"
+                    f"{'' if row.enabled else ' [disabled]'}"
+                )
+            return
+
+        if opts["job"]:
+            unknown = [n for n in opts["job"] if n not in scheduler.JOBS]
+            if unknown:
+                raise CommandError(f"Unknown job(s): {', '.join(unknown)}")
+            for name in opts["job"]:
+                j = scheduler.JOBS[name]
+                if not j.per_process and not scheduler.acquire(j, force=True):
+                    self.stdout.write(self.style.WARNING(f"{name}: running elsewhere or disabled, skipped."))
+                    continue
+                self._report(scheduler.run_job(j))
+            return
+
+        sched = scheduler.Scheduler()
+        if opts["once"]:
+            sched.run_pending()
+            for fut, _ in list(sched.running.values()):
+                self._report(fut.result())
+            sched.stop()
+            return
+
+        self.stdout.write(f"Scheduling {len(scheduler.JOBS)} job(s) every {sched.tick:.0f}s, Ctrl+C to stop.")
+        sched.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            sched.stop()
+
+    def _report(self, res):
+        style = self.style.SUCCESS if res["status"] == "ok" else self.style.ERROR
+        self.stdout.write(style(f"{res['name']}: {res['status']} in {res['duration_ms']:.0f}ms {res['result'] or ''}"))
@@ -0,0 +1,151 @@
+import multiprocessing as mp
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+
+def _worker(args):
+    """One OS process posting random invoices / transfers / returns against the STRESS-* data."""
+    seed, rounds, mode = args
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import DatabaseError
+
+    from inventory.models import Invoice, Product, StockLocation
+    from inventory.services import (
+        LineItem, create_invoice_with_lines, create_return_with_lines, create_transfer_with_lines,
+    )
+
+    settings.POSTING_LOCK_MODE = mode
+    rnd = random.Random(seed)
+    locations = list(StockLocation.objects.filter(name__startswith="STRESS-").order_by("id"))
+    skus = list(Product.objects.filter(sku__startswith="STRESS-").order_by("id").values_list("sku", flat=True))
+    mine: list[int] = []
+    stats = {"ok": 0, "rejected": 0, "deadlock": 0, "locked": 0, "error": 0, "errors": []}
+
+    for _ in range(rounds):
+        op = rnd.random()
+        try:
+            if op < 0.5:       # retail: 1-2 SKUs
+                loc = rnd.choice(locations)
+                picked = rnd.sample(skus, rnd.randint(1, 2))
+                inv = create_invoice_with_lines(location=loc, items=[LineItem(sku=s, qty=1) for s in picked])
+                mine.append(inv.pk)
+            elif op < 0.75:    # wholesale: most SKUs, any order
+                loc = rnd.choice(locations)
+                picked = rnd.sample(skus, max(1, len(skus) * 3 // 4))
+                inv = create_invoice_with_lines(
+                    location=loc, items=[LineItem(sku=s, qty=rnd.randint(1, 3)) for s in picked],
+                )
+                mine.append(inv.pk)
+            elif op < 0.9:     # transfer between two locations
+                src, dst = rnd.sample(locations, 2)
+                picked = rnd.sample(skus, rnd.randint(1, len(skus)))
+                create_transfer_with_lines(
+                    from_location=src, to_location=dst, items=[LineItem(sku=s, qty=1) for s in picked],
+                )
+            elif mine:         # return one unit of an earlier sale
+                inv = Invoice.objects.select_related("location").get(pk=rnd.choice(mine))
+                line = inv.lines.select_related("product").first()
+                create_return_with_lines(
+                    location=inv.location, invoice=inv, items=[LineItem(sku=line.product.sku, qty=1)],
+                )
+            stats["ok"] += 1
+        except ValueError:
+            stats["rejected"] += 1          # business rule (stock, return qty): expected
+        except DatabaseError as e:
+            msg = str(e).lower()
+            key = "deadlock" if "deadlock" in msg else "locked" if "locked" in msg or "lock timeout" in msg else "error"
+            stats[key] += 1
+            if key == "error" and len(stats["errors"]) < 3:
+                stats["errors"].append(str(e)[:200])
+    connections.close_all()
+    return stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Multi-process posting stress test: concurrent retail/wholesale invoices, transfers and returns "
+        "on STRESS-* locations/products, then checks deadlocks, lock errors, negative stock and "
+        "balance vs ledger drift. Writes test data: run it against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--confirm", action="store_true", help="Required: allow writing STRESS-* data.")
+        parser.add_argument("--mode", choices=("rows", "advisory"), default="advisory", help="POSTING_LOCK_MODE to test.")
+        parser.add_argument("--processes", type=int, default=8)
+        parser.add_argument("--rounds", type=int, default=40, help="Postings per process.")
+        parser.add_argument("--locations", type=int, default=3)
+        parser.add_argument("--skus", type=int, default=12)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **opts):
+        if not opts["confirm"]:
+            raise CommandError("This writes STRESS-* invoices and stock into the database; pass --confirm.")
+        if opts["locations"] < 2:
+            raise CommandError("Need at least 2 locations.")
+
+        from inventory.models import Product, StockBalance, StockLedger, StockLocation
+        from inventory.reconcile import location_drift
+
+        locations, products = self._fixture(opts["locations"], opts["skus"])
+        connections.close_all()
+
+        ctx = mp.get_context("spawn")
+        jobs = [(opts["seed"] * 1000 + i, opts["rounds"], opts["mode"]) for i in range(opts["processes"])]
+        t0 = time.perf_counter()
+        with ctx.Pool(opts["processes"]) as pool:
+            results = pool.map(_worker, jobs)
+        elapsed = time.perf_counter() - t0
+
+        total = {k: sum(r[k] for r in results) for k in ("ok", "rejected", "deadlock", "locked", "error")}
+        errors = [e for r in results for e in r["errors"]]
+        drift = [d for loc in locations for d in location_drift(loc.pk)]
+        negative = StockBalance.objects.filter(location__in=locations, on_hand_qty__lt=0).count()
+
+        posted = total["ok"] + total["rejected"]
+        self.stdout.write(
+            f"mode={opts['mode']} processes={opts['processes']} attempts={sum(total.values())} "
+            f"in {elapsed:.1f}s ({posted / elapsed if elapsed else 0:.0f}/s)\n"
+            f"  ok={total['ok']} rejected={total['rejected']} deadlocks={total['deadlock']} "
+            f"lock_errors={total['locked']} other_errors={total['error']}\n"
+            f"  negative balances={negative} drifting balances={len(drift)}"
+        )
+        for e in errors:
+            self.stdout.write(f"  error: {e}")
+
+        if total["deadlock"] or total["locked"] or total["error"] or negative or drift:
+            raise CommandError("Stress test FAILED.")
+        self.stdout.write(self.style.SUCCESS("Stress test passed: no deadlocks, no lock errors, ledger == balances ✅"))
+
+    @transaction.atomic
+    def _fixture(self, n_locations, n_skus):
+        from decimal import Decimal
+
+        from inventory.models import Product, StockBalance, StockLedger, StockLocation
+
+        locations = [StockLocation.objects.get_or_create(name=f"STRESS-{i + 1}")[0] for i in range(n_locations)]
+        products = [
+            Product.objects.get_or_create(
+                sku=f"STRESS-{i + 1:04d}",
+                defaults={"product_name": f"Stress item {i + 1}", "cost": Decimal("100"), "selling_price": Decimal("250")},
+            )[0]
+            for i in range(n_skus)
+        ]
+        existing = set(
+            StockBalance.objects.filter(location__in=locations, product__in=products).values_list("location_id", "product_id")
+        )
+        fresh = [(loc, p) for loc in locations for p in products if (loc.pk, p.pk) not in existing]
+        StockBalance.objects.bulk_create(
+            [StockBalance(location=loc, product=p, on_hand_qty=10_000) for loc, p in fresh]
+        )
+        StockLedger.objects.bulk_create([
+            StockLedger(location=loc, product=p, movement_type="IN", qty=10_000, unit_cost=p.cost,
+                        unit_selling_price=p.selling_price, reference_type="STRESS", notes="stress_posting opening stock")
+            for loc, p in fresh
+        ])
+        return locations, products
@@ -0,0 +1,51 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.models import Invoice
+from inventory.services import cancel_invoices
+
+
+class Command(BaseCommand):
+    help = "Cancel invoices in bulk (e.g. a test day) and put their stock back in one transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--invoice", action="append", default=[], help="Invoice no (repeatable).")
+        parser.add_argument("--date", help="Cancel every invoice of this day (YYYY-MM-DD, local time).")
+        parser.add_argument("--location", type=int, help="Limit --date to one location id.")
+        parser.add_argument("--reason", default="", help="Stored on the invoices and the VOID ledger rows.")
+        parser.add_argument("--dry-run", action="store_true", help="Only list what would be cancelled.")
+
+    def handle(self, *args, **opts):
+        qs = Invoice.objects.exclude(status="CANCELLED")
+        if opts["date"]:
+            try:
+                day = datetime.strptime(opts["date"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--date must be YYYY-MM-DD")
+            start = timezone.make_aware(datetime.combine(day, time.min))
+            qs = qs.filter(date__gte=start, date__lt=start + timedelta(days=1))
+            if opts["location"]:
+                qs = qs.filter(location_id=opts["location"])
+            if opts["invoice"]:
+                qs = qs.filter(invoice_no__in=opts["invoice"])
+        elif opts["invoice"]:
+            qs = qs.filter(invoice_no__in=opts["invoice"])
+        else:
+            raise CommandError("Give --date and/or --invoice.")
+
+        rows = list(qs.order_by("id").values_list("id", "invoice_no"))
+        if not rows:
+            self.stdout.write("Nothing to cancel.")
+            return
+        if opts["dry_run"]:
+            self.stdout.write("\n".join(no for _, no in rows))
+            self.stdout.write(self.style.WARNING(f"{len(rows)} invoice(s) would be cancelled (dry run)."))
+            return
+
+        try:
+            result = cancel_invoices(invoice_ids=[pk for pk, _ in rows], reason=opts["reason"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Cancelled {len(result['cancelled'])} invoice(s) ✅"))
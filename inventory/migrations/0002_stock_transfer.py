@@ -0,0 +1,40 @@
+# Generated by Django 5.0.8 on 2026-10-19 09:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockledger',
+            name='movement_type',
+            field=models.CharField(choices=[('IN', 'IN'), ('OUT', 'OUT'), ('RETURN', 'RETURN'), ('ADJUST', 'ADJUST'), ('TRF_OUT', 'TRANSFER OUT'), ('TRF_IN', 'TRANSFER IN')], max_length=10),
+        ),
+        migrations.CreateModel(
+            name='StockTransfer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transfer_no', models.CharField(max_length=40, unique=True)),
+                ('date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('notes', models.TextField(blank=True)),
+                ('from_location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='transfers_out', to='inventory.stocklocation')),
+                ('to_location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='transfers_in', to='inventory.stocklocation')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockTransferLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qty', models.IntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='inventory.product')),
+                ('transfer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='inventory.stocktransfer')),
+            ],
+        ),
+    ]
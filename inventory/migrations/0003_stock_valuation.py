@@ -0,0 +1,48 @@
+# Generated by Django 5.0.8 on 2026-10-19 09:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stock_transfer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FifoLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ledger_id', models.BigIntegerField(default=0)),
+                ('qty', models.IntegerField()),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.stocklocation')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'location', 'ledger_id'], name='inventory_f_product_b92e80_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qty', models.IntegerField(default=0)),
+                ('avg_cost', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('wac_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fifo_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cogs_wac', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cogs_fifo', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('last_ledger_id', models.BigIntegerField(db_index=True, default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.stocklocation')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.product')),
+            ],
+            options={
+                'unique_together': {('product', 'location')},
+            },
+        ),
+    ]
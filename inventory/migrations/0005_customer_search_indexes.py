@@ -0,0 +1,38 @@
+# Prefix-search indexes for /api/customers/search/ (name istartswith, phone startswith).
+# LIKE 'x%' can only use an index with pattern ops (Postgres) / NOCASE collation (SQLite),
+# which the ORM can't express portably, hence per-vendor SQL.
+
+from django.db import migrations
+
+INDEXES = {
+    "postgresql": [
+        "CREATE INDEX IF NOT EXISTS inventory_customer_name_prefix ON inventory_customer (UPPER(name) text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS inventory_customer_phone_prefix ON inventory_customer (phone varchar_pattern_ops)",
+    ],
+    "sqlite": [
+        "CREATE INDEX IF NOT EXISTS inventory_customer_name_prefix ON inventory_customer (name COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS inventory_customer_phone_prefix ON inventory_customer (phone)",
+    ],
+}
+
+
+def create_indexes(apps, schema_editor):
+    for sql in INDEXES.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in INDEXES:
+        schema_editor.execute("DROP INDEX IF EXISTS inventory_customer_name_prefix")
+        schema_editor.execute("DROP INDEX IF EXISTS inventory_customer_phone_prefix")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_count_session'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.8 on 2026-10-19 09:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_price_lists'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoiceline',
+            name='discount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.8 on 2026-10-19 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='cancel_reason',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='cancelled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='stockledger',
+            name='movement_type',
+            field=models.CharField(choices=[('IN', 'IN'), ('OUT', 'OUT'), ('RETURN', 'RETURN'), ('ADJUST', 'ADJUST'), ('TRF_OUT', 'TRANSFER OUT'), ('TRF_IN', 'TRANSFER IN'), ('VOID', 'VOID (invoice cancelled)')], max_length=10),
+        ),
+    ]
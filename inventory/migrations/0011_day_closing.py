@@ -0,0 +1,41 @@
+# Generated by Django 5.0.8 on 2026-10-19 09:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_invoice_cancel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DayClosing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField()),
+                ('closed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('invoice_count', models.IntegerField(default=0)),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tax', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sales_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units_sold', models.IntegerField(default=0)),
+                ('return_count', models.IntegerField(default=0)),
+                ('returns_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units_returned', models.IntegerField(default=0)),
+                ('net_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('cancelled_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('summary', models.JSONField(blank=True, default=dict)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='inventory.stocklocation')),
+            ],
+            options={
+                'ordering': ['-business_date', 'location_id'],
+                'unique_together': {('location', 'business_date')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.8 on 2026-10-19 09:27
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_returned_qty(apps, schema_editor):
+    """Spread existing ReturnLine qty over the invoice's lines of that product (oldest line first, capped at qty)."""
+    InvoiceLine = apps.get_model("inventory", "InvoiceLine")
+    ReturnLine = apps.get_model("inventory", "ReturnLine")
+
+    returned = (
+        ReturnLine.objects.filter(return_doc__invoice__isnull=False)
+        .values_list("return_doc__invoice_id", "product_id")
+        .annotate(q=Sum("qty"))
+    )
+    changed = []
+    for invoice_id, product_id, q in returned:
+        left = int(q or 0)
+        for line in InvoiceLine.objects.filter(invoice_id=invoice_id, product_id=product_id).order_by("id"):
+            if left <= 0:
+                break
+            take = min(left, line.qty)
+            line.returned_qty = take
+            left -= take
+            changed.append(line)
+    InvoiceLine.objects.bulk_update(changed, ["returned_qty"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_day_closing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoiceline',
+            name='returned_qty',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_returned_qty, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='invoiceline',
+            constraint=models.CheckConstraint(check=models.Q(('returned_qty__gte', 0), ('returned_qty__lte', models.F('qty'))), name='invoiceline_returned_qty_range'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.8 on 2026-10-19 09:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_invoiceline_returned_qty'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('method', models.CharField(max_length=10)),
+                ('alpha', models.FloatField(default=0)),
+                ('daily_rate', models.FloatField(default=0)),
+                ('horizon_days', models.IntegerField(default=14)),
+                ('forecast_qty', models.FloatField(default=0)),
+                ('on_hand', models.IntegerField(default=0)),
+                ('days_of_cover', models.FloatField(blank=True, db_index=True, null=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.stocklocation')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.product')),
+            ],
+            options={
+                'unique_together': {('product', 'location')},
+            },
+        ),
+    ]
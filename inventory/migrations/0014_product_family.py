@@ -0,0 +1,59 @@
+# Generated by Django 5.0.8 on 2026-10-19 09:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def family_code(name: str, taken: set) -> str:
+    base = (slugify(name).upper() or "FAM")[:24]
+    code, n = base, 1
+    while code in taken:
+        n += 1
+        code = f"{base}-{n}"
+    taken.add(code)
+    return code
+
+
+def group_existing_products(apps, schema_editor):
+    """Products sharing a product_name become the variants of one family."""
+    Product = apps.get_model("inventory", "Product")
+    ProductFamily = apps.get_model("inventory", "ProductFamily")
+
+    taken: set = set()
+    for name in Product.objects.order_by("product_name").values_list("product_name", flat=True).distinct():
+        first = Product.objects.filter(product_name=name).order_by("id").first()
+        fam = ProductFamily.objects.create(
+            code=family_code(name, taken), name=name,
+            cost=first.cost, selling_price=first.selling_price,
+        )
+        Product.objects.filter(product_name=name).update(family=fam)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_demand_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFamily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=30, unique=True)),
+                ('name', models.CharField(max_length=200)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('selling_price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='family',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='variants', to='inventory.productfamily'),
+        ),
+        migrations.RunPython(group_existing_products, migrations.RunPython.noop),
+    ]
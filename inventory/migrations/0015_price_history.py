@@ -0,0 +1,29 @@
+# Generated by Django 5.0.8 on 2026-10-19 09:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_product_family'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valid_from', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('selling_price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reason', models.CharField(blank=True, max_length=120)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='inventory.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'valid_from'], name='inventory_p_product_09e39b_idx')],
+            },
+        ),
+    ]
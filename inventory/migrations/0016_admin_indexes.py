@@ -0,0 +1,37 @@
+# Generated by Django 5.0.8 on 2026-10-19 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_price_history'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['date'], name='invoice_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['status', 'date'], name='invoice_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='return',
+            index=models.Index(fields=['date'], name='return_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockledger',
+            index=models.Index(fields=['date_time'], name='ledger_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockledger',
+            index=models.Index(fields=['movement_type', 'date_time'], name='ledger_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockledger',
+            index=models.Index(fields=['reference_type', 'reference_no'], name='ledger_reference_idx'),
+        ),
+    ]
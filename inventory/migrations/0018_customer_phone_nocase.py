@@ -0,0 +1,27 @@
+# SQLite: Django compiles phone__startswith to a case-insensitive LIKE, which can only
+# use a NOCASE index (as for name). Postgres keeps its varchar_pattern_ops index.
+
+from django.db import migrations
+
+
+def phone_nocase(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP INDEX IF EXISTS inventory_customer_phone_prefix")
+        schema_editor.execute("CREATE INDEX inventory_customer_phone_prefix ON inventory_customer (phone COLLATE NOCASE)")
+
+
+def phone_binary(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP INDEX IF EXISTS inventory_customer_phone_prefix")
+        schema_editor.execute("CREATE INDEX inventory_customer_phone_prefix ON inventory_customer (phone)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0017_job_scheduler'),
+    ]
+
+    operations = [
+        migrations.RunPython(phone_nocase, phone_binary),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.8 on 2026-10-19 10:07
+
+from django.db import migrations, models
+
+
+def cancel_duplicate_open_sessions(apps, schema_editor):
+    """Keeps the newest OPEN session of each location; older ones become CANCELLED."""
+    CountSession = apps.get_model("inventory", "CountSession")
+
+    newest = {}
+    for pk, location_id in CountSession.objects.filter(status="OPEN").order_by("id").values_list("id", "location_id"):
+        newest[location_id] = pk
+    CountSession.objects.filter(status="OPEN").exclude(pk__in=newest.values()).update(status="CANCELLED")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0018_customer_phone_nocase'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_open_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='countsession',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'OPEN')), fields=('location',), name='countsession_one_open_per_location'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Customer phones are stored normalised (utils.normalize_phone) so the phone
+# prefix search can match however the number was typed.
+
+from django.db import migrations
+
+
+def normalize(apps, schema_editor):
+    from inventory.utils import normalize_phone
+
+    Customer = apps.get_model("inventory", "Customer")
+    changed = []
+    for c in Customer.objects.exclude(phone="").only("id", "phone").iterator(chunk_size=2000):
+        phone = normalize_phone(c.phone)
+        if phone != c.phone:
+            c.phone = phone
+            changed.append(c)
+    Customer.objects.bulk_update(changed, ["phone"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0019_countsession_one_open'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize, migrations.RunPython.noop),
+    ]
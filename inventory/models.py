@@ -21,7 +21,20 @@ class StockLocation(models.Model):
     def __str__(self):
         return self.name
 
+class ProductFamily(models.Model):
+    """A style/model (e.g. "Khussa Classic"); its size/color variants are Product rows."""
+    code = models.CharField(max_length=30, unique=True)  # SKU prefix
+    name = models.CharField(max_length=200)
+    cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    selling_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} ({self.code})"
+
 class Product(models.Model):
+    family = models.ForeignKey(ProductFamily, related_name="variants", on_delete=models.SET_NULL, null=True, blank=True)
     product_name = models.CharField(max_length=200)
     color = models.CharField(max_length=50, blank=True)
     size = models.CharField(max_length=50, blank=True)
@@ -30,16 +43,31 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     selling_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     product_image = models.ImageField(upload_to="products/", blank=True, null=True)
+    # {"image": <source name>, "source": <hash>, "96": {"webp": ..., "jpg": ...}, ...} (see thumbnails.py)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
 
     barcode_value = models.CharField(max_length=120, blank=True)  # default = sku
     barcode_image = models.ImageField(upload_to="barcodes/", blank=True, null=True)
 
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
+    # catalog sync cursor: queryset .update() calls on catalog fields must set it too
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.product_name} ({self.sku})"
 
+    # list/POS sized thumbnails (fall back to the original upload)
+    @property
+    def thumb_webp(self):
+        from .thumbnails import thumbnail_url
+        return thumbnail_url(self, 96, "webp")
+
+    @property
+    def thumb_jpg(self):
+        from .thumbnails import thumbnail_url
+        return thumbnail_url(self, 96, "jpg")
+
 class StockBalance(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     location = models.ForeignKey(StockLocation, on_delete=models.CASCADE)
@@ -60,13 +88,20 @@ class StockLedger(models.Model):
         ("OUT", "OUT"),
         ("RETURN", "RETURN"),
         ("ADJUST", "ADJUST"),
+        ("TRF_OUT", "TRANSFER OUT"),
+        ("TRF_IN", "TRANSFER IN"),
+        ("VOID", "VOID (invoice cancelled)"),
     ]
+    # stock direction per movement type (qty itself is stored positive);
+    # ADJUST rows carry their own sign in qty
+    INBOUND_TYPES = ("IN", "RETURN", "TRF_IN", "VOID")
+    OUTBOUND_TYPES = ("OUT", "TRF_OUT")
     date_time = models.DateTimeField(default=timezone.now)
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
     location = models.ForeignKey(StockLocation, on_delete=models.PROTECT)
 
     movement_type = models.CharField(max_length=10, choices=MOVE_CHOICES)
-    qty = models.IntegerField()  # positive qty
+    qty = models.IntegerField()  # positive qty (ADJUST: signed)
     unit_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     unit_selling_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
@@ -75,6 +110,13 @@ class StockLedger(models.Model):
     customer_name = models.CharField(max_length=200, blank=True)
     notes = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["date_time"], name="ledger_date_time_idx"),
+            models.Index(fields=["movement_type", "date_time"], name="ledger_type_date_idx"),
+            models.Index(fields=["reference_type", "reference_no"], name="ledger_reference_idx"),
+        ]
+
     def __str__(self):
         return f"{self.movement_type} {self.product.sku} x{self.qty}"
 
@@ -97,6 +139,18 @@ class Invoice(models.Model):
     tax = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     grand_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
+    cancelled_at = models.DateTimeField(null=True, blank=True)
+    cancel_reason = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date"], name="invoice_date_idx"),
+            models.Index(fields=["status", "date"], name="invoice_status_date_idx"),
+        ]
+
+    def __str__(self):
+        return self.invoice_no
+
     def customer_display(self):
         return self.customer.name if self.customer else (self.customer_name_fallback or "Walk-in")
 
@@ -105,7 +159,18 @@ class InvoiceLine(models.Model):
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
     qty = models.IntegerField()
     unit_price = models.DecimalField(max_digits=12, decimal_places=2)
+    discount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     line_total = models.DecimalField(max_digits=12, decimal_places=2)
+    # maintained by create_return_with_lines under the line's row lock
+    returned_qty = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(returned_qty__gte=0, returned_qty__lte=models.F("qty")),
+                name="invoiceline_returned_qty_range",
+            ),
+        ]
 
 class Return(models.Model):
     return_no = models.CharField(max_length=40, unique=True)
@@ -115,9 +180,218 @@ class Return(models.Model):
     date = models.DateTimeField(default=timezone.now)
     total_refund = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
+    class Meta:
+        indexes = [models.Index(fields=["date"], name="return_date_idx")]
+
+    def __str__(self):
+        return self.return_no
+
 class ReturnLine(models.Model):
     return_doc = models.ForeignKey(Return, related_name="lines", on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
     qty = models.IntegerField()
     unit_price = models.DecimalField(max_digits=12, decimal_places=2)
     line_total = models.DecimalField(max_digits=12, decimal_places=2)
+
+class StockTransfer(models.Model):
+    transfer_no = models.CharField(max_length=40, unique=True)
+    from_location = models.ForeignKey(StockLocation, related_name="transfers_out", on_delete=models.PROTECT)
+    to_location = models.ForeignKey(StockLocation, related_name="transfers_in", on_delete=models.PROTECT)
+    date = models.DateTimeField(default=timezone.now)
+    notes = models.TextField(blank=True)
+
+    def __str__(self):
+        return self.transfer_no
+
+class StockTransferLine(models.Model):
+    transfer = models.ForeignKey(StockTransfer, related_name="lines", on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.PROTECT)
+    qty = models.IntegerField()
+
+class StockValuation(models.Model):
+    """Valuation state per product/location, maintained by valuation.revalue()."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    location = models.ForeignKey(StockLocation, on_delete=models.CASCADE)
+    qty = models.IntegerField(default=0)
+    avg_cost = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    wac_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fifo_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cogs_wac = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cogs_fifo = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_ledger_id = models.BigIntegerField(default=0, db_index=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ("product", "location")
+
+class FifoLayer(models.Model):
+    """Remaining (not yet consumed) FIFO cost layer."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    location = models.ForeignKey(StockLocation, on_delete=models.CASCADE)
+    ledger_id = models.BigIntegerField(default=0)  # source IN row, 0 = carried over
+    qty = models.IntegerField()
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4)
+
+    class Meta:
+        indexes = [models.Index(fields=["product", "location", "ledger_id"])]
+
+class CountSession(models.Model):
+    STATUS_CHOICES = [
+        ("OPEN", "Open"),
+        ("CLOSED", "Closed"),
+        ("CANCELLED", "Cancelled"),
+    ]
+    session_no = models.CharField(max_length=40, unique=True)
+    location = models.ForeignKey(StockLocation, on_delete=models.PROTECT)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="OPEN")
+    opened_at = models.DateTimeField(default=timezone.now)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    notes = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["location"], condition=models.Q(status="OPEN"), name="countsession_one_open_per_location",
+            ),
+        ]
+
+    def __str__(self):
+        return self.session_no
+
+class CountSessionLine(models.Model):
+    session = models.ForeignKey(CountSession, related_name="lines", on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.PROTECT)
+    expected_qty = models.IntegerField(default=0)  # StockBalance frozen at open
+    counted_qty = models.IntegerField(default=0)
+    is_counted = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ("session", "product")
+
+    @property
+    def variance(self):
+        return self.counted_qty - self.expected_qty
+
+class PriceList(models.Model):
+    """
+    Date-effective selling prices for a customer type and/or location.
+    Blank customer_type / empty location = applies to all. When several lists
+    match, the most specific wins, then the highest priority.
+    """
+    name = models.CharField(max_length=120)
+    customer_type = models.CharField(max_length=20, choices=Customer.TYPE_CHOICES, blank=True)
+    location = models.ForeignKey(StockLocation, on_delete=models.CASCADE, null=True, blank=True)
+    priority = models.IntegerField(default=0)
+    valid_from = models.DateField(null=True, blank=True)
+    valid_to = models.DateField(null=True, blank=True)  # inclusive
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self):
+        return self.name
+
+class PriceListItem(models.Model):
+    price_list = models.ForeignKey(PriceList, related_name="items", on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        unique_together = ("price_list", "product")
+
+class DayClosing(models.Model):
+    """Z-report: one business day of one location, frozen at close (see closing.py)."""
+    location = models.ForeignKey(StockLocation, on_delete=models.PROTECT)
+    business_date = models.DateField()
+    closed_at = models.DateTimeField(default=timezone.now)
+
+    invoice_count = models.IntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tax = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sales_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units_sold = models.IntegerField(default=0)
+
+    return_count = models.IntegerField(default=0)
+    returns_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units_returned = models.IntegerField(default=0)
+
+    net_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cancelled_count = models.IntegerField(default=0)
+    cancelled_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # {"by_customer_type": [...], "top_skus": [...]}
+    summary = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        unique_together = ("location", "business_date")
+        ordering = ["-business_date", "location_id"]
+
+    def __str__(self):
+        return f"Z {self.business_date} {self.location}"
+
+class DemandForecast(models.Model):
+    """Latest demand forecast per product/location (refreshed in batch, see forecast.py)."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    location = models.ForeignKey(StockLocation, on_delete=models.CASCADE)
+    computed_at = models.DateTimeField(default=timezone.now)
+    method = models.CharField(max_length=10)
+    alpha = models.FloatField(default=0)           # ses smoothing factor (0 for ma)
+    daily_rate = models.FloatField(default=0)      # units / day
+    horizon_days = models.IntegerField(default=14)
+    forecast_qty = models.FloatField(default=0)    # daily_rate * horizon_days
+    on_hand = models.IntegerField(default=0)
+    days_of_cover = models.FloatField(null=True, blank=True, db_index=True)  # null = no demand
+
+    class Meta:
+        unique_together = ("product", "location")
+
+    def __str__(self):
+        return f"{self.product.sku} @ {self.location}: {self.daily_rate:.2f}/day"
+
+class PriceHistory(models.Model):
+    """Product cost/selling price from valid_from until the next row (written by repricing.py)."""
+    product = models.ForeignKey(Product, related_name="price_history", on_delete=models.CASCADE)
+    valid_from = models.DateTimeField(default=timezone.now)
+    cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    selling_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    reason = models.CharField(max_length=120, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["product", "valid_from"])]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.valid_from:%Y-%m-%d}: {self.selling_price}"
+
+class ScheduledJob(models.Model):
+    """Schedule + lease of a scheduler.py job; the lease makes one process at a time run it."""
+    name = models.CharField(max_length=60, unique=True)
+    enabled = models.BooleanField(default=True)
+    next_run_at = models.DateTimeField(default=timezone.now)
+    lease_owner = models.CharField(max_length=120, blank=True)
+    lease_until = models.DateTimeField(null=True, blank=True)
+
+    last_started_at = models.DateTimeField(null=True, blank=True)
+    last_duration_ms = models.FloatField(null=True, blank=True)
+    last_status = models.CharField(max_length=10, blank=True)
+
+    def __str__(self):
+        return self.name
+
+class JobRun(models.Model):
+    STATUS_CHOICES = [
+        ("ok", "OK"),
+        ("error", "Error"),
+        ("timeout", "Timeout"),
+    ]
+    name = models.CharField(max_length=60)
+    owner = models.CharField(max_length=120, blank=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    duration_ms = models.FloatField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["name", "started_at"])]
+
+    def __str__(self):
+        return f"{self.name} {self.started_at:%Y-%m-%d %H:%M} {self.status}"
@@ -1,6 +1,7 @@
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
+from django.utils import timezone
 
 def invoice_pdf(invoice):
     buf = BytesIO()
@@ -94,3 +95,77 @@ def return_pdf(ret):
     c.save()
     buf.seek(0)
     return buf
+
+def day_closing_pdf(closing):
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    width, height = A4
+
+    y = height - 50
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, y, f"Z-REPORT {closing.location.name}")
+    y -= 25
+
+    c.setFont("Helvetica", 11)
+    c.drawString(50, y, f"Business date: {closing.business_date.strftime('%Y-%m-%d')}")
+    y -= 18
+    c.drawString(50, y, f"Closed at: {timezone.localtime(closing.closed_at).strftime('%Y-%m-%d %H:%M')}")
+    y -= 25
+
+    rows = [
+        ("Invoices", closing.invoice_count),
+        ("Units sold", closing.units_sold),
+        ("Subtotal", closing.subtotal),
+        ("Discount", closing.discount),
+        ("Tax", closing.tax),
+        ("Sales total", closing.sales_total),
+        ("Returns", f"{closing.return_count} ({closing.units_returned} units)"),
+        ("Returns total", closing.returns_total),
+        ("Cancelled", f"{closing.cancelled_count} ({closing.cancelled_total})"),
+    ]
+    c.setFont("Helvetica", 11)
+    for label, value in rows:
+        c.drawString(50, y, label)
+        c.drawRightString(300, y, str(value))
+        y -= 16
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, "NET")
+    c.drawRightString(300, y, str(closing.net_total))
+    y -= 30
+
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(50, y, "Customer type")
+    c.drawString(200, y, "Invoices")
+    c.drawString(280, y, "Units")
+    c.drawString(360, y, "Total")
+    y -= 15
+    c.setFont("Helvetica", 10)
+    for row in closing.summary.get("by_customer_type", []):
+        c.drawString(50, y, row["customer_type"].title())
+        c.drawString(200, y, str(row["invoices"]))
+        c.drawString(280, y, str(row["units"]))
+        c.drawString(360, y, row["total"])
+        y -= 14
+    y -= 16
+
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(50, y, "Top SKUs")
+    c.drawString(160, y, "Product")
+    c.drawString(380, y, "Qty")
+    c.drawString(450, y, "Amount")
+    y -= 15
+    c.setFont("Helvetica", 10)
+    for s in closing.summary.get("top_skus", []):
+        c.drawString(50, y, s["sku"])
+        c.drawString(160, y, s["name"][:28])
+        c.drawString(380, y, str(s["qty"]))
+        c.drawString(450, y, s["amount"])
+        y -= 14
+        if y < 80:
+            c.showPage()
+            y = height - 50
+
+    c.showPage()
+    c.save()
+    buf.seek(0)
+    return buf
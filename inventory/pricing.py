@@ -0,0 +1,141 @@
+# inventory/pricing.py
+"""
+Price lists compiled into an in-memory price table.
+
+The whole active price book is loaded in one pass into
+{price_list_id: {sku: price}} plus the list metadata and every product's own
+selling price (the fallback), so resolving a price for (sku, customer type,
+location, date) touches no database. The table is dropped on any PriceList /
+PriceListItem change and product selling price edit (signals, bulk_reprice)
+and, as a safety net for other processes, rebuilt after PRICE_BOOK_TTL seconds.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date as date_cls
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+_lock = threading.Lock()
+_book: "PriceBook | None" = None
+
+
+def _ttl() -> float:
+    return float(getattr(settings, "PRICE_BOOK_TTL", 300))
+
+
+@dataclass(frozen=True)
+class _ListMeta:
+    id: int
+    customer_type: str
+    location_id: int | None
+    priority: int
+    valid_from: date_cls | None
+    valid_to: date_cls | None
+
+    def applies(self, customer_type: str, location_id, day: date_cls) -> bool:
+        if self.customer_type and self.customer_type != customer_type:
+            return False
+        if self.location_id and self.location_id != location_id:
+            return False
+        if self.valid_from and day < self.valid_from:
+            return False
+        if self.valid_to and day > self.valid_to:
+            return False
+        return True
+
+
+class PriceBook:
+    def __init__(self, lists: list[_ListMeta], prices: dict[int, dict[str, Decimal]],
+                 base: dict[str, Decimal] | None = None):
+        # most specific first: location + type, location, type, generic; then priority
+        self.lists = sorted(
+            lists,
+            key=lambda m: (bool(m.location_id), bool(m.customer_type), m.priority, m.id),
+            reverse=True,
+        )
+        self.prices = prices
+        self.base = base or {}
+        self.built_at = time.monotonic()
+        self._resolved: dict[tuple, tuple[int, ...]] = {}
+
+    def _candidates(self, customer_type: str, location_id, day: date_cls) -> tuple[int, ...]:
+        key = (customer_type, location_id, day)
+        ids = self._resolved.get(key)
+        if ids is None:
+            ids = tuple(m.id for m in self.lists if m.applies(customer_type, location_id, day))
+            self._resolved[key] = ids
+        return ids
+
+    def lookup(self, sku: str, *, customer_type: str = "", location_id=None, day: date_cls | None = None):
+        """Price from the best matching list, or None when no list prices this SKU."""
+        day = day or timezone.localdate()
+        for list_id in self._candidates(customer_type or "", location_id, day):
+            price = self.prices[list_id].get(sku)
+            if price is not None:
+                return price
+        return None
+
+    def price_for(self, product, *, customer_type: str = "", location_id=None, day: date_cls | None = None) -> Decimal:
+        """Resolved price with the product's own selling price as fallback."""
+        price = self.lookup(product.sku, customer_type=customer_type, location_id=location_id, day=day)
+        if price is not None:
+            return price
+        return Decimal(str(getattr(product, "selling_price", None) or getattr(product, "price", None) or 0))
+
+
+    def price_for_sku(self, sku: str, *, customer_type: str = "", location_id=None, day: date_cls | None = None):
+        """Like price_for, by SKU alone; None for a SKU the book does not know (e.g. created since the build)."""
+        price = self.lookup(sku, customer_type=customer_type, location_id=location_id, day=day)
+        return price if price is not None else self.base.get(sku)
+
+
+def _build() -> PriceBook:
+    from .models import PriceList, PriceListItem, Product
+
+    lists = [
+        _ListMeta(pl.id, pl.customer_type, pl.location_id, pl.priority, pl.valid_from, pl.valid_to)
+        for pl in PriceList.objects.filter(is_active=True)
+    ]
+    prices: dict[int, dict[str, Decimal]] = {m.id: {} for m in lists}
+    items = PriceListItem.objects.filter(price_list__is_active=True).values_list(
+        "price_list_id", "product__sku", "price",
+    )
+    for list_id, sku, price in items.iterator(chunk_size=10000):
+        prices[list_id][sku] = price
+    base = {
+        sku: selling_price or price or Decimal("0")
+        for sku, selling_price, price in Product.objects.values_list(
+            "sku", "selling_price", "price",
+        ).iterator(chunk_size=10000)
+    }
+    return PriceBook(lists, prices, base)
+
+
+def cached_book() -> PriceBook | None:
+    """The compiled book if it is still fresh, else None (never queries)."""
+    book = _book
+    if book is not None and time.monotonic() - book.built_at < _ttl():
+        return book
+    return None
+
+
+def price_book() -> PriceBook:
+    global _book
+    book = cached_book()
+    if book is not None:
+        return book
+    with _lock:
+        book = cached_book()
+        if book is None:
+            book = _book = _build()
+    return book
+
+
+def invalidate(**kwargs):
+    global _book
+    _book = None
@@ -0,0 +1,126 @@
+# inventory/realtime.py
+"""
+In-process pub/sub + Server-Sent Events stream (ASGI only).
+
+Posting services call publish() (after commit). Each event is encoded ONCE
+and handed to every subscriber queue of that location; the SSE view just
+awaits its queue. Works inside one ASGI process (desktop exe, single
+uvicorn/daphne worker); it is not a cross-process bus.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 200
+
+
+class Subscription:
+    def __init__(self, location_id, loop):
+        self.location_id = location_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def push(self, msg: bytes):
+        # slow client: drop the oldest event instead of blocking the publisher
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(msg)
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: set[Subscription] = set()
+
+    def subscribe(self, location_id=None) -> Subscription:
+        sub = Subscription(location_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subs.discard(sub)
+
+    def publish(self, event: str, location_id, data: dict):
+        """Thread-safe; callable from sync views/services and from the event loop."""
+        msg = f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+        with self._lock:
+            targets = [s for s in self._subs if s.location_id in (None, location_id)]
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub.push, msg)
+            except RuntimeError:
+                # loop already closed (client gone mid-publish)
+                self.unsubscribe(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subs)
+
+
+broker = Broker()
+
+
+def publish_on_commit(event: str, location_id, data: dict):
+    """Publish only once the posting transaction is committed."""
+    transaction.on_commit(lambda: broker.publish(event, location_id, data))
+
+
+def publish_balances(location_id, rows):
+    """Stock event for one location; rows = [(sku, StockBalance), ...]."""
+    items = [
+        {"sku": sku, "on_hand": int(b.on_hand_qty), "available": int(b.available_qty)}
+        for sku, b in rows
+    ]
+    if items:
+        publish_on_commit("stock", location_id, {"location_id": location_id, "items": items})
+
+
+# -----------------------------
+# SSE view
+# -----------------------------
+async def stock_stream(request):
+    """
+    GET /api/stream/?location_id=1
+    text/event-stream with `stock` and `invoice` events for the location
+    (no location_id = all locations).
+    """
+    from django.core.handlers.asgi import ASGIRequest
+
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "Live stream requires the ASGI server."}, status=501)
+
+    raw = (request.GET.get("location_id") or "").strip()
+    try:
+        location_id = int(raw) if raw else None
+    except ValueError:
+        return JsonResponse({"detail": "location_id must be an integer."}, status=400)
+
+    sub = broker.subscribe(location_id)
+
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(sub.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+        finally:
+            broker.unsubscribe(sub)
+
+    resp = StreamingHttpResponse(events(), content_type="text/event-stream")
+    resp["Cache-Control"] = "no-cache"
+    resp["X-Accel-Buffering"] = "no"
+    return resp
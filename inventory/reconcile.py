@@ -0,0 +1,186 @@
+# inventory/reconcile.py
+"""
+StockBalance vs StockLedger reconciliation.
+
+Expected on-hand per product/location is recomputed from the ledger with ONE
+grouped aggregate per location (locations run in parallel threads) and diffed
+against StockBalance. Drift can be repaired either by posting ADJUST ledger
+rows (balance is kept as the truth) or by resetting the balance to the ledger.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Case, F, IntegerField, Sum, When
+from django.utils import timezone
+
+REPAIR_MODES = ("adjust", "balance")
+
+
+@dataclass
+class Drift:
+    location_id: int
+    product_id: int
+    sku: str
+    balance_qty: int
+    ledger_qty: int
+
+    @property
+    def diff(self) -> int:
+        return self.balance_qty - self.ledger_qty
+
+
+def signed_qty():
+    """Ledger qty with stock direction applied (ADJUST rows are already signed)."""
+    from .models import StockLedger
+
+    return Case(
+        When(movement_type__in=StockLedger.INBOUND_TYPES, then=F("qty")),
+        When(movement_type__in=StockLedger.OUTBOUND_TYPES, then=-F("qty")),
+        default=F("qty"),
+        output_field=IntegerField(),
+    )
+
+
+def ledger_totals(location_id) -> dict[int, int]:
+    """{product_id: qty} for one location, one GROUP BY query."""
+    from .models import StockLedger
+
+    rows = (
+        StockLedger.objects.filter(location_id=location_id)
+        .values("product_id")
+        .annotate(q=Sum(signed_qty()))
+        .values_list("product_id", "q")
+    )
+    return {pid: int(q or 0) for pid, q in rows}
+
+
+def location_drift(location_id) -> list[Drift]:
+    from .models import StockBalance
+
+    expected = ledger_totals(location_id)
+    actual = dict(
+        StockBalance.objects.filter(location_id=location_id).values_list("product_id", "on_hand_qty")
+    )
+
+    drift = []
+    for pid in expected.keys() | actual.keys():
+        bal, led = int(actual.get(pid, 0)), expected.get(pid, 0)
+        if bal != led:
+            drift.append(Drift(location_id=location_id, product_id=pid, sku="", balance_qty=bal, ledger_qty=led))
+    return drift
+
+
+def _location_drift_in_thread(location_id) -> list[Drift]:
+    # every worker thread gets its own connection; close it when done
+    try:
+        return location_drift(location_id)
+    finally:
+        connection.close()
+
+
+def find_drift(location_ids=None, workers: int = 4) -> list[Drift]:
+    from .models import Product, StockLocation
+
+    if location_ids is None:
+        location_ids = list(StockLocation.objects.order_by("id").values_list("id", flat=True))
+
+    # sqlite is a single local file: threads only add lock contention there;
+    # inside a transaction the worker connections would not see its rows
+    parallel = connection.vendor != "sqlite" and not connection.in_atomic_block
+    if workers > 1 and len(location_ids) > 1 and parallel:
+        close_old_connections()
+        with ThreadPoolExecutor(max_workers=min(workers, len(location_ids))) as pool:
+            per_location = list(pool.map(_location_drift_in_thread, location_ids))
+    else:
+        per_location = [location_drift(loc_id) for loc_id in location_ids]
+
+    drift = [d for rows in per_location for d in rows]
+    skus = dict(Product.objects.filter(pk__in={d.product_id for d in drift}).values_list("pk", "sku"))
+    for d in drift:
+        d.sku = skus.get(d.product_id, "")
+    return sorted(drift, key=lambda d: (d.location_id, d.sku))
+
+
+def repair_location(location_id, mode: str = "adjust", note: str = "") -> list[Drift]:
+    """
+    Re-checks one location under lock and fixes what is still drifting.
+    mode="adjust":  post ADJUST ledger rows (qty = balance - ledger), balance untouched
+    mode="balance": reset StockBalance.on_hand_qty to the ledger total
+    """
+    from . import locking
+    from .models import Product, StockBalance, StockLedger
+    from .realtime import publish_balances
+
+    if mode not in REPAIR_MODES:
+        raise ValueError(f"mode must be one of {', '.join(REPAIR_MODES)}")
+
+    with transaction.atomic():
+        locking.begin_posting()
+        locking.lock_stock(
+            (location_id, pid)
+            for pid in StockBalance.objects.filter(location_id=location_id).values_list("product_id", flat=True)
+        )
+        list(
+            StockBalance.objects.select_for_update()
+            .filter(location_id=location_id)
+            .order_by("product_id")
+            .values_list("id", flat=True)
+        )
+        drift = location_drift(location_id)
+        if not drift:
+            return []
+
+        now = timezone.now()
+        products = Product.objects.in_bulk({d.product_id for d in drift})
+
+        if mode == "adjust":
+            StockLedger.objects.bulk_create(
+                [
+                    StockLedger(
+                        date_time=now,
+                        product_id=d.product_id,
+                        location_id=location_id,
+                        movement_type="ADJUST",
+                        qty=d.diff,
+                        unit_cost=products[d.product_id].cost or 0,
+                        unit_selling_price=products[d.product_id].selling_price or 0,
+                        reference_type="RECON",
+                        notes=note or "Reconciliation: ledger aligned to balance",
+                    )
+                    for d in drift
+                ],
+                batch_size=500,
+            )
+        else:
+            StockBalance.objects.bulk_create(
+                [
+                    StockBalance(location_id=location_id, product_id=d.product_id, on_hand_qty=0, reserved_qty=0)
+                    for d in drift
+                ],
+                ignore_conflicts=True,
+            )
+            balances = {
+                b.product_id: b
+                for b in StockBalance.objects.select_for_update().filter(
+                    location_id=location_id, product_id__in=products.keys(),
+                )
+            }
+            for d in drift:
+                balances[d.product_id].on_hand_qty = d.ledger_qty
+                balances[d.product_id].last_updated = now
+            StockBalance.objects.bulk_update(balances.values(), ["on_hand_qty", "last_updated"], batch_size=500)
+            publish_balances(location_id, [(products[pid].sku, b) for pid, b in balances.items()])
+
+    for d in drift:
+        d.sku = products[d.product_id].sku
+    return drift
+
+
+def repair_drift(location_ids, mode: str = "adjust", note: str = "") -> list[Drift]:
+    fixed = []
+    for loc_id in sorted(set(location_ids)):
+        fixed += repair_location(loc_id, mode=mode, note=note)
+    return fixed
@@ -0,0 +1,204 @@
+# inventory/repricing.py
+"""
+Bulk repricing.
+
+A filter (name / color / size / family / SKU prefix) selects the products;
+the change is ONE set-based UPDATE with F() expressions (percent, absolute
+or fixed value, optional rounding step, never below zero). The new prices
+are appended to PriceHistory with bulk_create, so prices_at() can answer
+"what did this cost / sell for on date X" with an indexed range lookup
+on (product, valid_from).
+
+Every other write path records history too: create_size_run() calls
+record_prices() for its bulk insert, and the Product pre/post_save signals
+(forms, admin) call record_price_change().
+"""
+from __future__ import annotations
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import DecimalField, Exists, F, OuterRef, Subquery, Value
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+
+FIELDS = ("selling_price", "cost")
+MODES = ("percent", "absolute", "set")
+
+
+def filter_products(*, name="", color="", size="", family_id=None, sku_prefix="", active_only=False):
+    from .models import Product
+
+    qs = Product.objects.all()
+    if name:
+        qs = qs.filter(product_name__icontains=name)
+    if color:
+        qs = qs.filter(color__iexact=color)
+    if size:
+        qs = qs.filter(size__iexact=size)
+    if family_id:
+        qs = qs.filter(family_id=family_id)
+    if sku_prefix:
+        qs = qs.filter(sku__istartswith=sku_prefix)
+    if active_only:
+        qs = qs.filter(is_active=True)
+    return qs
+
+
+def _decimal(v, label: str) -> Decimal:
+    try:
+        return Decimal(str(v).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid {label}: {v!r}")
+
+
+def price_expression(field: str, mode: str, value, step=None):
+    """SQL expression for the new value of `field`."""
+    if field not in FIELDS:
+        raise ValueError(f"field must be one of {', '.join(FIELDS)}")
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+
+    out = DecimalField(max_digits=12, decimal_places=2)
+    value = _decimal(value, "value")
+    if mode == "percent":
+        expr = F(field) * Value(1 + value / 100, output_field=out)
+    elif mode == "absolute":
+        expr = F(field) + Value(value, output_field=out)
+    else:
+        expr = Value(value, output_field=out)
+
+    if step:
+        step = _decimal(step, "step")
+        if step <= 0:
+            raise ValueError("Rounding step must be > 0.")
+        expr = Round(expr / Value(step, output_field=out)) * Value(step, output_field=out)
+    else:
+        expr = Round(expr, 2)
+    return Greatest(expr, Value(Decimal("0"), output_field=out), output_field=out)
+
+
+def preview(qs, *, field: str, mode: str, value, step=None, limit: int = 50) -> list[dict]:
+    """Old -> new for the first `limit` matches, computed by the database."""
+    rows = (
+        qs.annotate(new_value=price_expression(field, mode, value, step))
+        .order_by("product_name", "sku")
+        .values("sku", "product_name", "color", "size", field, "new_value")[:limit]
+    )
+    return [
+        {"sku": r["sku"], "name": r["product_name"], "color": r["color"], "size": r["size"],
+         "old": str(r[field]), "new": str(Decimal(str(r["new_value"])).quantize(Decimal("0.01")))}
+        for r in rows
+    ]
+
+
+def _record_initial(targets) -> None:
+    """Current prices as of created_at for products of `targets` that have no history yet."""
+    from .models import PriceHistory
+
+    first_time = targets.filter(~Exists(PriceHistory.objects.filter(product=OuterRef("pk"))))
+    PriceHistory.objects.bulk_create(
+        [
+            PriceHistory(product_id=pid, valid_from=created, cost=cost, selling_price=sp, reason="initial")
+            for pid, created, cost, sp in first_time.values_list("id", "created_at", "cost", "selling_price")
+        ],
+        batch_size=1000,
+    )
+
+
+def record_prices(products, *, reason: str = "", at=None) -> None:
+    """Appends the current cost / selling price of `products` (instances) to PriceHistory."""
+    from .models import PriceHistory
+
+    PriceHistory.objects.bulk_create(
+        [
+            PriceHistory(product_id=p.pk, valid_from=at or p.created_at, cost=p.cost or 0,
+                         selling_price=p.selling_price or 0, reason=reason[:120])
+            for p in products
+        ],
+        batch_size=1000,
+    )
+
+
+def record_price_change(product, old=None, *, reason: str = "edited") -> bool:
+    """
+    History for a saved product: `old` is its (cost, selling_price) before the
+    save, None for a new product. Writes nothing when neither price moved.
+    """
+    from .models import PriceHistory
+
+    if old is None:
+        record_prices([product], reason="created")
+        return True
+    cost, sp = (_decimal(v or 0, "price") for v in old)
+    if (cost, sp) == (_decimal(product.cost or 0, "cost"), _decimal(product.selling_price or 0, "selling price")):
+        return False
+    if not PriceHistory.objects.filter(product=product).exists():
+        # a product from before price history: the old prices held since created_at
+        PriceHistory.objects.create(
+            product=product, valid_from=product.created_at, cost=cost, selling_price=sp, reason="initial",
+        )
+    record_prices([product], reason=reason, at=product.updated_at or timezone.now())
+    return True
+
+
+@transaction.atomic
+def bulk_reprice(qs, *, field: str, mode: str, value, step=None, reason: str = "") -> int:
+    """
+    Applies the change to every product of `qs`. Returns the number of products
+    whose value actually changed; the others are not touched and get no history row.
+    Products repriced for the first time get their previous prices recorded
+    as of created_at, so history lookups before the first change still work.
+    """
+    from .models import PriceHistory, Product
+    from .pricing import invalidate as invalidate_price_book
+
+    expr = price_expression(field, mode, value, step)
+    ids = list(qs.select_for_update().order_by("id").values_list("id", flat=True))
+    if not ids:
+        return 0
+
+    now = timezone.now()
+    ids = list(
+        Product.objects.filter(pk__in=ids).alias(new_value=expr).exclude(new_value=F(field))
+        .values_list("id", flat=True)
+    )
+    if not ids:
+        return 0
+    targets = Product.objects.filter(pk__in=ids)
+
+    _record_initial(targets)
+    changed = targets.update(**{field: expr, "updated_at": now})
+
+    PriceHistory.objects.bulk_create(
+        [
+            PriceHistory(product_id=pid, valid_from=now, cost=cost, selling_price=sp, reason=reason[:120])
+            for pid, cost, sp in targets.values_list("id", "cost", "selling_price")
+        ],
+        batch_size=1000,
+    )
+
+    if field == "selling_price":
+        # product selling_price is the price book fallback
+        invalidate_price_book()
+        transaction.on_commit(invalidate_price_book)
+    return changed
+
+
+def prices_at(at, product_ids=None) -> dict:
+    """{product_id: (cost, selling_price)} effective at `at` (current prices if never repriced)."""
+    from .models import PriceHistory, Product
+
+    hist = PriceHistory.objects.filter(product=OuterRef("pk"), valid_from__lte=at).order_by("-valid_from", "-id")
+    qs = Product.objects.all()
+    if product_ids is not None:
+        qs = qs.filter(pk__in=product_ids)
+    money = DecimalField(max_digits=12, decimal_places=2)
+    rows = qs.annotate(
+        h_cost=Subquery(hist.values("cost")[:1], output_field=money),
+        h_price=Subquery(hist.values("selling_price")[:1], output_field=money),
+    ).values_list("id", "h_cost", "h_price", "cost", "selling_price")
+    return {
+        pid: (hc, hp) if hp is not None else (cost, sp)
+        for pid, hc, hp, cost, sp in rows
+    }
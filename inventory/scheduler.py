@@ -0,0 +1,306 @@
+# inventory/scheduler.py
+"""
+Built-in maintenance job scheduler.
+
+Jobs are registered with @job(name, every=... | at="HH:MM"). A daemon
+thread wakes every SCHEDULER_TICK seconds, picks the due jobs and runs them
+on a small thread pool (SCHEDULER_WORKERS), so maintenance never takes more
+than that many threads away from request handling.
+
+Every process may run the scheduler (desktop exe, each gunicorn worker):
+before a job starts, the process takes a lease on its ScheduledJob row with
+one conditional UPDATE (free or expired lease and due). Only the process
+whose UPDATE matched runs the job; the lease lasts `timeout` seconds and
+a heartbeat thread renews it while the job runs, so it only expires when
+the owning process dies. Python threads cannot be killed: a job running
+past its timeout is recorded as "timeout" once it returns, and nobody
+else picks it up meanwhile.
+
+Each run is recorded in JobRun (duration, status, result or error).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import Q
+from django.utils import timezone
+
+log = logging.getLogger(__name__)
+
+OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable
+    every: timedelta | None = None   # interval jobs
+    at: str | None = None            # daily jobs, local "HH:MM"
+    timeout: int = 600               # seconds; also the lease length
+    per_process: bool = False        # process-local work (cache warming): no lease
+
+    def next_run(self, after: datetime) -> datetime:
+        if self.every:
+            return after + self.every
+        hh, mm = (int(x) for x in self.at.split(":"))
+        local = timezone.localtime(after)
+        nxt = local.replace(hour=hh, minute=mm, second=0, microsecond=0)
+        if nxt <= local:
+            nxt += timedelta(days=1)
+        return nxt
+
+
+JOBS: dict[str, Job] = {}
+
+
+def job(name: str, *, every: int | timedelta | None = None, at: str | None = None,
+        timeout: int = 600, per_process: bool = False):
+    """Registers the decorated function; `every` in seconds or a timedelta."""
+    if (every is None) == (at is None):
+        raise ValueError("Give exactly one of every= or at=.")
+
+    def deco(func):
+        JOBS[name] = Job(
+            name=name, func=func, at=at, timeout=timeout, per_process=per_process,
+            every=timedelta(seconds=every) if isinstance(every, int) else every,
+        )
+        return func
+    return deco
+
+
+# -----------------------------
+# Built-in jobs
+# -----------------------------
+@job("revalue_stock", every=15 * 60)
+def _revalue_stock():
+    from .valuation import revalue
+    return revalue()
+
+
+@job("close_days", at="00:30")
+def _close_days():
+    """Freezes yesterday's Z-report for every location that has not been closed yet."""
+    from .closing import close_day
+    from .models import StockLocation
+
+    day = timezone.localdate() - timedelta(days=1)
+    closed = [close_day(location=loc, day=day).pk for loc in StockLocation.objects.all()]
+    return {"day": str(day), "closings": len(closed)}
+
+
+@job("forecast_demand", at="02:00", timeout=1800)
+def _forecast_demand():
+    from .forecast import refresh_forecasts
+    return refresh_forecasts()
+
+
+@job("reconcile_stock", at="03:00", timeout=1800)
+def _reconcile_stock():
+    """Report only; repairs stay a deliberate `manage.py reconcile_stock --repair`."""
+    from .reconcile import find_drift
+    drift = find_drift()
+    if drift:
+        log.warning("reconcile_stock: %d drifting balance(s)", len(drift))
+    return {"drift": len(drift)}
+
+
+@job("warm_price_book", every=5 * 60, timeout=60, per_process=True)
+def _warm_price_book():
+    from .pricing import price_book
+    price_book()
+
+
+# -----------------------------
+# Lease + run
+# -----------------------------
+def sync_jobs() -> None:
+    """Creates missing ScheduledJob rows (first run: next occurrence of the schedule)."""
+    from .models import ScheduledJob
+
+    now = timezone.now()
+    ScheduledJob.objects.bulk_create(
+        [ScheduledJob(name=j.name, next_run_at=now if j.every else j.next_run(now)) for j in JOBS.values()],
+        ignore_conflicts=True,
+    )
+
+
+def acquire(j: Job, now=None, *, force: bool = False) -> bool:
+    """Takes the lease of a due job; True only in the one process that got it."""
+    from .models import ScheduledJob
+
+    now = now or timezone.now()
+    qs = ScheduledJob.objects.filter(name=j.name, enabled=True).filter(
+        Q(lease_until__isnull=True) | Q(lease_until__lt=now)
+    )
+    if not force:
+        qs = qs.filter(next_run_at__lte=now)
+    return qs.update(lease_owner=OWNER, lease_until=now + timedelta(seconds=j.timeout)) == 1
+
+
+def _heartbeat(j: Job, stop: threading.Event) -> None:
+    """Keeps renewing this process's lease on `j` until `stop` is set."""
+    from .models import ScheduledJob
+
+    every = max(min(j.timeout / 3, 60), 1)
+    try:
+        while not stop.wait(every):
+            try:
+                ScheduledJob.objects.filter(name=j.name, lease_owner=OWNER).update(
+                    lease_until=timezone.now() + timedelta(seconds=j.timeout),
+                )
+            except Exception:
+                log.exception("job %s: lease renewal failed", j.name)
+    finally:
+        connections.close_all()
+
+
+def run_job(j: Job) -> dict:
+    """Runs one job in the current thread and records the outcome."""
+    from .models import JobRun, ScheduledJob
+
+    close_old_connections()
+    started = timezone.now()
+    t0 = time.perf_counter()
+    status, result, error = "ok", None, ""
+    stop = threading.Event()
+    beat = None
+    if not j.per_process:
+        beat = threading.Thread(target=_heartbeat, args=(j, stop), name=f"lease-{j.name}", daemon=True)
+        beat.start()
+    try:
+        result = j.func()
+    except Exception:
+        status, error = "error", traceback.format_exc()
+        log.exception("job %s failed", j.name)
+    finally:
+        stop.set()
+        if beat is not None:
+            beat.join()
+    duration = (time.perf_counter() - t0) * 1000
+    if status == "ok" and duration > j.timeout * 1000:
+        status = "timeout"
+
+    result = _jsonable(result)
+    try:
+        JobRun.objects.create(
+            name=j.name, owner=OWNER, started_at=started, duration_ms=round(duration, 1),
+            status=status, result=result, error=error[-4000:],
+        )
+        last = {"last_started_at": started, "last_duration_ms": round(duration, 1), "last_status": status}
+        if j.per_process:
+            ScheduledJob.objects.filter(name=j.name).update(**last)
+        else:
+            ScheduledJob.objects.filter(name=j.name, lease_owner=OWNER).update(
+                lease_owner="", lease_until=None, next_run_at=j.next_run(timezone.now()), **last,
+            )
+    finally:
+        close_old_connections()
+    return {"name": j.name, "status": status, "duration_ms": round(duration, 1), "result": result}
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return str(value)
+
+
+# -----------------------------
+# Scheduler thread
+# -----------------------------
+class Scheduler:
+    def __init__(self, *, tick: float | None = None, workers: int | None = None):
+        self.tick = tick if tick is not None else float(getattr(settings, "SCHEDULER_TICK", 30))
+        self.workers = workers or int(getattr(settings, "SCHEDULER_WORKERS", 2))
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self.running: dict[str, tuple] = {}         # name -> (future, started monotonic)
+        self.local_next: dict[str, datetime] = {}   # per_process jobs
+        self.overdue: set[str] = set()              # past their timeout, still running
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, wait: bool = False):
+        self._stop.set()
+        self.pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _loop(self):
+        try:
+            sync_jobs()
+        except Exception:
+            log.exception("scheduler: job table unavailable, not starting")
+            return
+        finally:
+            close_old_connections()
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception:
+                log.exception("scheduler tick failed")
+            finally:
+                close_old_connections()
+            self._stop.wait(self.tick)
+
+    def run_pending(self, now=None) -> list[str]:
+        """Submits every due job this process won the lease for; returns their names."""
+        now = now or timezone.now()
+        self._reap()
+        started = []
+        for j in JOBS.values():
+            if j.name in self.running:
+                continue
+            if j.per_process:
+                if self.local_next.get(j.name, now) > now:
+                    continue
+                self.local_next[j.name] = j.next_run(now)
+            elif not acquire(j, now):
+                continue
+            self.running[j.name] = (self.pool.submit(run_job, j), time.monotonic())
+            started.append(j.name)
+        return started
+
+    def _reap(self):
+        for name, (fut, t0) in list(self.running.items()):
+            if fut.done():
+                del self.running[name]
+                self.overdue.discard(name)
+            elif name not in self.overdue and time.monotonic() - t0 > JOBS[name].timeout:
+                # can't interrupt a thread: the straggler keeps its pool slot and
+                # its lease (heartbeat), so it is not started a second time
+                log.warning("job %s exceeded its %ss timeout", name, JOBS[name].timeout)
+                self.overdue.add(name)
+
+
+_scheduler: Scheduler | None = None
+_start_lock = threading.Lock()
+
+
+def start() -> Scheduler | None:
+    """Starts this process's scheduler once (no-op unless SCHEDULER_ENABLED)."""
+    global _scheduler
+    if not getattr(settings, "SCHEDULER_ENABLED", False):
+        return None
+    with _start_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler().start()
+    return _scheduler
@@ -7,7 +7,7 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = [
             "id", "product_name", "color", "size", "sku",
             "cost", "price", "selling_price",
-            "barcode_value", "barcode_image", "product_image"
+            "barcode_value", "barcode_image", "product_image", "thumbnails"
         ]
 
 class InvoiceLineInputSerializer(serializers.Serializer):
@@ -8,6 +8,8 @@ from typing import Iterable, Optional
 from django.db import transaction
 from django.utils import timezone
 
+from . import locking
+
 
 # -----------------------------
 # Helpers
@@ -75,10 +77,106 @@ def ensure_product_barcode(product, force: bool = False) -> bool:
     else:
         return False
 
+    update_kwargs["updated_at"] = timezone.now()
     Product.objects.filter(pk=product.pk).update(**update_kwargs)
     return True
 
 
+# -----------------------------
+# Product families (size runs)
+# -----------------------------
+def _color_code(color: str) -> str:
+    from django.utils.text import slugify
+
+    return slugify(color).upper().replace("-", "") or color.strip().upper()
+
+
+def color_codes(colors: Iterable[str]) -> dict:
+    """
+    {color: SKU colour code}: the first 3 letters ("Black" -> BLA), or the
+    whole name for colours whose 3 letters clash ("Blue"/"Blush" -> BLUE/BLUSH).
+    """
+    colors = [c for c in colors if c]
+    short = {c: _color_code(c)[:3] for c in colors}
+    uses: dict[str, set] = {}
+    for c, code in short.items():
+        uses.setdefault(code, set()).add(c.lower())
+    return {c: _color_code(c) if len(uses[code]) > 1 else code for c, code in short.items()}
+
+
+def variant_sku(family_code: str, color: str = "", size: str = "", color_code: str | None = None) -> str:
+    parts = [family_code.upper()]
+    if color:
+        parts.append(color_code or _color_code(color)[:3])
+    if size:
+        parts.append(str(size).strip().upper().replace(" ", ""))
+    return "-".join(parts)
+
+
+@transaction.atomic
+def create_size_run(*, family, sizes: Iterable[str], colors: Iterable[str] = ("",), cost=None, selling_price=None):
+    """
+    Creates every missing size x color variant of a family in one bulk insert.
+    SKU = <family code>-<COL>-<size> (see color_codes); barcode_value = SKU
+    (what ensure_product_barcode would assign), so the rows are scan-ready.
+    Existing SKUs of the same colour are left untouched; a SKU that two
+    requested variants, or an existing product of another colour, would
+    share raises ValueError naming the colours. Returns (created, skipped_skus).
+    """
+    from .models import Product
+    from .repricing import record_prices
+
+    sizes = [str(s).strip() for s in sizes if str(s).strip()]
+    colors = [str(c).strip() for c in colors] or [""]
+    if not sizes:
+        raise ValueError("Provide at least one size.")
+
+    codes = color_codes(colors)
+    wanted, clashes = {}, {}
+    for color in colors:
+        for size in sizes:
+            sku = variant_sku(family.code, color, size, color_code=codes.get(color))
+            seen = wanted.setdefault(sku, (color, size))
+            if seen[0].lower() != color.lower():
+                clashes.setdefault(sku, {seen[0]}).add(color)
+
+    existing = dict(Product.objects.filter(sku__in=wanted.keys()).values_list("sku", "color"))
+    for sku, color in existing.items():
+        if (color or "").strip().lower() != wanted[sku][0].lower():
+            clashes.setdefault(sku, {wanted[sku][0]}).add(f"{color or 'no colour'} (existing)")
+    if clashes:
+        raise ValueError("Colours clash on SKU: " + "; ".join(
+            f"{sku}: {', '.join(sorted(cs))}" for sku, cs in sorted(clashes.items())
+        ))
+
+    now = timezone.now()
+    cost = _d(cost) if cost is not None else family.cost
+    selling_price = _d(selling_price) if selling_price is not None else family.selling_price
+
+    Product.objects.bulk_create([
+        Product(
+            family=family,
+            product_name=family.name,
+            color=color,
+            size=size,
+            sku=sku,
+            cost=cost,
+            price=selling_price,
+            selling_price=selling_price,
+            barcode_value=sku,
+            is_active=family.is_active,
+            created_at=now,
+            updated_at=now,
+        )
+        for sku, (color, size) in wanted.items()
+        if sku not in existing
+    ], batch_size=500)
+
+    created = list(Product.objects.filter(family=family, sku__in=wanted.keys() - existing.keys()).order_by("id"))
+    record_prices(created, reason="created", at=now)
+    return created, sorted(existing)
+
+
 # -----------------------------
 # Invoice / Return services (Industry Standard)
 # -----------------------------
@@ -87,134 +185,312 @@ class LineItem:
     sku: str
     qty: int
     price: Decimal | None = None
+    discount: Decimal | None = None       # amount off the line
+    discount_pct: Decimal | None = None   # percent off the line
 
 
-def _balance_for_update(location, product):
-    from .models import StockBalance  # local import
+def _posting_products(skus) -> dict:
+    """
+    {sku: Product}; row-locked (ordered by id) unless posting locks are per location.
+    FOR NO KEY UPDATE: still one posting per product at a time, but it does not
+    block the (deferred) foreign-key checks of other postings' ledger rows,
+    which otherwise close a wait cycle at COMMIT.
+    """
+    from .models import Product
 
-    bal, _ = StockBalance.objects.select_for_update().get_or_create(
-        location=location,
-        product=product,
-        defaults={"on_hand_qty": 0, "reserved_qty": 0},
-    )
-    return bal
+    qs = Product.objects.filter(sku__in=set(skus)).order_by("id")
+    if not locking.advisory():
+        qs = qs.select_for_update(no_key=True)
+    return {p.sku: p for p in qs}
 
 
-@transaction.atomic
-def create_invoice_with_lines(*, location, customer=None, items: Iterable[LineItem], created_by=None):
+def _create_numbered(model, field: str, prefix: str, **fields):
     """
-    - create invoice
-    - create invoice lines
-    - decrease stock (StockBalance)
-    - add stock ledger OUT
+    Creates a document with the next running number (INV-00042, ...).
+    Postings at different locations run concurrently: the prefix is locked
+    until commit (locking.lock_number), so call it after the stock locks.
+    The newest few numbers are compared because rows committed before the
+    lock existed may not be in id order.
     """
-    from .models import Product, Invoice, InvoiceLine, StockLedger
+    from .utils import gen_running_no
+
+    locking.lock_number(prefix, model)
+    recent = model.objects.order_by("-id").values_list(field, flat=True)[:50]
+    last = max(recent, key=_running_no, default=None)
+    return model.objects.create(**{field: gen_running_no(prefix, last)}, **fields)
+
+
+def _running_no(value: str) -> int:
+    try:
+        return int(value.split("-")[-1])
+    except (AttributeError, ValueError):
+        return 0
 
-    invoice = Invoice.objects.create(
+
+@transaction.atomic
+def create_invoice_with_lines(
+    *, location, customer=None, items: Iterable[LineItem], created_by=None, allow_price_override: bool = False,
+    discount=0, discount_pct=0,
+):
+    """
+    - price lines (price book for customer type + location,
+      LineItem.price only honoured with allow_price_override)
+    - compute totals (totals.compute_totals: discounts, tax, rounding)
+    - create invoice with its totals + bulk create lines
+    - decrease stock (StockBalance, bulk) + bulk ledger OUT
+    """
+    from .models import Invoice, InvoiceLine, StockBalance, StockLedger
+    from .pricing import price_book
+    from .realtime import publish_balances, publish_on_commit
+    from .totals import QuoteLine, compute_totals
+
+    items = list(items)
+    if not items:
+        raise ValueError("No items provided.")
+
+    locking.begin_posting()
+    book = price_book()
+    customer_type = customer.customer_type if customer else "retail"
+
+    skus = {it.sku for it in items}
+    products = _posting_products(skus)
+    missing = sorted(skus - set(products))
+    if missing:
+        raise ValueError(f"Unknown SKU(s): {', '.join(missing)}")
+
+    quote_lines = []
+    need: dict[str, int] = {}
+    for it in items:
+        product = products[it.sku]
+        if allow_price_override and it.price is not None:
+            unit_price = _d(it.price)
+        else:
+            unit_price = book.price_for(product, customer_type=customer_type, location_id=location.pk)
+        quote_lines.append(QuoteLine(
+            sku=it.sku,
+            qty=int(it.qty),
+            unit_price=unit_price,
+            discount=_d(it.discount or 0),
+            discount_pct=_d(it.discount_pct or 0),
+        ))
+        need[it.sku] = need.get(it.sku, 0) + int(it.qty)
+
+    totals = compute_totals(quote_lines, discount=discount, discount_pct=discount_pct)
+
+    # stock check + minus
+    balances = _lock_balances((location.pk, p.pk) for p in products.values())
+    short = [
+        f"{sku}. On hand: {balances[(location.pk, products[sku].pk)].on_hand_qty}"
+        for sku, qty in need.items()
+        if int(balances[(location.pk, products[sku].pk)].on_hand_qty) < qty
+    ]
+    if short:
+        raise ValueError(f"Insufficient stock for {'; '.join(short)}")
+
+    invoice = _create_numbered(
+        Invoice, "invoice_no", "INV",
         location=location,
         customer=customer,
-        status="POSTED",
-        created_by=created_by,
-        created_at=timezone.now(),
+        status="FINAL",
+        subtotal=totals.subtotal,
+        discount=totals.discount,
+        tax=totals.tax,
+        grand_total=totals.grand_total,
     )
 
-    total = Decimal("0")
-
-    for it in items:
-        product = Product.objects.select_for_update().get(sku=it.sku)
-        qty = int(it.qty)
+    now = timezone.now()
+    InvoiceLine.objects.bulk_create(
+        [
+            InvoiceLine(
+                invoice=invoice,
+                product=products[l.sku],
+                qty=l.qty,
+                unit_price=l.unit_price,
+                discount=l.line_discount,
+                line_total=l.line_total,
+            )
+            for l in totals.lines
+        ],
+        batch_size=500,
+    )
 
-        unit_price = _d(it.price) if it.price is not None else _d(
-            getattr(product, "selling_price", None) or getattr(product, "price", None) or 0
-        )
-        line_total = unit_price * qty
+    touched = []
+    for sku, qty in need.items():
+        bal = balances[(location.pk, products[sku].pk)]
+        bal.on_hand_qty = int(bal.on_hand_qty) - qty
+        bal.last_updated = now
+        touched.append((sku, bal))
+    StockBalance.objects.bulk_update([b for _, b in touched], ["on_hand_qty", "last_updated"], batch_size=500)
+
+    StockLedger.objects.bulk_create(
+        [
+            StockLedger(
+                date_time=now,
+                product=products[l.sku],
+                location=location,
+                movement_type="OUT",
+                qty=l.qty,
+                unit_cost=_d(getattr(products[l.sku], "cost", None) or 0),
+                unit_selling_price=(l.line_total / l.qty).quantize(Decimal("0.01")) if l.qty else l.unit_price,
+                reference_type="INV",
+                reference_no=invoice.invoice_no,
+                customer_name=(customer.name if customer else ""),
+                notes="Sale",
+            )
+            for l in totals.lines
+        ],
+        batch_size=500,
+    )
 
-        # stock check + minus
-        bal = _balance_for_update(location, product)
-        if int(bal.on_hand_qty) < qty:
-            raise ValueError(f"Insufficient stock for {product.sku}. On hand: {bal.on_hand_qty}")
+    publish_balances(location.pk, touched)
+    publish_on_commit("invoice", location.pk, {
+        "location_id": location.pk,
+        "invoice_no": invoice.invoice_no,
+        "customer": invoice.customer_display(),
+        "total": str(invoice.grand_total),
+    })
+    return invoice
 
-        InvoiceLine.objects.create(
-            invoice=invoice,
-            product=product,
-            qty=qty,
-            unit_price=unit_price,
-            line_total=line_total,
-        )
 
-        bal.on_hand_qty = int(bal.on_hand_qty) - qty
-        bal.last_updated = timezone.now()
-        bal.save(update_fields=["on_hand_qty", "last_updated"])
+class ReturnValidationError(ValueError):
+    """Return qty not allowed for one or more SKUs; .items holds the per-SKU details."""
 
-        StockLedger.objects.create(
-            date_time=timezone.now(),
-            product=product,
-            location=location,
-            movement_type="OUT",
-            qty=qty,
-            unit_cost=_d(getattr(product, "cost", None) or 0),
-            unit_selling_price=unit_price,
-            reference_type="INV",
-            reference_no=getattr(invoice, "invoice_no", "") or str(invoice.pk),
-            customer_name=(customer.name if customer else ""),
-            notes="Sale",
-        )
+    def __init__(self, items: list[dict]):
+        super().__init__("Return validation failed.")
+        self.items = items
 
-        total += line_total
 
-    # invoice total
-    if hasattr(invoice, "total_amount"):
-        invoice.total_amount = total
-        invoice.save(update_fields=["total_amount"])
+def _take_returned_qty(invoice, items: list[LineItem]) -> dict:
+    """
+    Validates + books return qty against InvoiceLine.returned_qty.
+    One locked read of the invoice's lines for the SKUs, then a conditional
+    UPDATE per touched line (returned_qty + n <= qty), inside the caller's
+    transaction - concurrent returns of the same invoice serialize here.
+    Returns {sku: net unit price paid} for default refund prices: the line
+    total per unit less the line's pro-rata share of the invoice discount.
+    """
+    from django.db.models import F
+    from .models import InvoiceLine
 
-    return invoice
+    want: dict[str, int] = {}
+    for it in items:
+        want[it.sku] = want.get(it.sku, 0) + int(it.qty)
+
+    by_sku: dict[str, list] = {}
+    for line in (
+        InvoiceLine.objects.select_for_update(of=("self",))
+        .filter(invoice=invoice, product__sku__in=want.keys())
+        .annotate(sku=F("product__sku"))
+        .order_by("id")
+    ):
+        by_sku.setdefault(line.sku, []).append(line)
+
+    errors = []
+    for sku, want_qty in want.items():
+        lines = by_sku.get(sku, [])
+        sold_qty = sum(l.qty for l in lines)
+        already_ret = sum(l.returned_qty for l in lines)
+        if sold_qty <= 0:
+            errors.append({"sku": sku, "error": "This item was not sold on this invoice."})
+        elif want_qty > sold_qty - already_ret:
+            errors.append({
+                "sku": sku,
+                "error": "Return qty exceeds allowed.",
+                "sold": sold_qty,
+                "already_returned": already_ret,
+                "remaining_allowed": max(sold_qty - already_ret, 0),
+                "requested": want_qty,
+            })
+    if errors:
+        raise ReturnValidationError(errors)
+
+    subtotal, doc_discount = _d(invoice.subtotal), _d(invoice.discount)
+    paid_share = (subtotal - doc_discount) / subtotal if subtotal > 0 else Decimal("1")
+
+    prices = {}
+    for sku, left in want.items():
+        for line in by_sku[sku]:
+            take = min(left, line.qty - line.returned_qty)
+            if take <= 0:
+                continue
+            updated = InvoiceLine.objects.filter(pk=line.pk, returned_qty__lte=F("qty") - take).update(
+                returned_qty=F("returned_qty") + take
+            )
+            if not updated:
+                raise ValueError(f"Returned qty of {sku} changed meanwhile, please retry.")
+            prices.setdefault(sku, (line.line_total * paid_share / line.qty).quantize(Decimal("0.01")))
+            left -= take
+            if not left:
+                break
+    return prices
 
 
 @transaction.atomic
 def create_return_with_lines(*, location, invoice=None, customer=None, items: Iterable[LineItem], created_by=None):
     """
+    - lock the invoice row and validate + book returned qty on its lines
+      (when invoice given; same lock order as cancel_invoices)
     - create return doc
-    - create return lines
-    - increase stock (StockBalance)
-    - add stock ledger RETURN
+    - bulk create return lines
+    - increase stock (StockBalance, bulk) + bulk ledger RETURN
     """
-    from .models import Product, Return, ReturnLine, StockLedger
-
-    ret = Return.objects.create(
+    from .models import Invoice, Return, ReturnLine, StockBalance, StockLedger
+    from .realtime import publish_balances
+
+    items = list(items)
+    locking.begin_posting()
+    paid_prices = {}
+    if invoice is not None:
+        # re-read under lock: a concurrent cancel holds this row until it commits
+        invoice = Invoice.objects.select_for_update().get(pk=invoice.pk)
+        if invoice.status == "CANCELLED":
+            raise ValueError(f"Invoice {invoice.invoice_no} is cancelled; nothing to return.")
+        paid_prices = _take_returned_qty(invoice, items)
+
+    products = _posting_products(it.sku for it in items)
+    missing = sorted({it.sku for it in items} - set(products))
+    if missing:
+        raise ValueError(f"Unknown SKU(s): {', '.join(missing)}")
+    balances = _lock_balances((location.pk, p.pk) for p in products.values())
+
+    ret = _create_numbered(
+        Return, "return_no", "RET",
         location=location,
         invoice=invoice,
         customer=customer,
-        status="POSTED",
-        created_by=created_by,
-        created_at=timezone.now(),
     )
 
+    now = timezone.now()
     total = Decimal("0")
+    lines, moves, touched = [], [], {}
 
     for it in items:
-        product = Product.objects.select_for_update().get(sku=it.sku)
+        product = products[it.sku]
         qty = int(it.qty)
 
-        unit_price = _d(it.price) if it.price is not None else _d(
-            getattr(product, "selling_price", None) or getattr(product, "price", None) or 0
-        )
+        if it.price is not None:
+            unit_price = _d(it.price)
+        elif it.sku in paid_prices:
+            unit_price = paid_prices[it.sku]
+        else:
+            unit_price = _d(getattr(product, "selling_price", None) or getattr(product, "price", None) or 0)
         line_total = unit_price * qty
 
-        ReturnLine.objects.create(
+        lines.append(ReturnLine(
             return_doc=ret,
             product=product,
             qty=qty,
             unit_price=unit_price,
             line_total=line_total,
-        )
+        ))
 
-        bal = _balance_for_update(location, product)
+        bal = balances[(location.pk, product.pk)]
         bal.on_hand_qty = int(bal.on_hand_qty) + qty
-        bal.last_updated = timezone.now()
-        bal.save(update_fields=["on_hand_qty", "last_updated"])
+        bal.last_updated = now
+        touched[product.sku] = bal
 
-        StockLedger.objects.create(
-            date_time=timezone.now(),
+        moves.append(StockLedger(
+            date_time=now,
             product=product,
             location=location,
             movement_type="RETURN",
@@ -225,12 +501,412 @@ def create_return_with_lines(*, location, invoice=None, customer=None, items: It
             reference_no=getattr(ret, "return_no", "") or str(ret.pk),
             customer_name=(customer.name if customer else ""),
             notes=f"Return against {getattr(invoice, 'invoice_no', '')}" if invoice else "Return",
-        )
+        ))
 
         total += line_total
 
-    if hasattr(ret, "total_amount"):
-        ret.total_amount = total
-        ret.save(update_fields=["total_amount"])
+    ReturnLine.objects.bulk_create(lines, batch_size=500)
+    StockBalance.objects.bulk_update(list(touched.values()), ["on_hand_qty", "last_updated"], batch_size=500)
+    StockLedger.objects.bulk_create(moves, batch_size=500)
 
+    ret.total_refund = total
+    ret.save(update_fields=["total_refund"])
+
+    publish_balances(location.pk, list(touched.items()))
     return ret
+
+
+# -----------------------------
+# Invoice cancel / void
+# -----------------------------
+@transaction.atomic
+def cancel_invoices(*, invoice_ids: Iterable[int], reason: str = "") -> dict:
+    """
+    Voids invoices in ONE transaction:
+    - FINAL invoices: every line's qty goes back to the selling location
+      (bulk balance update + one VOID ledger row per line at the cost the
+      sale was booked at)
+    - DRAFT invoices never moved stock: status only
+    - already CANCELLED invoices are skipped (idempotent)
+    Invoices with returns are refused: the return already moved that stock.
+    Lock order: invoice rows, then their lines (as create_return_with_lines),
+    so a return either sees CANCELLED or is seen by the Return check.
+    Returns {"cancelled": [invoice_no, ...], "skipped": [invoice_no, ...]}.
+    """
+    from .models import Invoice, InvoiceLine, Return, StockBalance, StockLedger
+    from .realtime import publish_balances, publish_on_commit
+
+    ids = {int(i) for i in invoice_ids}
+    if not ids:
+        raise ValueError("No invoices provided.")
+    locking.begin_posting()
+
+    invoices = list(Invoice.objects.select_for_update().filter(pk__in=ids).order_by("id"))
+    missing = ids - {inv.pk for inv in invoices}
+    if missing:
+        raise ValueError(f"Unknown invoice id(s): {', '.join(map(str, sorted(missing)))}")
+
+    skipped = [inv.invoice_no for inv in invoices if inv.status == "CANCELLED"]
+    todo = [inv for inv in invoices if inv.status != "CANCELLED"]
+    if not todo:
+        return {"cancelled": [], "skipped": skipped}
+
+    lines = list(
+        InvoiceLine.objects.select_for_update(of=("self",))
+        .filter(invoice_id__in=[inv.pk for inv in todo])
+        .values_list("invoice_id", "product_id", "product__sku", "qty", "unit_price", "line_total")
+        .order_by("invoice_id", "id")
+    )
+
+    with_returns = sorted(
+        Return.objects.filter(invoice__in=todo).values_list("invoice__invoice_no", flat=True).distinct()
+    )
+    if with_returns:
+        raise ValueError(f"Invoice(s) with returns cannot be cancelled: {', '.join(with_returns)}")
+
+    final = {inv.pk: inv for inv in todo if inv.status == "FINAL"}
+    lines = [line for line in lines if line[0] in final]
+
+    # cost + customer as booked on the original OUT rows
+    booked = {
+        (no, pid): (cost, customer_name)
+        for no, pid, cost, customer_name in StockLedger.objects.filter(
+            movement_type="OUT", reference_type="INV",
+            reference_no__in=[inv.invoice_no for inv in final.values()],
+        ).values_list("reference_no", "product_id", "unit_cost", "customer_name")
+    }
+
+    balances = _lock_balances({(final[inv_id].location_id, pid) for inv_id, pid, _, _, _, _ in lines})
+
+    now = timezone.now()
+    note = f"Invoice cancelled: {reason}" if reason else "Invoice cancelled"
+    ledger = []
+    touched: dict[int, dict] = {}  # location_id -> {sku: balance}
+    for inv_id, pid, sku, qty, unit_price, line_total in lines:
+        inv = final[inv_id]
+        cost, customer_name = booked.get((inv.invoice_no, pid), (0, ""))
+        bal = balances[(inv.location_id, pid)]
+        bal.on_hand_qty = int(bal.on_hand_qty) + int(qty)
+        bal.last_updated = now
+        touched.setdefault(inv.location_id, {})[sku] = bal
+
+        ledger.append(StockLedger(
+            date_time=now,
+            product_id=pid,
+            location_id=inv.location_id,
+            movement_type="VOID",
+            qty=qty,
+            unit_cost=cost,
+            unit_selling_price=(line_total / qty).quantize(Decimal("0.01")) if qty else unit_price,
+            reference_type="INV",
+            reference_no=inv.invoice_no,
+            customer_name=customer_name,
+            notes=note,
+        ))
+
+    StockBalance.objects.bulk_update(
+        [b for per_loc in touched.values() for b in per_loc.values()],
+        ["on_hand_qty", "last_updated"], batch_size=500,
+    )
+    StockLedger.objects.bulk_create(ledger, batch_size=500)
+    Invoice.objects.filter(pk__in=[inv.pk for inv in todo]).update(
+        status="CANCELLED", cancelled_at=now, cancel_reason=reason[:200],
+    )
+
+    for loc_id, per_loc in touched.items():
+        publish_balances(loc_id, list(per_loc.items()))
+    for inv in todo:
+        publish_on_commit("invoice_cancelled", inv.location_id, {
+            "location_id": inv.location_id,
+            "invoice_no": inv.invoice_no,
+        })
+    return {"cancelled": [inv.invoice_no for inv in todo], "skipped": skipped}
+
+
+def cancel_invoice(*, invoice, reason: str = "") -> bool:
+    """Single invoice; False when it was already cancelled."""
+    return bool(cancel_invoices(invoice_ids=[invoice.pk], reason=reason)["cancelled"])
+
+
+# -----------------------------
+# Stock Transfer (location -> location)
+# -----------------------------
+def resolve_scanned_codes(codes: Iterable[str]) -> dict:
+    """
+    Maps scanned codes (SKU or barcode) to products with ONE query.
+    Returns {code: Product}; unknown codes are simply missing from the dict.
+    """
+    from django.db.models import Q
+    from .models import Product
+
+    codes = {(c or "").strip() for c in codes}
+    codes.discard("")
+    if not codes:
+        return {}
+
+    found = {}
+    for p in Product.objects.filter(Q(sku__in=codes) | Q(barcode_value__in=codes)):
+        # SKU wins over barcode when both match different rows
+        if p.sku in codes:
+            found[p.sku] = p
+        if p.barcode_value in codes and p.barcode_value not in found:
+            found[p.barcode_value] = p
+    return found
+
+
+def _lock_balances(pairs) -> dict:
+    """
+    Makes sure a StockBalance row exists for every posted (location, product)
+    pair, then locks exactly those rows in ONE query, ordered by
+    (location_id, product_id). The fixed order means two postings touching
+    the same rows can never deadlock.
+    In "advisory" posting mode the (location, product) advisory locks are
+    taken first, in the same order (see locking.py).
+    Returns {(location_id, product_id): StockBalance}.
+    """
+    from django.db.models import Q
+    from .models import StockBalance
+
+    pairs = sorted({(int(loc_id), int(prod_id)) for loc_id, prod_id in pairs})
+    if not pairs:
+        return {}
+    locking.lock_stock(pairs)
+
+    StockBalance.objects.bulk_create(
+        [
+            StockBalance(location_id=loc_id, product_id=prod_id, on_hand_qty=0, reserved_qty=0)
+            for loc_id, prod_id in pairs
+        ],
+        ignore_conflicts=True,
+    )
+
+    by_location: dict[int, list] = {}
+    for loc_id, prod_id in pairs:
+        by_location.setdefault(loc_id, []).append(prod_id)
+    match = Q()
+    for loc_id, prod_ids in by_location.items():
+        match |= Q(location_id=loc_id, product_id__in=prod_ids)
+    rows = StockBalance.objects.select_for_update().filter(match).order_by("location_id", "product_id")
+    return {(b.location_id, b.product_id): b for b in rows}
+
+
+@transaction.atomic
+def create_transfer_with_lines(*, from_location, to_location, items: Iterable[LineItem], notes: str = ""):
+    """
+    - create transfer doc + lines
+    - decrease stock at source, increase at destination (bulk)
+    - add paired ledger rows TRF_OUT / TRF_IN (bulk)
+    Everything posts in one transaction or not at all.
+    """
+    from .models import Product, StockBalance, StockLedger, StockTransfer, StockTransferLine
+    from .realtime import publish_balances
+
+    if from_location.pk == to_location.pk:
+        raise ValueError("Source and destination location must be different.")
+    locking.begin_posting()
+
+    # same SKU scanned many times = one line
+    qty_map: dict[str, int] = {}
+    for it in items:
+        qty = int(it.qty)
+        if not it.sku or qty <= 0:
+            raise ValueError("Each item requires sku and qty >= 1.")
+        qty_map[it.sku] = qty_map.get(it.sku, 0) + qty
+
+    if not qty_map:
+        raise ValueError("No items provided.")
+
+    products = {p.sku: p for p in Product.objects.filter(sku__in=qty_map.keys())}
+    missing = sorted(set(qty_map) - set(products))
+    if missing:
+        raise ValueError(f"Unknown SKU(s): {', '.join(missing)}")
+
+    balances = _lock_balances(
+        (loc_id, p.pk) for loc_id in (from_location.pk, to_location.pk) for p in products.values()
+    )
+
+    short = []
+    for sku, qty in qty_map.items():
+        src = balances[(from_location.pk, products[sku].pk)]
+        if int(src.on_hand_qty) < qty:
+            short.append(f"{sku} (on hand: {src.on_hand_qty}, requested: {qty})")
+    if short:
+        raise ValueError(f"Insufficient stock at {from_location.name}: {'; '.join(short)}")
+
+    transfer = _create_numbered(
+        StockTransfer, "transfer_no", "TRF",
+        from_location=from_location,
+        to_location=to_location,
+        notes=notes,
+    )
+
+    now = timezone.now()
+    lines, ledger, touched = [], [], []
+    for sku, qty in qty_map.items():
+        product = products[sku]
+        src = balances[(from_location.pk, product.pk)]
+        dst = balances[(to_location.pk, product.pk)]
+
+        src.on_hand_qty = int(src.on_hand_qty) - qty
+        dst.on_hand_qty = int(dst.on_hand_qty) + qty
+        src.last_updated = dst.last_updated = now
+        touched += [src, dst]
+
+        lines.append(StockTransferLine(transfer=transfer, product=product, qty=qty))
+
+        common = dict(
+            date_time=now,
+            product=product,
+            qty=qty,
+            unit_cost=_d(product.cost or 0),
+            unit_selling_price=_d(product.selling_price or 0),
+            reference_type="TRF",
+            reference_no=transfer.transfer_no,
+        )
+        ledger.append(StockLedger(location=from_location, movement_type="TRF_OUT",
+                                  notes=f"Transfer to {to_location.name}", **common))
+        ledger.append(StockLedger(location=to_location, movement_type="TRF_IN",
+                                  notes=f"Transfer from {from_location.name}", **common))
+
+    StockBalance.objects.bulk_update(touched, ["on_hand_qty", "last_updated"], batch_size=500)
+    StockTransferLine.objects.bulk_create(lines, batch_size=500)
+    StockLedger.objects.bulk_create(ledger, batch_size=500)
+
+    for loc in (from_location, to_location):
+        publish_balances(loc.pk, [(sku, balances[(loc.pk, p.pk)]) for sku, p in products.items()])
+    return transfer
+
+
+# -----------------------------
+# Cycle Count sessions
+# -----------------------------
+@transaction.atomic
+def open_count_session(*, location, notes: str = ""):
+    """
+    - create session (one OPEN session per location, enforced by a
+      conditional unique constraint: a concurrent open raises ValueError)
+    - freeze the location's StockBalance into session lines (expected_qty) with one bulk insert
+    """
+    from django.db import IntegrityError
+    from .models import CountSession, CountSessionLine, StockBalance
+
+    busy = ValueError("This location already has an open count session.")
+    if CountSession.objects.filter(location=location, status="OPEN").exists():
+        raise busy
+    try:
+        with transaction.atomic():
+            session = _create_numbered(CountSession, "session_no", "CNT", location=location, notes=notes)
+    except IntegrityError:
+        raise busy from None
+
+    snapshot = StockBalance.objects.filter(location=location).values_list("product_id", "on_hand_qty")
+    CountSessionLine.objects.bulk_create(
+        [
+            CountSessionLine(session=session, product_id=pid, expected_qty=qty)
+            for pid, qty in snapshot.iterator(chunk_size=5000)
+        ],
+        batch_size=1000,
+    )
+    return session
+
+
+@transaction.atomic
+def add_count_scans(*, session, counts: dict) -> int:
+    """
+    counts = {code: qty} already aggregated by the caller (qty may be negative to undo a mis-scan).
+    Codes are SKU or barcode. One read + one bulk update per batch, never a row per scan.
+    Returns number of lines touched.
+    """
+    from .models import CountSession, CountSessionLine
+
+    session = CountSession.objects.select_for_update().get(pk=session.pk)
+    if session.status != "OPEN":
+        raise ValueError(f"Count session {session.session_no} is {session.status}.")
+
+    found = resolve_scanned_codes(counts.keys())
+    unknown = sorted(c for c in counts if c not in found)
+    if unknown:
+        raise ValueError(f"Unknown code(s): {', '.join(unknown)}")
+
+    per_product: dict[int, int] = {}
+    for code, qty in counts.items():
+        pid = found[code].pk
+        per_product[pid] = per_product.get(pid, 0) + int(qty)
+
+    # products with no balance row at open were not snapshotted: expected 0
+    CountSessionLine.objects.bulk_create(
+        [CountSessionLine(session=session, product_id=pid, expected_qty=0) for pid in per_product],
+        ignore_conflicts=True,
+    )
+
+    lines = list(
+        CountSessionLine.objects.select_for_update()
+        .filter(session=session, product_id__in=per_product.keys())
+        .order_by("product_id")
+    )
+    for line in lines:
+        line.counted_qty = max(int(line.counted_qty) + per_product[line.product_id], 0)
+        line.is_counted = True
+    CountSessionLine.objects.bulk_update(lines, ["counted_qty", "is_counted"], batch_size=500)
+    return len(lines)
+
+
+@transaction.atomic
+def close_count_session(*, session, zero_uncounted: bool = False):
+    """
+    - variance = counted - frozen expected, per line
+    - balance += variance (bulk), ADJUST ledger row per variance (bulk)
+    zero_uncounted=True treats every snapshot line that was never scanned as counted 0
+    (full wall-to-wall count); default only adjusts scanned SKUs (cycle count).
+    Returns list of (line, variance) that were posted.
+    """
+    from .models import CountSession, StockBalance, StockLedger
+    from .realtime import publish_balances
+
+    locking.begin_posting()
+    session = CountSession.objects.select_for_update().get(pk=session.pk)
+    if session.status != "OPEN":
+        raise ValueError(f"Count session {session.session_no} is {session.status}.")
+
+    lines = session.lines.select_related("product")
+    if not zero_uncounted:
+        lines = lines.filter(is_counted=True)
+
+    posted = []
+    for line in lines:
+        variance = (line.counted_qty if line.is_counted else 0) - line.expected_qty
+        if variance:
+            posted.append((line, variance))
+
+    if posted:
+        location = session.location
+        balances = _lock_balances((location.pk, line.product_id) for line, _ in posted)
+        now = timezone.now()
+        touched, ledger = [], []
+        for line, variance in posted:
+            bal = balances[(location.pk, line.product_id)]
+            bal.on_hand_qty = int(bal.on_hand_qty) + variance
+            bal.last_updated = now
+            touched.append(bal)
+
+            ledger.append(StockLedger(
+                date_time=now,
+                product=line.product,
+                location=location,
+                movement_type="ADJUST",
+                qty=variance,
+                unit_cost=_d(line.product.cost or 0),
+                unit_selling_price=_d(line.product.selling_price or 0),
+                reference_type="CNT",
+                reference_no=session.session_no,
+                notes=f"Count: expected {line.expected_qty}, counted {line.counted_qty if line.is_counted else 0}",
+            ))
+
+        StockBalance.objects.bulk_update(touched, ["on_hand_qty", "last_updated"], batch_size=500)
+        StockLedger.objects.bulk_create(ledger, batch_size=500)
+        publish_balances(location.pk, [(line.product.sku, bal) for (line, _), bal in zip(posted, touched)])
+
+    session.status = "CLOSED"
+    session.closed_at = timezone.now()
+    session.save(update_fields=["status", "closed_at"])
+    return posted
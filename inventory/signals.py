@@ -1,9 +1,14 @@
 # inventory/signals.py
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import Product
+from .models import Customer, PriceList, PriceListItem, Product
+from .pricing import invalidate as invalidate_price_book
+from .repricing import record_price_change
 from .services import ensure_product_barcode
+from .thumbnails import schedule_for_product
+from .utils import normalize_phone
 
 
 @receiver(post_save, sender=Product)
@@ -18,3 +23,56 @@ def product_post_save(sender, instance: Product, created, **kwargs):
         return
 
     ensure_product_barcode(instance)
+
+
+@receiver(post_save, sender=Product)
+def product_thumbnails(sender, instance: Product, raw=False, **kwargs):
+    if not raw:
+        schedule_for_product(instance)
+
+
+@receiver(pre_save, sender=Product)
+def product_prices_before(sender, instance: Product, raw=False, update_fields=None, **kwargs):
+    instance._prices_before = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {"cost", "selling_price"} & set(update_fields):
+        return
+    instance._prices_before = (
+        Product.objects.filter(pk=instance.pk).values_list("cost", "selling_price").first()
+    )
+
+
+@receiver(post_save, sender=Product)
+def product_price_history(sender, instance: Product, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, "_prices_before", None)
+    if created or before is not None:
+        record_price_change(instance, None if created else before)
+
+
+@receiver(post_save, sender=Product)
+def product_base_price(sender, instance: Product, created, raw=False, **kwargs):
+    # the book keeps every product's selling price as its fallback; new SKUs
+    # are looked up on a miss, so only an edited price needs a rebuild
+    before = getattr(instance, "_prices_before", None)
+    if raw or created or before is None or before[1] == instance.selling_price:
+        return
+    invalidate_price_book()
+    transaction.on_commit(invalidate_price_book)
+
+
+@receiver([post_save, post_delete], sender=PriceList)
+@receiver([post_save, post_delete], sender=PriceListItem)
+def price_book_changed(sender, **kwargs):
+    # now for this process, and again after commit so no reader caches pre-commit data
+    invalidate_price_book()
+    transaction.on_commit(invalidate_price_book)
+
+
+@receiver(pre_save, sender=Customer)
+def customer_phone(sender, instance: Customer, raw=False, **kwargs):
+    # one stored form, so the phone prefix search matches however it was typed
+    if not raw:
+        instance.phone = normalize_phone(instance.phone)
@@ -0,0 +1,39 @@
+from django.test import TestCase
+
+from inventory import analytics
+from inventory.services import LineItem, cancel_invoices, create_invoice_with_lines, create_return_with_lines
+
+from .utils import make_location, make_product, receive
+
+
+class SalesFrameTests(TestCase):
+    def setUp(self):
+        self.shop = make_location("Shop")
+        self.black = make_product("AN-BLA-40", selling_price="250", color="Black", size="40")
+        self.red = make_product("AN-RED-41", selling_price="300", color="Red", size="41")
+        receive(self.shop, self.black, 10)
+        receive(self.shop, self.red, 10)
+
+    def _row(self, frame, product):
+        i = frame.product_ids.tolist().index(product.pk)
+        return int(frame.sold[i]), round(float(frame.revenue[i]), 2), int(frame.on_hand[i])
+
+    def test_sold_is_net_of_voids_and_returns(self):
+        kept = create_invoice_with_lines(location=self.shop, items=[LineItem(sku="AN-BLA-40", qty=3)])
+        voided = create_invoice_with_lines(location=self.shop, items=[LineItem(sku="AN-BLA-40", qty=2)])
+        cancel_invoices(invoice_ids=[voided.pk])
+        create_return_with_lines(location=self.shop, invoice=kept, items=[LineItem(sku="AN-BLA-40", qty=1)])
+        create_invoice_with_lines(location=self.shop, items=[LineItem(sku="AN-RED-41", qty=1)])
+
+        frame = analytics.load_frame()
+        self.assertEqual(self._row(frame, self.black), (2, 500.0, 8))
+        self.assertEqual(self._row(frame, self.red), (1, 300.0, 9))
+
+        rows = {r["sku"]: r for r in analytics.sell_through(frame)}
+        self.assertAlmostEqual(rows["AN-BLA-40"]["sell_through"], 0.2)
+
+    def test_size_color_matrix(self):
+        create_invoice_with_lines(location=self.shop, items=[LineItem(sku="AN-RED-41", qty=4)])
+        m = analytics.size_color_matrix(analytics.load_frame())
+        self.assertEqual((m["sizes"], m["colors"]), (["40", "41"], ["Black", "Red"]))
+        self.assertEqual(m["sold"], [[0, 0], [0, 4]])
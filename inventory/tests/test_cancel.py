@@ -0,0 +1,51 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+
+from inventory.models import Invoice, StockLedger
+from inventory.reconcile import find_drift
+from inventory.services import LineItem, cancel_invoices, create_invoice_with_lines
+
+from .utils import login_staff, make_location, make_product, on_hand, receive
+
+
+class CancelInvoiceTests(TestCase):
+    def setUp(self):
+        self.shop = make_location("Shop")
+        self.a = make_product("CX-A", cost="100")
+        receive(self.shop, self.a, 5)
+        self.invoice = create_invoice_with_lines(location=self.shop, items=[LineItem(sku="CX-A", qty=2)])
+
+    def _cancel(self, client):
+        return client.post("/api/invoices/cancel/", {"invoice_id": self.invoice.pk}, content_type="application/json")
+
+    def test_cancel_restores_stock_once(self):
+        self.assertEqual(cancel_invoices(invoice_ids=[self.invoice.pk])["cancelled"], [self.invoice.invoice_no])
+        self.assertEqual(cancel_invoices(invoice_ids=[self.invoice.pk])["skipped"], [self.invoice.invoice_no])
+        self.assertEqual(on_hand(self.shop, self.a), 5)
+        void = StockLedger.objects.get(movement_type="VOID")
+        self.assertEqual((void.qty, void.unit_cost, void.reference_no), (2, Decimal("100"), self.invoice.invoice_no))
+        self.assertEqual(find_drift(), [])
+
+    def test_api_needs_staff(self):
+        self.assertEqual(self._cancel(self.client).status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user(username="clerk", password="x"))
+        self.assertEqual(self._cancel(self.client).status_code, 403)
+        self.assertEqual(Invoice.objects.get(pk=self.invoice.pk).status, "FINAL")
+
+        login_staff(self.client)
+        self.assertEqual(self._cancel(self.client).status_code, 200)
+        self.assertEqual(Invoice.objects.get(pk=self.invoice.pk).status, "CANCELLED")
+
+    def test_api_needs_the_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        login_staff(client)
+        self.assertEqual(self._cancel(client).status_code, 403)
+
+        client.get("/products/reprice/")     # a form page sets the csrftoken cookie
+        resp = client.post(
+            "/api/invoices/cancel/", {"invoice_id": self.invoice.pk}, content_type="application/json",
+            HTTP_X_CSRFTOKEN=client.cookies["csrftoken"].value,
+        )
+        self.assertEqual(resp.status_code, 200)
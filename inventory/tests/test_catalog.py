@@ -0,0 +1,22 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventory.models import PriceList, PriceListItem
+
+from .utils import make_product
+
+
+class CatalogTests(TestCase):
+    def test_rows_carry_the_base_price(self):
+        p = make_product("CT-1", selling_price="250")
+        wholesale = PriceList.objects.create(name="Wholesale", customer_type="wholesale")
+        PriceListItem.objects.create(price_list=wholesale, product=p, price=Decimal("200"))
+
+        data = self.client.get("/api/catalog/").json()
+        self.assertEqual(data["fields"], ["sku", "barcode", "name", "base_price", "active"])
+        row = dict(zip(data["fields"], data["rows"][0]))
+        self.assertEqual((row["sku"], row["base_price"]), ("CT-1", "250.00"))
+
+        resp = self.client.get("/api/catalog/", HTTP_IF_NONE_MATCH=self.client.get("/api/catalog/")["ETag"])
+        self.assertEqual(resp.status_code, 304)
@@ -0,0 +1,89 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import DatabaseError, connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from inventory.closing import close_day
+from inventory.models import DayClosing
+from inventory.services import LineItem, cancel_invoices, create_invoice_with_lines, create_return_with_lines
+
+from .utils import login_staff, make_location, make_product, receive
+
+
+class CloseDayTests(TestCase):
+    def setUp(self):
+        self.shop = make_location("Shop")
+        receive(self.shop, make_product("CD-1", selling_price="250"), 10)
+        receive(self.shop, make_product("CD-2", selling_price="100"), 10)
+
+    def test_totals_are_frozen(self):
+        inv = create_invoice_with_lines(location=self.shop, items=[LineItem(sku="CD-1", qty=2), LineItem(sku="CD-2", qty=1)])
+        gone = create_invoice_with_lines(location=self.shop, items=[LineItem(sku="CD-2", qty=3)])
+        cancel_invoices(invoice_ids=[gone.pk])
+        create_return_with_lines(location=self.shop, invoice=inv, items=[LineItem(sku="CD-1", qty=1)])
+
+        z = close_day(location=self.shop)
+        self.assertEqual((z.invoice_count, z.units_sold, z.sales_total), (1, 3, Decimal("600")))
+        self.assertEqual((z.return_count, z.units_returned, z.returns_total), (1, 1, Decimal("250")))
+        self.assertEqual((z.cancelled_count, z.cancelled_total, z.net_total), (1, Decimal("300"), Decimal("350")))
+
+        create_invoice_with_lines(location=self.shop, items=[LineItem(sku="CD-2", qty=1)])
+        self.assertEqual(close_day(location=self.shop).pk, z.pk)
+        self.assertEqual(close_day(location=self.shop).invoice_count, 1)
+        self.assertEqual(close_day(location=self.shop, force=True).invoice_count, 2)
+        self.assertEqual(DayClosing.objects.count(), 1)
+
+    def test_future_day(self):
+        with self.assertRaises(ValueError):
+            close_day(location=self.shop, day=timezone.localdate() + timedelta(days=1))
+
+    def test_closing_needs_staff(self):
+        body = {"location_id": self.shop.pk}
+        self.assertEqual(self.client.post("/api/closings/close/", body, content_type="application/json").status_code, 403)
+        resp = self.client.get("/closing/")
+        self.assertEqual(resp.status_code, 302)
+        self.assertIn("/admin/login/", resp["Location"])
+        self.assertFalse(DayClosing.objects.exists())
+
+        login_staff(self.client)
+        self.assertEqual(self.client.post("/api/closings/close/", body, content_type="application/json").status_code, 200)
+        self.assertEqual(self.client.get("/closing/").status_code, 200)
+        self.assertEqual(self.client.get("/api/closings/").status_code, 200)
+
+    def test_api_rejects_bad_input(self):
+        login_staff(self.client)
+        for body in ({}, {"location_id": "abc"}, {"location_id": self.shop.pk, "date": 20261019},
+                     {"location_id": self.shop.pk, "date": "19/10/2026"}):
+            resp = self.client.post("/api/closings/close/", body, content_type="application/json")
+            self.assertEqual(resp.status_code, 400, body)
+        self.assertEqual(self.client.get("/api/closings/", {"location_id": "abc"}).status_code, 400)
+        self.assertFalse(DayClosing.objects.exists())
+
+
+class ConcurrentCloseTests(TransactionTestCase):
+    def test_one_closing_per_day(self):
+        shop = make_location("Shop")
+        barrier = threading.Barrier(4)
+        out, errors = [], []
+
+        def worker():
+            try:
+                barrier.wait()
+                out.append(close_day(location=shop).pk)
+            except DatabaseError as e:
+                errors.append(str(e))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(DayClosing.objects.count(), 1)
+        self.assertEqual(set(out), {DayClosing.objects.get().pk})
@@ -0,0 +1,67 @@
+import threading
+
+from django.db import DatabaseError, connections
+from django.test import TestCase, TransactionTestCase
+
+from inventory.models import CountSession, StockLedger
+from inventory.services import add_count_scans, close_count_session, open_count_session
+
+from .utils import make_location, make_product, on_hand, receive
+
+
+class CountSessionTests(TestCase):
+    def setUp(self):
+        self.shop = make_location("Shop")
+        self.a = make_product("CS-A")
+        self.b = make_product("CS-B")
+        receive(self.shop, self.a, 5)
+        receive(self.shop, self.b, 3)
+
+    def test_count_posts_adjustments(self):
+        session = open_count_session(location=self.shop)
+        self.assertEqual(session.session_no, "CNT-00001")
+        add_count_scans(session=session, counts={"CS-A": 4, "CS-B": 3})
+        add_count_scans(session=session, counts={"CS-A": 2})
+        close_count_session(session=session)
+
+        self.assertEqual((on_hand(self.shop, self.a), on_hand(self.shop, self.b)), (6, 3))
+        adjust = StockLedger.objects.filter(movement_type="ADJUST")
+        self.assertEqual(list(adjust.values_list("product__sku", "qty")), [("CS-A", 1)])
+
+    def test_one_open_session_per_location(self):
+        first = open_count_session(location=self.shop)
+        with self.assertRaises(ValueError):
+            open_count_session(location=self.shop)
+        resp = self.client.post("/api/counts/open/", {"location_id": self.shop.pk}, content_type="application/json")
+        self.assertEqual(resp.status_code, 400)
+
+        close_count_session(session=first)
+        self.assertEqual(open_count_session(location=self.shop).session_no, "CNT-00002")
+
+
+class ConcurrentOpenTests(TransactionTestCase):
+    def test_concurrent_opens_leave_one_session(self):
+        shop = make_location("Shop")
+        barrier = threading.Barrier(4)
+        opened, refused, errors = [], [], []
+
+        def worker():
+            try:
+                barrier.wait()
+                opened.append(open_count_session(location=shop).pk)
+            except ValueError:
+                refused.append(1)
+            except DatabaseError as e:
+                errors.append(str(e))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual((len(opened), len(refused)), (1, 3))
+        self.assertEqual(CountSession.objects.filter(location=shop, status="OPEN").count(), 1)
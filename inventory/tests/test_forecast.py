@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.forecast import refresh_forecasts
+from inventory.models import DemandForecast, StockLedger
+
+from .utils import login_staff, make_location, make_product, receive
+
+
+class ForecastTests(TestCase):
+    def setUp(self):
+        self.shop = make_location("Shop")
+        self.p = make_product("FC-1")
+        receive(self.shop, self.p, 100)
+        now = timezone.now()
+        StockLedger.objects.bulk_create([
+            StockLedger(product=self.p, location=self.shop, movement_type="OUT", qty=2, unit_cost=100,
+                        reference_type="INV", date_time=now - timedelta(days=d))
+            for d in range(14)
+        ])
+        StockLedger.objects.filter(product=self.p, movement_type="IN").update(date_time=now - timedelta(days=30))
+
+    def test_moving_average_and_cover(self):
+        refresh_forecasts(history_days=14, horizon_days=7, method="ma", window=7)
+        f = DemandForecast.objects.get(product=self.p, location=self.shop)
+        self.assertAlmostEqual(f.daily_rate, 2.0, places=3)
+        self.assertAlmostEqual(f.forecast_qty, 14.0, places=3)
+        self.assertAlmostEqual(f.days_of_cover, 50.0, places=3)
+
+    def test_refresh_needs_staff(self):
+        body = {"history_days": 14, "method": "ma", "window": 7}
+        self.assertEqual(self.client.post("/api/forecasts/refresh/", body, content_type="application/json").status_code, 403)
+        self.assertFalse(DemandForecast.objects.exists())
+        login_staff(self.client)
+        self.assertEqual(self.client.post("/api/forecasts/refresh/", body, content_type="application/json").status_code, 200)
+        self.assertEqual(self.client.get("/api/forecasts/").status_code, 200)
+        self.assertTrue(DemandForecast.objects.exists())
+
+    def test_list_rejects_a_non_integer_location(self):
+        refresh_forecasts(history_days=14, horizon_days=7, method="ma", window=7)
+        self.assertEqual(len(self.client.get("/api/forecasts/", {"location_id": self.shop.pk}).json()["results"]), 1)
+        self.assertEqual(self.client.get("/api/forecasts/", {"location_id": "abc"}).status_code, 400)
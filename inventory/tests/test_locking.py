@@ -0,0 +1,111 @@
+import random
+import threading
+from unittest import skipUnless
+
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import TransactionTestCase, override_settings
+
+from inventory import locking
+from inventory.models import Invoice, InvoiceLine, StockBalance
+from inventory.reconcile import location_drift
+from inventory.services import LineItem, create_invoice_with_lines, create_transfer_with_lines
+
+from .utils import make_location, make_product, on_hand, receive
+
+THREADS = 6
+ROUNDS = 12
+OPENING = 1000
+
+
+class ConcurrentPostingTests(TransactionTestCase):
+    """
+    Threads (one DB connection each) posting invoices and transfers against
+    the same location at once. On PostgreSQL this runs pg_advisory_xact_lock
+    and row locks for real: DB_MODE=postgres python manage.py test inventory.
+    """
+
+    def setUp(self):
+        self.shop = make_location("Shop")
+        self.store = make_location("Store")
+        self.products = [make_product(f"LCK-{i}") for i in range(6)]
+        for p in self.products:
+            receive(self.shop, p, OPENING)
+            receive(self.store, p, OPENING)
+
+    def _worker(self, seed, errors):
+        rnd = random.Random(seed)
+        try:
+            for _ in range(ROUNDS):
+                picked = rnd.sample(self.products, rnd.randint(1, len(self.products)))
+                try:
+                    if rnd.random() < 0.7:
+                        create_invoice_with_lines(
+                            location=self.shop, items=[LineItem(sku=p.sku, qty=rnd.randint(1, 3)) for p in picked],
+                        )
+                    else:
+                        src, dst = rnd.sample([self.shop, self.store], 2)
+                        create_transfer_with_lines(
+                            from_location=src, to_location=dst, items=[LineItem(sku=p.sku, qty=1) for p in picked],
+                        )
+                except DatabaseError as e:   # deadlock, lock timeout, duplicate number ...
+                    errors.append(str(e))
+        finally:
+            connections.close_all()
+
+    def _run(self):
+        errors = []
+        threads = [threading.Thread(target=self._worker, args=(seed, errors)) for seed in range(THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Invoice.objects.values("invoice_no").distinct().count(), Invoice.objects.count())
+        for p in self.products:
+            sold = sum(InvoiceLine.objects.filter(product=p).values_list("qty", flat=True))
+            # transfers move stock between the two locations, never out of the pair
+            self.assertEqual(on_hand(self.shop, p) + on_hand(self.store, p), 2 * OPENING - sold)
+        self.assertEqual(location_drift(self.shop.pk), [])
+        self.assertEqual(location_drift(self.store.pk), [])
+        self.assertFalse(StockBalance.objects.filter(on_hand_qty__lt=0).exists())
+
+    @override_settings(POSTING_LOCK_MODE="advisory")
+    def test_advisory_mode(self):
+        self._run()
+
+    @override_settings(POSTING_LOCK_MODE="rows")
+    def test_rows_mode(self):
+        self._run()
+
+
+@skipUnless(connection.vendor == "postgresql", "pg_advisory_xact_lock is PostgreSQL only")
+@override_settings(POSTING_LOCK_MODE="advisory")
+class AdvisoryLockTests(TransactionTestCase):
+    def _try_lock(self, loc_id, product_id):
+        """pg_try_advisory_xact_lock from another connection."""
+        out = []
+
+        def probe():
+            try:
+                with transaction.atomic(), connection.cursor() as cur:
+                    cur.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", [loc_id, product_id])
+                    out.append(cur.fetchone()[0])
+            finally:
+                connections.close_all()
+
+        t = threading.Thread(target=probe)
+        t.start()
+        t.join()
+        return out[0]
+
+    def test_keys_are_per_location_and_held_until_commit(self):
+        with transaction.atomic():
+            self.assertEqual(locking.lock_stock([(2, 7), (1, 7), (2, 7)]), [(1, 7), (2, 7)])
+            self.assertFalse(self._try_lock(1, 7))
+            self.assertTrue(self._try_lock(3, 7))     # other location, same product
+        self.assertTrue(self._try_lock(1, 7))
+
+    def test_lock_needs_a_transaction(self):
+        with self.assertRaises(RuntimeError):
+            locking.lock_stock([(1, 1)])
@@ -0,0 +1,59 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+
+from inventory.models import Customer, StockLocation
+
+
+class LocationPickerTests(TestCase):
+    def setUp(self):
+        for name in ("Shop E", "Shop A", "Store", "Shop C", "Shop B"):
+            StockLocation.objects.create(name=name)
+
+    def test_pages_follow_the_cursor(self):
+        names, url, pages = [], "/api/locations/?limit=2", 0
+        while url:
+            data = self.client.get(url).json()
+            names += [r["name"] for r in data["results"]]
+            pages += 1
+            url = f"/api/locations/?limit=2&after={data['next']}" if data["next"] else None
+        self.assertEqual(names, ["Shop A", "Shop B", "Shop C", "Shop E", "Store"])
+        self.assertEqual(pages, 3)
+
+    def test_search_prefix(self):
+        data = self.client.get("/api/locations/", {"q": "sho", "limit": 3}).json()
+        self.assertEqual([r["name"] for r in data["results"]], ["Shop A", "Shop B", "Shop C"])
+        self.assertEqual(data["next"], "Shop C")
+
+
+class CustomerSearchTests(TestCase):
+    def setUp(self):
+        Customer.objects.create(name="Ali Raza", phone="03001234567")
+        Customer.objects.create(name="alina", phone="03219876543")
+        Customer.objects.create(name="Bilal", phone="03007654321")
+
+    def test_name_and_phone_prefix(self):
+        by_name = self.client.get("/api/customers/search/", {"q": "ali"}).json()["results"]
+        self.assertEqual([c["name"] for c in by_name], ["Ali Raza", "alina"])
+        by_phone = self.client.get("/api/customers/search/", {"q": "0300"}).json()["results"]
+        self.assertEqual({c["name"] for c in by_phone}, {"Ali Raza", "Bilal"})
+
+    def test_phone_is_matched_however_it_was_typed(self):
+        c = Customer.objects.create(name="Dawood", phone="+92 333-555 1234")
+        self.assertEqual(c.phone, "03335551234")
+        for q in ("0333-555", "+92 333 5", "0092333", "03335551234"):
+            found = self.client.get("/api/customers/search/", {"q": q}).json()["results"]
+            self.assertEqual([r["name"] for r in found], ["Dawood"], q)
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite query plan")
+    def test_digit_search_uses_both_prefix_indexes(self):
+        qs = Customer.objects.filter(Q(name__istartswith="0300") | Q(phone__startswith="0300")).order_by("name")
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cur:
+            cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " / ".join(row[-1] for row in cur.fetchall())
+        self.assertIn("inventory_customer_name_prefix", plan)
+        self.assertIn("inventory_customer_phone_prefix", plan)
+        self.assertNotIn("SCAN inventory_customer", plan)
@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventory.models import Invoice, StockBalance, StockLedger
+from inventory.reconcile import find_drift
+from inventory.services import LineItem, cancel_invoices, create_invoice_with_lines, create_transfer_with_lines
+
+from .utils import make_location, make_product, on_hand, receive
+
+
+class InvoicePostingTests(TestCase):
+    def setUp(self):
+        self.shop = make_location("Shop")
+        self.a = make_product("PO-A", cost="100", selling_price="250")
+        self.b = make_product("PO-B", cost="80", selling_price="200")
+        receive(self.shop, self.a, 5)
+        receive(self.shop, self.b, 5)
+
+    def test_invoice_moves_stock_and_writes_ledger(self):
+        inv = create_invoice_with_lines(
+            location=self.shop, items=[LineItem(sku="PO-A", qty=2), LineItem(sku="PO-B", qty=1), LineItem(sku="PO-A", qty=1)],
+        )
+        self.assertEqual((inv.invoice_no, inv.status, inv.grand_total), ("INV-00001", "FINAL", Decimal("950")))
+        self.assertEqual((on_hand(self.shop, self.a), on_hand(self.shop, self.b)), (2, 4))
+
+        out = StockLedger.objects.filter(movement_type="OUT", reference_no=inv.invoice_no)
+        self.assertEqual(sum(r.qty for r in out.filter(product=self.a)), 3)
+        self.assertEqual({r.unit_cost for r in out.filter(product=self.a)}, {Decimal("100")})
+        self.assertEqual(find_drift(), [])
+
+    def test_short_stock_posts_nothing(self):
+        with self.assertRaises(ValueError):
+            create_invoice_with_lines(location=self.shop, items=[LineItem(sku="PO-A", qty=1), LineItem(sku="PO-B", qty=6)])
+        self.assertFalse(Invoice.objects.exists())
+        self.assertEqual((on_hand(self.shop, self.a), on_hand(self.shop, self.b)), (5, 5))
+        self.assertFalse(StockLedger.objects.filter(movement_type="OUT").exists())
+
+    def test_unknown_sku(self):
+        with self.assertRaises(ValueError):
+            create_invoice_with_lines(location=self.shop, items=[LineItem(sku="NOPE", qty=1)])
+
+    def test_api_ignores_a_client_price(self):
+        resp = self.client.post(
+            "/api/invoices/create/",
+            {"location_id": self.shop.pk, "items": [{"sku": "PO-A", "qty": 1, "price": "1"}]},
+            content_type="application/json",
+        )
+        self.assertEqual((resp.status_code, resp.json()["grand_total"]), (201, "250.00"))
+
+    def test_numbers_run_on(self):
+        nos = [
+            create_invoice_with_lines(location=self.shop, items=[LineItem(sku="PO-A", qty=1)]).invoice_no
+            for _ in range(3)
+        ]
+        self.assertEqual(nos, ["INV-00001", "INV-00002", "INV-00003"])
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.shop = make_location("Shop")
+        self.store = make_location("Store")
+        self.a = make_product("TR-A")
+        receive(self.store, self.a, 6)
+
+    def test_transfer_moves_stock_between_locations(self):
+        trf = create_transfer_with_lines(from_location=self.store, to_location=self.shop, items=[LineItem(sku="TR-A", qty=4)])
+        self.assertTrue(trf.transfer_no.startswith("TRF-"))
+        self.assertEqual((on_hand(self.store, self.a), on_hand(self.shop, self.a)), (2, 4))
+        self.assertEqual(
+            sorted(StockLedger.objects.filter(reference_type="TRF").values_list("movement_type", "qty")),
+            [("TRF_IN", 4), ("TRF_OUT", 4)],
+        )
+        self.assertEqual(find_drift(), [])
+
+    def test_short_transfer_posts_nothing(self):
+        with self.assertRaises(ValueError):
+            create_transfer_with_lines(from_location=self.shop, to_location=self.store, items=[LineItem(sku="TR-A", qty=1)])
+        self.assertEqual((on_hand(self.store, self.a), on_hand(self.shop, self.a)), (6, 0))
+
+
+class BalanceRowTests(TestCase):
+    def setUp(self):
+        self.shop = make_location("Shop")
+        self.store = make_location("Store")
+        self.a = make_product("BR-A")
+        self.b = make_product("BR-B")
+        receive(self.shop, self.a, 5)
+        receive(self.store, self.b, 5)
+
+    def _pairs(self):
+        return set(StockBalance.objects.values_list("location_id", "product_id"))
+
+    def test_cancel_across_locations_only_touches_posted_pairs(self):
+        inv1 = create_invoice_with_lines(location=self.shop, items=[LineItem(sku="BR-A", qty=2)])
+        inv2 = create_invoice_with_lines(location=self.store, items=[LineItem(sku="BR-B", qty=1)])
+        cancel_invoices(invoice_ids=[inv1.pk, inv2.pk])
+
+        self.assertEqual(self._pairs(), {(self.shop.pk, self.a.pk), (self.store.pk, self.b.pk)})
+        self.assertEqual((on_hand(self.shop, self.a), on_hand(self.store, self.b)), (5, 5))
@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventory import pricing
+from inventory.models import PriceList, PriceListItem, Product
+
+from .utils import make_product
+
+
+class QuoteTests(TestCase):
+    def setUp(self):
+        pricing.invalidate()
+        self.p = make_product("QT-1", selling_price="250")
+        wholesale = PriceList.objects.create(name="Wholesale", customer_type="wholesale")
+        PriceListItem.objects.create(price_list=wholesale, product=self.p, price=Decimal("200"))
+
+    def _quote(self, *items, **data):
+        return self.client.post(
+            "/api/invoices/quote/", {"items": [{"sku": s, "qty": 1, **extra} for s, extra in items], **data},
+            content_type="application/json",
+        )
+
+    def test_priced_from_the_book_without_queries(self):
+        pricing.price_book()
+        with self.assertNumQueries(0):
+            resp = self._quote(("QT-1", {"price": "1"}), customer_type="wholesale")
+        self.assertEqual(resp.json()["grand_total"], "200.00")
+        self.assertEqual(self._quote(("QT-1", {})).json()["grand_total"], "250.00")
+
+    def test_unknown_sku_is_rejected_even_with_a_price(self):
+        resp = self._quote(("QT-1", {}), ("NOPE", {"price": "100"}))
+        self.assertEqual((resp.status_code, resp.json()["detail"]), (400, "Unknown SKU(s): NOPE"))
+
+    def test_products_added_or_repriced_after_the_build(self):
+        pricing.price_book()
+        Product.objects.bulk_create([Product(sku="QT-2", product_name="New", selling_price=Decimal("90"))])
+        self.assertEqual(self._quote(("QT-2", {})).json()["grand_total"], "90.00")
+
+        self.p.selling_price = Decimal("300")
+        self.p.save()
+        self.assertEqual(self._quote(("QT-1", {})).json()["grand_total"], "300.00")
@@ -0,0 +1,76 @@
+import os
+import tempfile
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from inventory import escpos
+from inventory.services import LineItem, cancel_invoices, create_invoice_with_lines
+
+from .utils import make_location, make_product, receive
+
+
+@override_settings(RECEIPT_WIDTH=48, RECEIPT_HEADER="", RECEIPT_FOOTER="Thank you")
+class ReceiptTests(TestCase):
+    def setUp(self):
+        escpos._cache.clear()
+        self.shop = make_location("Mall Road")
+        self.product = make_product("KC-BLA-40", selling_price="250", product_name="Khussa")
+        receive(self.shop, self.product, 10)
+        self.invoice = create_invoice_with_lines(
+            location=self.shop, items=[LineItem(sku="KC-BLA-40", qty=3, discount=Decimal("75"))],
+        )
+        self.tmp = tempfile.mkdtemp()
+
+    def _lines(self, data: bytes) -> list[str]:
+        return [line.strip() for line in data.decode("cp437").splitlines()]
+
+    def test_item_line_is_gross_then_discount(self):
+        lines = self._lines(escpos.receipt_for(self.invoice))
+        item = next(l for l in lines if l.startswith("3 x 250.00"))
+        self.assertTrue(item.endswith("750.00"))
+        self.assertTrue(lines[lines.index(item) + 1].endswith("-75.00"))
+        self.assertFalse(any(l.startswith("3 x") and l.endswith("675.00") for l in lines))
+        self.assertTrue(any(l.endswith("675.00") for l in lines if "TOTAL" in l))
+
+    def test_layout(self):
+        data = escpos.receipt_for(self.invoice)
+        self.assertTrue(data.startswith(escpos.INIT))
+        self.assertTrue(data.endswith(escpos.CUT))
+        self.assertIn(escpos.barcode128(self.invoice.invoice_no), data)
+        self.assertIn(b"Mall Road", data)
+        self.assertIn(b"Thank you", data)
+        text = [l for l in data.decode("cp437").splitlines() if "\x1b" not in l and "\x1d" not in l]
+        self.assertTrue(text and all(len(l) <= 48 for l in text))
+
+    def test_cancellation_changes_the_cached_receipt(self):
+        before = escpos.receipt_for(self.invoice)
+        self.assertIs(escpos.receipt_for(self.invoice), before)
+        cancel_invoices(invoice_ids=[self.invoice.pk])
+        self.invoice.refresh_from_db()
+        self.assertIn(b"*** CANCELLED ***", escpos.receipt_for(self.invoice))
+
+    def test_print_to_file_printer(self):
+        path = os.path.join(self.tmp, "printer.bin")
+        with override_settings(RECEIPT_PRINTER=f"file://{path}"):
+            resp = self.client.post(
+                "/api/invoices/receipt/print/", {"invoice_no": self.invoice.invoice_no}, content_type="application/json",
+            )
+        self.assertEqual(resp.status_code, 200)
+        with open(path, "rb") as f:
+            printed = f.read()
+        self.assertEqual(printed, escpos.receipt_for(self.invoice))
+        self.assertEqual(resp.json()["bytes"], len(printed))
+
+    def test_print_without_printer(self):
+        with override_settings(RECEIPT_PRINTER=""):
+            resp = self.client.post(
+                "/api/invoices/receipt/print/", {"invoice_no": self.invoice.invoice_no}, content_type="application/json",
+            )
+        self.assertEqual(resp.status_code, 400)
+
+    def test_download(self):
+        resp = self.client.get("/api/invoices/receipt/", {"invoice_no": self.invoice.invoice_no})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, escpos.receipt_for(self.invoice))
+        self.assertEqual(self.client.get("/api/invoices/receipt/", {"invoice_no": "INV-99999"}).status_code, 404)
@@ -0,0 +1,53 @@
+from django.test import TestCase
+
+from inventory.models import StockBalance, StockLedger
+from inventory.reconcile import find_drift, repair_drift
+
+from .utils import login_staff, make_location, make_product, receive
+
+
+class ReconcileTests(TestCase):
+    def setUp(self):
+        self.shop = make_location("Shop")
+        self.store = make_location("Store")
+        self.product = make_product("REC-1")
+        receive(self.shop, self.product, 10)
+        receive(self.store, self.product, 4)
+        # balance edited behind the ledger's back
+        StockBalance.objects.filter(location=self.shop, product=self.product).update(on_hand_qty=7)
+
+    def test_find_drift(self):
+        drift = find_drift()
+        self.assertEqual([(d.location_id, d.sku, d.balance_qty, d.ledger_qty, d.diff) for d in drift],
+                         [(self.shop.pk, "REC-1", 7, 10, -3)])
+
+    def test_repair_adjust_posts_ledger_rows(self):
+        fixed = repair_drift([self.shop.pk], mode="adjust")
+        self.assertEqual(len(fixed), 1)
+        adj = StockLedger.objects.get(movement_type="ADJUST")
+        self.assertEqual((adj.qty, adj.reference_type), (-3, "RECON"))
+        self.assertEqual(find_drift(), [])
+
+    def test_repair_balance_resets_to_ledger(self):
+        repair_drift([self.shop.pk], mode="balance")
+        self.assertEqual(StockBalance.objects.get(location=self.shop, product=self.product).on_hand_qty, 10)
+        self.assertEqual(find_drift(), [])
+
+    def test_api_report_and_bad_location(self):
+        resp = self.client.get("/api/stock/reconcile/", {"location_id": self.shop.pk})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["count"], 1)
+        self.assertEqual(self.client.get("/api/stock/reconcile/", {"location_id": "abc"}).status_code, 400)
+        login_staff(self.client)
+        self.assertEqual(
+            self.client.post("/api/stock/reconcile/", {"location_id": "abc"}, content_type="application/json").status_code,
+            400,
+        )
+
+    def test_api_repair_needs_staff(self):
+        body = {"location_id": self.shop.pk, "repair": "adjust"}
+        self.assertEqual(self.client.post("/api/stock/reconcile/", body, content_type="application/json").status_code, 403)
+        self.assertEqual(len(find_drift()), 1)
+        login_staff(self.client)
+        self.assertEqual(self.client.post("/api/stock/reconcile/", body, content_type="application/json").status_code, 200)
+        self.assertEqual(find_drift(), [])
@@ -0,0 +1,93 @@
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from config.replica import PIN_COOKIE, ReplicaMiddleware, replica_alias
+from inventory.models import Product, StockLocation
+
+REPLICA = replica_alias()
+
+
+@override_settings(REPLICA_READ_PATHS=["/reports/"], REPLICA_PIN_SECONDS=10)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Routing decisions only: queries against "replica" are never executed."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = {}
+
+    def _view(self, write=False):
+        def view(request):
+            if write:
+                StockLocation.objects.create(name="Written")
+            self.seen = {
+                "product": router.db_for_read(Product),
+                "session": router.db_for_read(Session),
+                "user": router.db_for_read(User),
+            }
+            return HttpResponse("ok")
+        return view
+
+    def _request(self, request, write=False, replica="replica"):
+        with mock.patch("config.replica.replica_alias", return_value=replica):
+            return ReplicaMiddleware(self._view(write))(request)
+
+    def test_report_reads_go_to_replica(self):
+        response = self._request(self.factory.get("/reports/sales/"))
+        self.assertEqual(self.seen["product"], "replica")
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_session_and_auth_reads_stay_on_primary(self):
+        self._request(self.factory.get("/reports/sales/"))
+        self.assertEqual(self.seen["session"], "default")
+        self.assertEqual(self.seen["user"], "default")
+
+    def test_other_paths_and_posts_read_primary(self):
+        self._request(self.factory.get("/pos/"))
+        self.assertEqual(self.seen["product"], "default")
+        self._request(self.factory.post("/reports/sales/"))
+        self.assertEqual(self.seen["product"], "default")
+
+    def test_write_goes_to_primary_and_pins_the_client(self):
+        response = self._request(self.factory.post("/invoices/new/"), write=True)
+        self.assertEqual(router.db_for_write(StockLocation), "default")
+        self.assertTrue(StockLocation.objects.using("default").filter(name="Written").exists())
+        self.assertEqual(self.seen["product"], "default")     # reads after the write, same request
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 10)
+
+        # read-your-writes: the pinned client's next report read stays on the primary
+        request = self.factory.get("/reports/sales/")
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        self._request(request)
+        self.assertEqual(self.seen["product"], "default")
+
+    def test_no_replica_configured(self):
+        response = self._request(self.factory.get("/reports/sales/"), replica=None)
+        self.assertEqual(self.seen["product"], "default")
+        response = self._request(self.factory.post("/invoices/new/"), write=True, replica=None)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+@skipUnless(replica_alias(), "set DB_REPLICA_PATH (sqlite) or DB_REPLICA_HOST to run against a replica alias")
+@override_settings(REPLICA_READ_PATHS=["/admin-ui/locations/"])
+class ReplicaQueryTests(TransactionTestCase):
+    """End to end through the URLconf; in tests the replica alias mirrors the primary."""
+    databases = {"default", REPLICA} - {None}
+
+    def test_listing_queries_run_on_replica_until_pinned(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica, \
+                CaptureQueriesContext(connections["default"]) as primary:
+            self.client.get("/admin-ui/locations/")
+        self.assertTrue(any("inventory_stocklocation" in q["sql"] for q in replica.captured_queries))
+        self.assertFalse(any("inventory_stocklocation" in q["sql"] for q in primary.captured_queries))
+
+        self.client.cookies[PIN_COOKIE] = "1"
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            self.client.get("/admin-ui/locations/")
+        self.assertEqual(replica.captured_queries, [])
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.models import PriceHistory, Product, ProductFamily
+from inventory.repricing import bulk_reprice, filter_products, prices_at
+from inventory.services import create_size_run
+
+from .utils import login_staff, make_product
+
+
+class PriceHistoryTests(TestCase):
+    def _history(self, product):
+        return list(
+            PriceHistory.objects.filter(product=product).order_by("valid_from", "id")
+            .values_list("cost", "selling_price", "reason")
+        )
+
+    def test_create_and_edit_write_history(self):
+        p = make_product("PH-1", cost="100", selling_price="250")
+        self.assertEqual(self._history(p), [(Decimal("100"), Decimal("250"), "created")])
+
+        p.selling_price = Decimal("300")
+        p.save()
+        p.product_name = "Renamed"       # no price change: no row
+        p.save()
+        self.assertEqual(self._history(p)[-1], (Decimal("100"), Decimal("300"), "edited"))
+        self.assertEqual(len(self._history(p)), 2)
+
+    def test_edit_of_a_product_without_history_keeps_the_old_prices(self):
+        p = make_product("PH-2", cost="100", selling_price="250")
+        PriceHistory.objects.filter(product=p).delete()
+        Product.objects.filter(pk=p.pk).update(created_at=timezone.now() - timedelta(days=10))
+        p.refresh_from_db()
+
+        p.cost = Decimal("120")
+        p.save()
+        self.assertEqual(
+            self._history(p),
+            [(Decimal("100"), Decimal("250"), "initial"), (Decimal("120"), Decimal("250"), "edited")],
+        )
+        self.assertEqual(prices_at(timezone.now() - timedelta(days=1), [p.pk])[p.pk], (Decimal("100"), Decimal("250")))
+
+    def test_size_run_writes_history(self):
+        family = ProductFamily.objects.create(code="KC", name="Khussa", cost=Decimal("90"), selling_price=Decimal("200"))
+        created, _ = create_size_run(family=family, sizes=["40", "41"], colors=["Black"])
+        self.assertEqual(len(created), 2)
+        for p in created:
+            self.assertEqual(self._history(p), [(Decimal("90"), Decimal("200"), "created")])
+
+    def test_edit_form_writes_history(self):
+        p = make_product("PH-3", cost="100", selling_price="250")
+        data = {
+            k: v for k, v in Product.objects.filter(pk=p.pk).values()[0].items()
+            if v is not None and k not in ("id", "image", "thumbnail")
+        }
+        data.update(selling_price="275", family="")
+        self.client.post(f"/products/{p.pk}/edit/", data)
+        p.refresh_from_db()
+        self.assertEqual(p.selling_price, Decimal("275"))
+        self.assertEqual(self._history(p)[-1][1:], (Decimal("275"), "edited"))
+
+
+class BulkRepriceTests(TestCase):
+    def setUp(self):
+        self.a = make_product("RP-A", selling_price="200", color="Black")
+        self.b = make_product("RP-B", selling_price="300", color="Black")
+
+    def test_changed_excludes_unchanged_rows(self):
+        changed = bulk_reprice(filter_products(color="Black"), field="selling_price", mode="set", value="300")
+        self.assertEqual(changed, 1)
+        self.assertEqual(PriceHistory.objects.filter(product=self.b).count(), 1)   # only "created"
+        self.assertEqual(
+            PriceHistory.objects.filter(product=self.a).order_by("-id").values_list("selling_price", flat=True)[0],
+            Decimal("300"),
+        )
+
+    def test_percent_with_rounding_step(self):
+        changed = bulk_reprice(filter_products(color="Black"), field="selling_price", mode="percent", value="10", step="50")
+        self.assertEqual(changed, 1)    # 220 rounds back to 200
+        self.a.refresh_from_db()
+        self.b.refresh_from_db()
+        self.assertEqual((self.a.selling_price, self.b.selling_price), (Decimal("200"), Decimal("350")))
+
+    def test_api_reports_matched_and_changed(self):
+        login_staff(self.client)
+        resp = self.client.post(
+            "/api/products/reprice/",
+            {"color": "Black", "field": "selling_price", "mode": "set", "value": "300"},
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.json()["matched"], resp.json()["changed"]), (2, 1))
+
+    def test_repricing_needs_staff(self):
+        body = {"color": "Black", "field": "selling_price", "mode": "set", "value": "300"}
+        self.assertEqual(self.client.post("/api/products/reprice/", body, content_type="application/json").status_code, 403)
+        resp = self.client.get("/products/reprice/")
+        self.assertEqual(resp.status_code, 302)
+        self.assertIn("/admin/login/", resp["Location"])
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.selling_price, Decimal("200"))
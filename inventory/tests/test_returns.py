@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventory.models import ReturnLine, StockLedger
+from inventory.reconcile import find_drift
+from inventory.services import (
+    LineItem, ReturnValidationError, cancel_invoices, create_invoice_with_lines, create_return_with_lines,
+)
+
+from .utils import make_location, make_product, on_hand, receive
+
+
+class ReturnTests(TestCase):
+    def setUp(self):
+        self.shop = make_location("Shop")
+        self.a = make_product("RT-A", selling_price="250")
+        self.b = make_product("RT-B", selling_price="150")
+        receive(self.shop, self.a, 10)
+        receive(self.shop, self.b, 10)
+
+    def test_return_restocks_and_refunds_the_paid_price(self):
+        inv = create_invoice_with_lines(
+            location=self.shop,
+            items=[LineItem(sku="RT-A", qty=2), LineItem(sku="RT-B", qty=2, discount=Decimal("100"))],
+        )
+        ret = create_return_with_lines(
+            location=self.shop, invoice=inv, items=[LineItem(sku="RT-A", qty=1), LineItem(sku="RT-B", qty=1)],
+        )
+        prices = dict(ReturnLine.objects.filter(return_doc=ret).values_list("product__sku", "unit_price"))
+        self.assertEqual(prices, {"RT-A": Decimal("250"), "RT-B": Decimal("100")})
+        self.assertEqual((on_hand(self.shop, self.a), on_hand(self.shop, self.b)), (9, 9))
+        self.assertEqual(StockLedger.objects.filter(movement_type="RETURN").count(), 2)
+        self.assertEqual(find_drift(), [])
+
+    def test_repeated_sku_restocks_every_line(self):
+        ret = create_return_with_lines(location=self.shop, items=[LineItem(sku="RT-A", qty=1), LineItem(sku="RT-A", qty=2)])
+        self.assertEqual(ReturnLine.objects.filter(return_doc=ret).count(), 2)
+        self.assertEqual(ret.total_refund, Decimal("750"))
+        self.assertEqual(on_hand(self.shop, self.a), 13)
+        self.assertEqual(find_drift(), [])
+
+    def test_invoice_discount_is_pro_rated_into_the_refund(self):
+        # 2 x 250 + 2 x 150 = 800, 200 off the invoice: every unit refunds at 75%
+        inv = create_invoice_with_lines(
+            location=self.shop, items=[LineItem(sku="RT-A", qty=2), LineItem(sku="RT-B", qty=2)], discount=Decimal("200"),
+        )
+        self.assertEqual(inv.grand_total, Decimal("600"))
+        ret = create_return_with_lines(
+            location=self.shop, invoice=inv, items=[LineItem(sku="RT-A", qty=2), LineItem(sku="RT-B", qty=2)],
+        )
+        prices = dict(ReturnLine.objects.filter(return_doc=ret).values_list("product__sku", "unit_price"))
+        self.assertEqual(prices, {"RT-A": Decimal("187.50"), "RT-B": Decimal("112.50")})
+        self.assertEqual(sum(l.line_total for l in ret.lines.all()), inv.grand_total)
+
+    def test_cannot_return_more_than_sold(self):
+        inv = create_invoice_with_lines(location=self.shop, items=[LineItem(sku="RT-A", qty=2)])
+        create_return_with_lines(location=self.shop, invoice=inv, items=[LineItem(sku="RT-A", qty=1)])
+        with self.assertRaises(ReturnValidationError) as ctx:
+            create_return_with_lines(location=self.shop, invoice=inv, items=[LineItem(sku="RT-A", qty=2)])
+        self.assertEqual(ctx.exception.items[0]["remaining_allowed"], 1)
+        with self.assertRaises(ReturnValidationError):
+            create_return_with_lines(location=self.shop, invoice=inv, items=[LineItem(sku="RT-B", qty=1)])
+        self.assertEqual(on_hand(self.shop, self.a), 9)
+
+    def test_invoice_with_returns_cannot_be_cancelled(self):
+        inv = create_invoice_with_lines(location=self.shop, items=[LineItem(sku="RT-A", qty=2)])
+        create_return_with_lines(location=self.shop, invoice=inv, items=[LineItem(sku="RT-A", qty=1)])
+        with self.assertRaises(ValueError):
+            cancel_invoices(invoice_ids=[inv.pk])
+        self.assertEqual(on_hand(self.shop, self.a), 9)
+        self.assertFalse(StockLedger.objects.filter(movement_type="VOID").exists())
+
+    def test_cancelled_invoice_cannot_be_returned(self):
+        inv = create_invoice_with_lines(location=self.shop, items=[LineItem(sku="RT-A", qty=2)])
+        cancel_invoices(invoice_ids=[inv.pk])
+        with self.assertRaises(ValueError):
+            create_return_with_lines(location=self.shop, invoice=inv, items=[LineItem(sku="RT-A", qty=1)])
+        self.assertEqual(on_hand(self.shop, self.a), 10)
+        self.assertEqual(find_drift(), [])
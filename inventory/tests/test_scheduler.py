@@ -0,0 +1,58 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from inventory import scheduler
+from inventory.models import JobRun, ScheduledJob
+
+
+class LeaseTests(TransactionTestCase):
+    def setUp(self):
+        self.started = threading.Event()
+        self.job = scheduler.Job(name="test_slow", func=self._slow, every=timedelta(hours=1), timeout=1)
+        ScheduledJob.objects.create(name=self.job.name, next_run_at=timezone.now())
+
+    def _slow(self):
+        self.started.set()
+        time.sleep(2.5)
+        return {"slept": 2.5}
+
+    def test_one_process_gets_the_lease(self):
+        self.assertTrue(scheduler.acquire(self.job))
+        self.assertFalse(scheduler.acquire(self.job))
+        self.assertFalse(scheduler.acquire(self.job, force=True))
+
+    def test_heartbeat_keeps_the_lease_past_the_timeout(self):
+        self.assertTrue(scheduler.acquire(self.job))
+        out = []
+        t = threading.Thread(target=lambda: out.append(scheduler.run_job(self.job)))
+        t.start()
+        self.started.wait(5)
+        time.sleep(1.8)     # lease was taken for 1s; the job still runs
+        row = ScheduledJob.objects.get(name=self.job.name)
+        self.assertEqual(row.lease_owner, scheduler.OWNER)
+        self.assertGreater(row.lease_until, timezone.now())
+        self.assertFalse(scheduler.acquire(self.job, force=True))
+        t.join()
+
+        self.assertEqual(out[0]["status"], "timeout")
+        row.refresh_from_db()
+        self.assertEqual((row.lease_owner, row.lease_until), ("", None))
+        self.assertEqual(JobRun.objects.get(name=self.job.name).status, "timeout")
+
+
+class JobListTests(TestCase):
+    def test_last_20_runs_of_each_job(self):
+        JobRun.objects.bulk_create(
+            [JobRun(name="revalue_stock", status="ok", result={"n": i}) for i in range(25)]
+            + [JobRun(name="close_days", status="ok", result={"n": i}) for i in range(3)]
+        )
+        resp = self.client.get("/api/jobs/")
+        self.assertEqual(resp.status_code, 200)
+        jobs = {j["name"]: j for j in resp.json()["jobs"]}
+        self.assertEqual([r["result"]["n"] for r in jobs["revalue_stock"]["runs"]], list(range(24, 4, -1)))
+        self.assertEqual([r["result"]["n"] for r in jobs["close_days"]["runs"]], [2, 1, 0])
+        self.assertEqual(jobs["forecast_demand"]["runs"], [])
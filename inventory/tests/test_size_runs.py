@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventory.models import Product, ProductFamily
+from inventory.services import color_codes, create_size_run
+
+from .utils import login_staff, make_product
+
+
+class SizeRunTests(TestCase):
+    def setUp(self):
+        self.family = ProductFamily.objects.create(
+            code="kc", name="Khussa Classic", cost=Decimal("90"), selling_price=Decimal("200"),
+        )
+
+    def test_creates_every_variant_once(self):
+        created, skipped = create_size_run(family=self.family, sizes=["40", "41"], colors=["Black", "Red"])
+        self.assertEqual(
+            sorted(p.sku for p in created), ["KC-BLA-40", "KC-BLA-41", "KC-RED-40", "KC-RED-41"],
+        )
+        self.assertEqual(skipped, [])
+        p = Product.objects.get(sku="KC-RED-41")
+        self.assertEqual((p.color, p.size, p.barcode_value, p.selling_price), ("Red", "41", "KC-RED-41", Decimal("200")))
+
+        created, skipped = create_size_run(family=self.family, sizes=["41", "42"], colors=["Black"])
+        self.assertEqual([p.sku for p in created], ["KC-BLA-42"])
+        self.assertEqual(skipped, ["KC-BLA-41"])
+
+    def test_clashing_short_codes_use_the_full_name(self):
+        self.assertEqual(color_codes(["Blue", "Blush", "Red"]), {"Blue": "BLUE", "Blush": "BLUSH", "Red": "RED"})
+        created, _ = create_size_run(family=self.family, sizes=["40"], colors=["Blue", "Blush"])
+        self.assertEqual(sorted(p.sku for p in created), ["KC-BLUE-40", "KC-BLUSH-40"])
+
+    def test_colour_clash_in_the_run_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, "KC-OFFWHITE-40"):
+            create_size_run(family=self.family, sizes=["40"], colors=["Off White", "Off-White"])
+        self.assertFalse(Product.objects.exists())
+
+    def test_colour_clash_with_an_existing_product_is_rejected(self):
+        make_product("KC-BLA-40", color="Blazer", size="40")
+        with self.assertRaisesMessage(ValueError, "Blazer (existing)"):
+            create_size_run(family=self.family, sizes=["40", "41"], colors=["Black"])
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_needs_a_size(self):
+        with self.assertRaises(ValueError):
+            create_size_run(family=self.family, sizes=[" "], colors=["Black"])
+
+    def test_api_needs_staff(self):
+        body = {"code": "PMF", "name": "Fam", "sizes": ["40"]}
+        resp = self.client.post("/api/families/size-run/", body, content_type="application/json")
+        self.assertEqual(resp.status_code, 403)
+
+        login_staff(self.client)
+        resp = self.client.post("/api/families/size-run/", body, content_type="application/json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertTrue(Product.objects.filter(sku="PMF-40").exists())
+
+    def test_api_rejects_bad_prices(self):
+        login_staff(self.client)
+        for body in ({"code": "PMF", "name": "Fam", "sizes": ["40"], "cost": "abc"},
+                     {"family_id": self.family.pk, "sizes": ["40"], "selling_price": "NaN"}):
+            resp = self.client.post("/api/families/size-run/", body, content_type="application/json")
+            self.assertEqual(resp.status_code, 400, body)
+        self.assertFalse(ProductFamily.objects.filter(code="PMF").exists())
+        self.assertFalse(Product.objects.exists())
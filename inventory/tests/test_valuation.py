@@ -0,0 +1,119 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventory import valuation
+from inventory.models import FifoLayer, Product, StockLedger, StockValuation
+from inventory.services import LineItem, cancel_invoices, create_invoice_with_lines, create_return_with_lines
+
+from .utils import make_location, make_product, receive
+
+
+class ValuationTests(TestCase):
+    def setUp(self):
+        self.shop = make_location("Shop")
+        self.p = make_product("VA-1", cost="100")
+        receive(self.shop, self.p, 10, unit_cost="100")
+        receive(self.shop, self.p, 10, unit_cost="200")
+
+    def _sell(self, qty):
+        return create_invoice_with_lines(location=self.shop, items=[LineItem(sku="VA-1", qty=qty)])
+
+    def _state(self):
+        v = StockValuation.objects.get(product=self.p, location=self.shop)
+        return v.qty, v.wac_value, v.fifo_value, v.cogs_wac, v.cogs_fifo
+
+    def _layers(self):
+        return list(
+            FifoLayer.objects.filter(product=self.p, location=self.shop).order_by("ledger_id", "id")
+            .values_list("qty", "unit_cost")
+        )
+
+    def test_wac_and_fifo(self):
+        self._sell(15)
+        valuation.revalue()
+        # WAC 150 x 15; FIFO 10 x 100 + 5 x 200
+        self.assertEqual(self._state(), (5, Decimal("750"), Decimal("1000"), Decimal("2250"), Decimal("2000")))
+        self.assertEqual(self._layers(), [(5, Decimal("200"))])
+
+    def test_incremental_equals_full(self):
+        valuation.revalue()
+        self._sell(4)
+        valuation.revalue()
+        receive(self.shop, self.p, 5, unit_cost="300")
+        self._sell(12)
+        valuation.revalue()
+        incremental = self._state()
+        valuation.revalue(full=True)
+        self.assertEqual(self._state(), incremental)
+
+    def test_cancelled_sale_nets_out_at_its_cost(self):
+        valuation.revalue()
+        inv = self._sell(4)
+        valuation.revalue()
+        cancel_invoices(invoice_ids=[inv.pk])
+        valuation.revalue()
+        self.assertEqual(self._state(), (20, Decimal("3000"), Decimal("3000"), Decimal("0"), Decimal("0")))
+
+        self._sell(20)
+        valuation.revalue()
+        self.assertEqual(self._state(), (0, Decimal("0"), Decimal("0"), Decimal("3000"), Decimal("3000")))
+        self.assertEqual(self._layers(), [])
+
+    def test_cogs_between_nets_voids(self):
+        self._sell(5)
+        gone = self._sell(3)
+        cancel_invoices(invoice_ids=[gone.pk])
+        rows = valuation.cogs_between()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(
+            (rows[0]["qty_sold"], rows[0]["cogs_wac"], rows[0]["cogs_fifo"]),
+            (5, Decimal("750"), Decimal("500")),
+        )
+
+    def test_returned_sale_nets_out_at_its_cost(self):
+        valuation.revalue()
+        inv = self._sell(15)
+        valuation.revalue()
+        Product.objects.filter(pk=self.p.pk).update(cost=Decimal("300"))    # not what the sale was charged
+        create_return_with_lines(location=self.shop, invoice=inv, items=[LineItem(sku="VA-1", qty=5)])
+        valuation.revalue()
+        # WAC: 5 back at 150; FIFO: 5 back at 2000 / 15
+        expected = (10, Decimal("1500"), Decimal("1666.67"), Decimal("1500"), Decimal("1333.33"))
+        self.assertEqual(self._state(), expected)
+        valuation.revalue(full=True)
+        self.assertEqual(self._state(), expected)
+
+        rows = valuation.cogs_between()
+        self.assertEqual(
+            (rows[0]["qty_sold"], rows[0]["cogs_wac"], rows[0]["cogs_fifo"]),
+            (10, Decimal("1500"), Decimal("1333.33")),
+        )
+
+    def test_api_rejects_a_non_integer_location(self):
+        valuation.revalue()
+        resp = self.client.get("/api/valuation/stock/", {"location_id": self.shop.pk})
+        self.assertEqual((resp.status_code, resp.json()["total_fifo"]), (200, "3000.00"))
+        for url in ("/api/valuation/stock/", "/api/valuation/cogs/"):
+            self.assertEqual(self.client.get(url, {"location_id": "abc"}).status_code, 400, url)
+
+    def test_rows_committed_out_of_id_order_are_picked_up(self):
+        other = make_product("VA-2", cost="50")
+        base = StockLedger.objects.order_by("-id").values_list("id", flat=True).first() + 100
+        StockLedger.objects.create(
+            id=base + 10, product=other, location=self.shop, movement_type="IN", qty=4, unit_cost=Decimal("50"),
+            reference_type="IN",
+        )
+        valuation.revalue()
+        self.assertEqual(self._state()[0], 20)
+
+        # a sale of VA-1 with a lower id commits after VA-2's row was valued
+        StockLedger.objects.create(
+            id=base, product=self.p, location=self.shop, movement_type="OUT", qty=3, unit_cost=Decimal("100"),
+            reference_type="INV", reference_no="INV-LATE",
+        )
+        valuation.revalue()
+        self.assertEqual(self._state(), (17, Decimal("2550"), Decimal("2700"), Decimal("450"), Decimal("300")))
+        self.assertEqual(
+            StockValuation.objects.get(product=other, location=self.shop).fifo_value, Decimal("200"),
+        )
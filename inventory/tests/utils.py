@@ -0,0 +1,46 @@
+"""Fixtures shared by the inventory tests."""
+from decimal import Decimal
+
+from inventory.models import Product, StockBalance, StockLedger, StockLocation
+
+
+def make_location(name="Main"):
+    return StockLocation.objects.create(name=name)
+
+
+def make_product(sku, cost="100", selling_price="250", **fields):
+    # barcode_value set: no barcode image rendering on save
+    return Product.objects.create(
+        sku=sku,
+        product_name=fields.pop("product_name", f"Item {sku}"),
+        cost=Decimal(cost),
+        price=Decimal(selling_price),
+        selling_price=Decimal(selling_price),
+        barcode_value=sku,
+        **fields,
+    )
+
+
+def receive(location, product, qty, unit_cost=None):
+    """Stock IN the way the stock-in screen books it: balance + IN ledger row."""
+    bal, _ = StockBalance.objects.get_or_create(location=location, product=product)
+    bal.on_hand_qty += qty
+    bal.save(update_fields=["on_hand_qty"])
+    return StockLedger.objects.create(
+        location=location, product=product, movement_type="IN", qty=qty,
+        unit_cost=Decimal(unit_cost if unit_cost is not None else product.cost),
+        reference_type="IN", notes="test stock",
+    )
+
+
+def on_hand(location, product) -> int:
+    row = StockBalance.objects.filter(location=location, product=product).values_list("on_hand_qty", flat=True).first()
+    return row or 0
+
+
+def login_staff(client, username="manager"):
+    from django.contrib.auth import get_user_model
+
+    user = get_user_model().objects.create_user(username=username, password="x", is_staff=True)
+    client.force_login(user)
+    return user
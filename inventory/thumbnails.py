@@ -0,0 +1,147 @@
+# inventory/thumbnails.py
+"""
+Product image thumbnails.
+
+Every uploaded Product.product_image gets WebP + JPEG renditions at the
+THUMBNAIL_SIZES widths, stored under MEDIA_ROOT/products/thumbs/ with a
+content-hash name (<sha1[:16]>_<size>.<ext>). Same bytes = same name, so
+files are written once and served with a one-year immutable cache header.
+
+render_thumbnails() works on plain paths only (no ORM), so the backfill
+command can fan it out over a process pool; the upload path runs it once
+after commit.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+THUMB_DIR = "products/thumbs"
+FORMATS = (("webp", "WEBP"), ("jpg", "JPEG"))
+CACHE_SECONDS = 365 * 24 * 3600
+
+
+def thumb_sizes() -> tuple[int, ...]:
+    return tuple(sorted(int(s) for s in getattr(settings, "THUMBNAIL_SIZES", (96, 320, 800))))
+
+
+def thumb_quality() -> int:
+    return int(getattr(settings, "THUMBNAIL_QUALITY", 80))
+
+
+def content_hash(path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def render_thumbnails(src_path: str, media_root: str, sizes=None, quality: int = 80) -> dict:
+    """
+    Writes the renditions for one image and returns
+    {"source": <hash>, "<size>": {"webp": name, "jpg": name}, ...}
+    with names relative to media_root. Existing files are reused.
+    Picklable top-level function: safe for ProcessPoolExecutor.
+    """
+    from PIL import Image, ImageOps
+
+    sizes = sorted(sizes or (96, 320, 800))
+    digest = content_hash(src_path)
+    out_dir = Path(media_root) / THUMB_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    names = {
+        size: {ext: f"{THUMB_DIR}/{digest}_{size}.{ext}" for ext, _ in FORMATS}
+        for size in sizes
+    }
+    result = {"source": digest, **{str(size): names[size] for size in sizes}}
+    if all((Path(media_root) / n).exists() for per in names.values() for n in per.values()):
+        return result
+
+    with Image.open(src_path) as im:
+        # JPEG: let libjpeg decode at 1/2, 1/4, 1/8 scale straight away
+        im.draft("RGB", (sizes[-1], sizes[-1]))
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info else "RGB")
+
+        # largest first; each smaller size is resized from the previous rendition
+        work = im
+        for size in reversed(sizes):
+            if work.width > size:
+                work = work.resize((size, max(1, round(work.height * size / work.width))), Image.LANCZOS)
+            for ext, fmt in FORMATS:
+                target = Path(media_root) / names[size][ext]
+                if target.exists():
+                    continue
+                img = work if fmt == "WEBP" or work.mode == "RGB" else _flatten(work)
+                tmp = target.with_suffix(f".{os.getpid()}.tmp")
+                img.save(tmp, fmt, quality=quality, optimize=True, **({"method": 4} if fmt == "WEBP" else {}))
+                os.replace(tmp, target)
+    return result
+
+
+def _flatten(im):
+    from PIL import Image
+
+    bg = Image.new("RGB", im.size, (255, 255, 255))
+    bg.paste(im, mask=im.getchannel("A"))
+    return bg
+
+
+def needs_thumbnails(product) -> bool:
+    if not product.product_image:
+        return False
+    thumbs = product.thumbnails or {}
+    return thumbs.get("image") != product.product_image.name or any(
+        str(s) not in thumbs for s in thumb_sizes()
+    )
+
+
+def build_for_product(product, force: bool = False) -> dict:
+    """Render + store thumbnails for one product (no-op when up to date)."""
+    from .models import Product
+
+    if not product.product_image:
+        if product.thumbnails:
+            Product.objects.filter(pk=product.pk).update(thumbnails={})
+            product.thumbnails = {}
+        return {}
+    if not force and not needs_thumbnails(product):
+        return product.thumbnails
+
+    thumbs = render_thumbnails(product.product_image.path, str(settings.MEDIA_ROOT), thumb_sizes(), thumb_quality())
+    thumbs["image"] = product.product_image.name
+    # queryset update: no post_save, no recursion
+    Product.objects.filter(pk=product.pk).update(thumbnails=thumbs)
+    product.thumbnails = thumbs
+    return thumbs
+
+
+def schedule_for_product(product):
+    """Upload path: render after the product row is committed."""
+    if needs_thumbnails(product) or (not product.product_image and product.thumbnails):
+        transaction.on_commit(lambda: build_for_product(product))
+
+
+def thumbnail_url(product, size: int, fmt: str = "webp") -> str:
+    """Smallest rendition >= size; falls back to the original upload."""
+    thumbs = product.thumbnails or {}
+    for s in thumb_sizes():
+        if s >= size and str(s) in thumbs:
+            return settings.MEDIA_URL + thumbs[str(s)][fmt]
+    return product.product_image.url if product.product_image else ""
+
+
+def serve_thumbnail(request, name):
+    """Content-addressed files never change: cache them for a year."""
+    from django.views.static import serve
+
+    resp = serve(request, f"{THUMB_DIR}/{name}", document_root=settings.MEDIA_ROOT)
+    resp["Cache-Control"] = f"public, max-age={CACHE_SECONDS}, immutable"
+    return resp
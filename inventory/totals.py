@@ -0,0 +1,127 @@
+# inventory/totals.py
+"""
+Invoice totals engine: line discounts, document discount, tax and rounding
+in one pass over the lines, Decimal only. Pure function - no DB access -
+so the POS can quote on every keystroke and the posting service stores
+exactly what was quoted.
+
+Settings:
+    INVOICE_TAX_RATE       percent, e.g. "17" (default 0)
+    INVOICE_TAX_INCLUSIVE  True = prices already include tax
+    INVOICE_ROUNDING       step for the grand total, e.g. "1" (default "0.01")
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable
+
+from django.conf import settings
+
+CENT = Decimal("0.01")
+HUNDRED = Decimal("100")
+
+
+def _d(v) -> Decimal:
+    try:
+        return Decimal(str(v)) if v not in (None, "") else Decimal("0")
+    except Exception:
+        return Decimal("0")
+
+
+def _money(v: Decimal) -> Decimal:
+    return v.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+@dataclass
+class QuoteLine:
+    qty: int
+    unit_price: Decimal
+    discount: Decimal = Decimal("0")       # amount off the line
+    discount_pct: Decimal = Decimal("0")   # percent off the line (applied first)
+    sku: str = ""
+
+    # computed
+    gross: Decimal = Decimal("0")
+    line_discount: Decimal = Decimal("0")
+    line_total: Decimal = Decimal("0")
+
+
+@dataclass
+class Totals:
+    lines: list[QuoteLine] = field(default_factory=list)
+    gross: Decimal = Decimal("0")            # qty * price, before any discount
+    line_discounts: Decimal = Decimal("0")
+    subtotal: Decimal = Decimal("0")         # after line discounts
+    discount: Decimal = Decimal("0")         # document discount
+    tax: Decimal = Decimal("0")
+    rounding: Decimal = Decimal("0")
+    grand_total: Decimal = Decimal("0")
+
+    def as_dict(self) -> dict:
+        return {
+            "gross": str(self.gross),
+            "line_discounts": str(self.line_discounts),
+            "subtotal": str(self.subtotal),
+            "discount": str(self.discount),
+            "tax": str(self.tax),
+            "rounding": str(self.rounding),
+            "grand_total": str(self.grand_total),
+            "lines": [
+                {
+                    "sku": l.sku,
+                    "qty": l.qty,
+                    "unit_price": str(l.unit_price),
+                    "discount": str(l.line_discount),
+                    "line_total": str(l.line_total),
+                }
+                for l in self.lines
+            ],
+        }
+
+
+def compute_totals(
+    lines: Iterable[QuoteLine],
+    *,
+    discount=0,
+    discount_pct=0,
+    tax_rate=None,
+    tax_inclusive: bool | None = None,
+    rounding=None,
+) -> Totals:
+    tax_rate = _d(getattr(settings, "INVOICE_TAX_RATE", 0) if tax_rate is None else tax_rate)
+    if tax_inclusive is None:
+        tax_inclusive = bool(getattr(settings, "INVOICE_TAX_INCLUSIVE", False))
+    step = _d(getattr(settings, "INVOICE_ROUNDING", "0.01") if rounding is None else rounding) or CENT
+
+    t = Totals()
+    for line in lines:
+        qty = int(line.qty)
+        price = _money(_d(line.unit_price))
+        gross = price * qty
+        off = _money(gross * _d(line.discount_pct) / HUNDRED) + _money(_d(line.discount))
+        off = min(max(off, Decimal("0")), gross)
+
+        line.qty, line.unit_price = qty, price
+        line.gross, line.line_discount, line.line_total = gross, off, gross - off
+
+        t.lines.append(line)
+        t.gross += gross
+        t.line_discounts += off
+        t.subtotal += line.line_total
+
+    doc_off = _money(t.subtotal * _d(discount_pct) / HUNDRED) + _money(_d(discount))
+    t.discount = min(max(doc_off, Decimal("0")), t.subtotal)
+    taxable = t.subtotal - t.discount
+
+    if tax_inclusive:
+        t.tax = _money(taxable - taxable / (1 + tax_rate / HUNDRED))
+        total = taxable
+    else:
+        t.tax = _money(taxable * tax_rate / HUNDRED)
+        total = taxable + t.tax
+
+    t.grand_total = (total / step).quantize(Decimal("1"), rounding=ROUND_HALF_UP) * step
+    t.grand_total = _money(t.grand_total)
+    t.rounding = t.grand_total - total
+    return t
@@ -9,15 +9,20 @@ urlpatterns = [
     # Products
     path("products/", views.products_list, name="products_list"),
     path("products/new/", views.product_create, name="product_create"),
+    path("products/reprice/", views.products_reprice, name="products_reprice"),
     path("products/<int:pk>/edit/", views.product_edit, name="product_edit"),
     path("products/<int:pk>/activate/", views.product_activate, name="product_activate"),
     path("products/<int:pk>/barcode/", views.product_barcode_print, name="product_barcode_print"),
 
     # Stock / Sales / Returns / Reports
     path("stock/in/", views.stock_in, name="stock_in"),
+    path("stock/transfer/", views.stock_transfer, name="stock_transfer"),
+    path("stock/count/", views.stock_count, name="stock_count"),
     path("invoice/new/", views.invoice_new, name="invoice_new"),
     path("return/new/", views.return_new, name="return_new"),
     path("reports/", views.reports, name="reports"),
+    path("closing/", views.day_closings, name="day_closings"),
+    path("closing/<int:pk>/pdf/", views.day_closing_pdf, name="day_closing_pdf"),
 
     # ✅ Custom Admin UI
     path("admin-ui/", views.admin_home, name="admin_home"),
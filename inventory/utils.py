@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.utils import timezone
 
 def gen_running_no(prefix: str, last_no: str | None) -> str:
@@ -12,3 +13,18 @@ def gen_running_no(prefix: str, last_no: str | None) -> str:
 
 def now_str():
     return timezone.localtime(timezone.now()).strftime("%Y-%m-%d %H:%M")
+
+def normalize_phone(value: str) -> str:
+    # digits only, national form: "+92 300-1234567" / "0092..." -> "03001234567"
+    value = (value or "").strip()
+    digits = "".join(ch for ch in value if ch.isdigit())
+    cc = str(getattr(settings, "PHONE_COUNTRY_CODE", "") or "")
+    if value.startswith("+"):
+        intl = digits
+    elif digits.startswith("00"):
+        intl = digits[2:]
+    else:
+        return digits
+    if cc and intl.startswith(cc):
+        return "0" + intl[len(cc):]
+    return digits
@@ -0,0 +1,605 @@
+# inventory/valuation.py
+"""
+Inventory valuation engine (weighted-average + FIFO) over StockLedger.
+
+Ledger rows are loaded as columns (NumPy arrays), sorted by (product, location, id)
+and valued in batch:
+
+- running qty / FIFO consumption are cumulative sums per series
+- FIFO cost of every outbound row is a lookup into the cumulative inbound
+  value curve (np.searchsorted), no per-row layer popping
+- moving average cost only changes on inbound rows, so the one sequential
+  recurrence runs over inbound rows only and is forward-filled to outbound rows
+- a VOID row (cancelled sale) or RETURN row (customer return against an
+  invoice) comes back in at the cost its OUT row was charged under each
+  method and is netted from COGS at that cost
+
+State per product/location is kept in StockValuation + FifoLayer, with the
+last ledger id folded into each series. Postings commit concurrently, so ids
+do not become visible in order: revalue() re-reads the last RESCAN_IDS ids
+below the highest processed one and keeps the rows past their own series'
+watermark. Within one series ids are ordered, every ledger row of a
+(location, product) is written under its posting lock (see locking.py).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+RESCAN_IDS = 10_000
+
+LEDGER_DTYPE = np.dtype([
+    ("id", np.int64), ("product_id", np.int64), ("location_id", np.int64),
+    ("movement_type", "U12"), ("qty", np.float64), ("unit_cost", np.float64),
+])
+
+
+# -----------------------------
+# Loading (columnar)
+# -----------------------------
+@dataclass
+class LedgerColumns:
+    ids: np.ndarray
+    product_ids: np.ndarray
+    location_ids: np.ndarray
+    signed_qty: np.ndarray
+    unit_cost: np.ndarray
+    is_sale: np.ndarray
+    is_void: np.ndarray
+    is_return: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+    def take(self, mask) -> "LedgerColumns":
+        return LedgerColumns(*(getattr(self, f.name)[mask] for f in fields(self)))
+
+    def concat(self, other: "LedgerColumns") -> "LedgerColumns":
+        return LedgerColumns(*(np.concatenate([getattr(self, f.name), getattr(other, f.name)]) for f in fields(self)))
+
+    def series_mask(self, pairs: set) -> np.ndarray:
+        """Rows whose (product_id, location_id) is in pairs."""
+        return np.fromiter(
+            (k in pairs for k in zip(self.product_ids.tolist(), self.location_ids.tolist())),
+            dtype=bool, count=len(self),
+        )
+
+
+def load_ledger(after_id: int = 0, location_id=None, product_ids=None) -> LedgerColumns:
+    from .models import StockLedger
+
+    qs = StockLedger.objects.filter(id__gt=after_id)
+    if location_id:
+        qs = qs.filter(location_id=location_id)
+    if product_ids is not None:
+        qs = qs.filter(product_id__in=product_ids)
+    rows = np.fromiter(
+        qs.order_by("id")
+        .values_list("id", "product_id", "location_id", "movement_type", "qty", "unit_cost")
+        .iterator(chunk_size=20000),
+        dtype=LEDGER_DTYPE,
+    )
+
+    move, qty = rows["movement_type"], rows["qty"]
+    sign = np.where(
+        np.isin(move, StockLedger.INBOUND_TYPES), 1.0,
+        np.where(np.isin(move, StockLedger.OUTBOUND_TYPES), -1.0, 0.0),
+    )
+    # ADJUST (and anything unknown) keeps the sign stored on the row
+    signed_qty = np.where(sign == 0.0, qty, sign * np.abs(qty))
+
+    return LedgerColumns(
+        ids=rows["id"],
+        product_ids=rows["product_id"],
+        location_ids=rows["location_id"],
+        signed_qty=signed_qty,
+        unit_cost=rows["unit_cost"],
+        is_sale=(move == "OUT"),
+        is_void=(move == "VOID"),
+        is_return=(move == "RETURN"),
+    )
+
+
+def sale_sources(cols: LedgerColumns) -> np.ndarray:
+    """
+    For every row: index (into cols) of the OUT row a VOID row reverses
+    (same invoice, product and location, paired in id order) or a RETURN
+    row takes back (first OUT row of the returned invoice with the same
+    product and location), else -1.
+    """
+    from .models import Return, StockLedger
+
+    src = np.full(len(cols), -1, dtype=np.int64)
+    if not (cols.is_void.any() or cols.is_return.any()):
+        return src
+    span = {"id__gte": int(cols.ids.min()), "id__lte": int(cols.ids.max())}
+    voids = StockLedger.objects.filter(movement_type="VOID", reference_type="INV", **span)
+    returns = StockLedger.objects.filter(movement_type="RETURN", reference_type="RET", **span)
+    returned = dict(
+        Return.objects.filter(return_no__in=returns.values("reference_no"), invoice__isnull=False)
+        .values_list("return_no", "invoice__invoice_no")
+    )
+    outs = StockLedger.objects.filter(
+        movement_type="OUT", reference_type="INV",
+        reference_no__in=[*voids.values_list("reference_no", flat=True), *returned.values()],
+    )
+    queue: dict[tuple, list] = {}
+    for oid, ref, pid, lid in outs.order_by("id").values_list("id", "reference_no", "product_id", "location_id"):
+        queue.setdefault((ref, pid, lid), []).append(oid)
+    first = {k: q[0] for k, q in queue.items()}
+    pairs = [
+        (vid, queue[(ref, pid, lid)].pop(0))
+        for vid, ref, pid, lid in voids.order_by("id").values_list("id", "reference_no", "product_id", "location_id")
+        if queue.get((ref, pid, lid))
+    ]
+    pairs += [
+        (rid, first[(returned[ref], pid, lid)])
+        for rid, ref, pid, lid in returns.values_list("id", "reference_no", "product_id", "location_id")
+        if (returned.get(ref), pid, lid) in first
+    ]
+    if not pairs:
+        return src
+
+    sorter = np.argsort(cols.ids, kind="stable")
+    back_ids, out_ids = (np.array(x, dtype=np.int64) for x in zip(*pairs))
+
+    def index_of(ids):
+        j = np.minimum(np.searchsorted(cols.ids, ids, sorter=sorter), len(cols) - 1)
+        return np.where(cols.ids[sorter[j]] == ids, sorter[j], -1)
+
+    bi, oi = index_of(back_ids), index_of(out_ids)
+    ok = (bi >= 0) & (oi >= 0)
+    src[bi[ok]] = oi[ok]
+    return src
+
+
+# -----------------------------
+# Core computation
+# -----------------------------
+@dataclass
+class Opening:
+    """Carried-in state per series (all arrays indexed like `keys`)."""
+    qty: np.ndarray
+    avg_cost: np.ndarray
+    layer_group: np.ndarray
+    layer_qty: np.ndarray
+    layer_cost: np.ndarray
+
+    @classmethod
+    def empty(cls, n_groups: int) -> "Opening":
+        z = np.zeros(0)
+        return cls(np.zeros(n_groups), np.zeros(n_groups), z.astype(np.int64), z, z)
+
+
+@dataclass
+class Result:
+    keys: np.ndarray          # (G, 2) product_id, location_id
+    last_ledger_id: np.ndarray
+    qty: np.ndarray
+    avg_cost: np.ndarray
+    wac_value: np.ndarray
+    fifo_value: np.ndarray
+    cogs_wac: np.ndarray      # sales net of voids and returns, this batch
+    cogs_fifo: np.ndarray
+    layer_group: np.ndarray   # remaining FIFO layers
+    layer_qty: np.ndarray
+    layer_cost: np.ndarray
+    layer_ledger_id: np.ndarray
+    row_order: np.ndarray     # ledger row index for each sorted position
+    row_cost_wac: np.ndarray  # per sorted row, outbound rows only
+    row_cost_fifo: np.ndarray
+    row_back_wac: np.ndarray  # per sorted row, value VOID / RETURN rows came back in at
+    row_back_fifo: np.ndarray
+
+
+def group_keys(cols: LedgerColumns):
+    """Unique (product_id, location_id) keys and the group index of every row."""
+    pairs = np.stack([cols.product_ids, cols.location_ids], axis=1)
+    keys, group = np.unique(pairs, axis=0, return_inverse=True)
+    return keys, group.reshape(-1)
+
+
+def _cumsum_by_group(values, group, n_groups):
+    """Inclusive running sum that restarts at every group (rows sorted by group)."""
+    cs = np.cumsum(values)
+    totals = np.bincount(group, weights=values, minlength=n_groups)
+    before = np.cumsum(totals) - totals
+    return cs - before[group]
+
+
+def compute(cols: LedgerColumns, keys: np.ndarray, group: np.ndarray, opening: Opening,
+            sources: np.ndarray | None = None) -> Result:
+    """sources: sale_sources(cols); without it VOID / RETURN rows come back at their own unit_cost."""
+    G = len(keys)
+    order = np.lexsort((cols.ids, group))
+    g = group[order]
+    sq = cols.signed_qty[order]
+    cost = cols.unit_cost[order]
+    ids = cols.ids[order]
+    sale = cols.is_sale[order]
+    n = len(g)
+
+    inbound = sq > 0
+    outbound = sq < 0
+    out_qty = np.where(outbound, -sq, 0.0)
+
+    # sorted position of the OUT row each VOID / RETURN row reverses (-1: none)
+    src = np.full(n, -1, dtype=np.int64)
+    if sources is not None and n:
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n)
+        rev = sources[order]
+        src = np.where(rev >= 0, rank[np.maximum(rev, 0)], -1)
+        src = np.where(inbound & (src >= 0) & outbound[np.maximum(src, 0)], src, -1)
+    reverses = src >= 0
+
+    counts = np.bincount(g, minlength=G)
+    starts = np.cumsum(counts) - counts
+    ends = starts + counts - 1
+
+    # running qty per series
+    q_after = opening.qty[g] + _cumsum_by_group(sq, g, G)
+    q_before = q_after - sq
+
+    # last inbound row at or before each row (or the series' first row: opening avg)
+    in_idx = np.flatnonzero(inbound)
+    pos = np.full(n, -1, dtype=np.int64)
+    pos[in_idx] = in_idx
+    first_not_in = starts[counts > 0][~inbound[starts[counts > 0]]]
+    pos[first_not_in] = first_not_in
+    pos = np.maximum.accumulate(pos) if n else pos
+
+    # ---- weighted average: sequential only over inbound rows ----
+    avg = opening.avg_cost.astype(np.float64).copy()
+    avg_at = np.empty(n)
+    in_cost_wac = cost.copy()
+    for i, grp, q, c, qp, j in zip(
+        in_idx.tolist(), g[in_idx].tolist(), sq[in_idx].tolist(),
+        cost[in_idx].tolist(), q_before[in_idx].tolist(), src[in_idx].tolist(),
+    ):
+        if j >= 0:
+            # cancelled / returned sale: back in at the average its OUT row was charged
+            p = pos[j]
+            c = avg_at[p] if inbound[p] else opening.avg_cost[grp]
+            in_cost_wac[i] = c
+        qp = qp if qp > 0 else 0.0
+        avg[grp] = (avg[grp] * qp + q * c) / (qp + q)
+        avg_at[i] = avg[grp]
+
+    # forward-fill the avg in effect to every row (never across series)
+    avg_row = np.empty(n)
+    avg_row[in_idx] = avg_at[in_idx]
+    avg_row[first_not_in] = opening.avg_cost[g[first_not_in]]
+    avg_row = avg_row[pos]
+    row_cost_wac = out_qty * avg_row
+
+    # ---- FIFO: cumulative inbound value curve + searchsorted ----
+    # units queue per series = carried layers first, then inbound rows in id order
+    n_open = len(opening.layer_group)
+    lay_g = np.concatenate([opening.layer_group, g[in_idx]])
+    lay_q = np.concatenate([opening.layer_qty, sq[in_idx]])
+    lay_id = np.concatenate([np.zeros(n_open, dtype=np.int64), ids[in_idx]])
+    phase = np.concatenate([np.zeros(n_open), np.ones(len(in_idx))])
+    seq = np.arange(len(lay_g))
+    lo = np.lexsort((seq, phase, lay_g))
+    lay_g, lay_q, lay_id = lay_g[lo], lay_q[lo], lay_id[lo]
+
+    cum_q = np.cumsum(lay_q)
+    in_total = np.bincount(lay_g, weights=lay_q, minlength=G)
+    in_hi = np.cumsum(in_total)
+    in_lo = in_hi - in_total
+
+    # consumed units = min(units sold so far, units received so far); a sale into
+    # negative stock is costed at its own ledger cost and the next receipts fill
+    # that shortfall first, so layers always add up to max(qty, 0)
+    shortfall = np.maximum(-opening.qty, 0.0)
+    open_in = np.bincount(opening.layer_group, weights=opening.layer_qty, minlength=G)
+    out_cum = shortfall[g] + _cumsum_by_group(out_qty, g, G)
+    in_cum = open_in[g] + _cumsum_by_group(np.where(inbound, sq, 0.0), g, G)
+    c_after = in_lo[g] + np.minimum(out_cum, in_cum)
+    c_before = in_lo[g] + np.minimum(out_cum - out_qty, in_cum)
+    excess = out_qty - (c_after - c_before)
+
+    def fifo_costs(in_cost):
+        lay_c = np.concatenate([opening.layer_cost, in_cost[in_idx]])[lo]
+        cum_v = np.cumsum(lay_q * lay_c)
+
+        def value_of_first(x):
+            """Value of the first x units on the global queue axis."""
+            if len(cum_q) == 0:
+                return np.zeros_like(x)
+            j = np.minimum(np.searchsorted(cum_q, x, side="left"), len(cum_q) - 1)
+            return np.where(x <= 0, 0.0, cum_v[j] - (cum_q[j] - x) * lay_c[j])
+
+        rows = np.where(outbound, value_of_first(c_after) - value_of_first(c_before) + excess * cost, 0.0)
+        return rows, lay_c
+
+    # a VOID / RETURN layer costs what its OUT row was charged, which may itself
+    # have consumed an earlier such layer: settle the chain (one pass without them)
+    in_cost_fifo = cost.copy()
+    row_cost_fifo, lay_c = fifo_costs(in_cost_fifo)
+    for _ in range(int(reverses.sum())):
+        charged = in_cost_fifo.copy()
+        charged[reverses] = row_cost_fifo[src[reverses]] / out_qty[src[reverses]]
+        if np.allclose(charged, in_cost_fifo):
+            break
+        in_cost_fifo = charged
+        row_cost_fifo, lay_c = fifo_costs(in_cost_fifo)
+
+    out_total = shortfall + np.bincount(g, weights=out_qty, minlength=G)
+    consumed = in_lo + np.minimum(out_total, in_total)
+    lay_start = cum_q - lay_q
+    remaining = np.clip(cum_q - np.maximum(consumed[lay_g], lay_start), 0.0, lay_q)
+    keep = remaining > 0
+
+    # cancelled and returned sales, netted from COGS at the cost they came back in at
+    back = (cols.is_void | cols.is_return)[order] & inbound
+    row_back_wac = np.where(back, sq * in_cost_wac, 0.0)
+    row_back_fifo = np.where(back, sq * in_cost_fifo, 0.0)
+
+    # ---- per series results ----
+    has_rows = counts > 0
+    qty = opening.qty.astype(np.float64).copy()
+    qty[has_rows] = q_after[ends[has_rows]]
+    last_id = np.zeros(G, dtype=np.int64)
+    last_id[has_rows] = ids[ends[has_rows]]
+
+    return Result(
+        keys=keys,
+        last_ledger_id=last_id,
+        qty=qty,
+        avg_cost=avg,
+        wac_value=np.maximum(qty, 0.0) * avg,
+        fifo_value=np.bincount(lay_g[keep], weights=(remaining * lay_c)[keep], minlength=G),
+        cogs_wac=np.bincount(g, weights=np.where(sale, row_cost_wac, 0.0) - row_back_wac, minlength=G),
+        cogs_fifo=np.bincount(g, weights=np.where(sale, row_cost_fifo, 0.0) - row_back_fifo, minlength=G),
+        layer_group=lay_g[keep],
+        layer_qty=remaining[keep],
+        layer_cost=lay_c[keep],
+        layer_ledger_id=lay_id[keep],
+        row_order=order,
+        row_cost_wac=row_cost_wac,
+        row_cost_fifo=row_cost_fifo,
+        row_back_wac=row_back_wac,
+        row_back_fifo=row_back_fifo,
+    )
+
+
+# -----------------------------
+# Persistence (incremental)
+# -----------------------------
+def _money(x, places="0.01") -> Decimal:
+    return Decimal(repr(float(x))).quantize(Decimal(places))
+
+
+def _load_opening(keys: np.ndarray) -> tuple[Opening, dict]:
+    from .models import FifoLayer, StockValuation
+
+    G = len(keys)
+    index = {(int(p), int(l)): i for i, (p, l) in enumerate(keys.tolist())}
+    product_ids = {p for p, _ in index}
+    location_ids = {l for _, l in index}
+
+    qty, avg = np.zeros(G), np.zeros(G)
+    prior = {}
+    for v in StockValuation.objects.filter(product_id__in=product_ids, location_id__in=location_ids):
+        i = index.get((v.product_id, v.location_id))
+        if i is None:
+            continue
+        qty[i], avg[i] = v.qty, float(v.avg_cost)
+        prior[i] = v
+
+    lg, lq, lc = [], [], []
+    layers = (
+        FifoLayer.objects.filter(product_id__in=product_ids, location_id__in=location_ids)
+        .order_by("id")
+        .values_list("product_id", "location_id", "qty", "unit_cost")
+    )
+    for p, l, q, c in layers:
+        i = index.get((p, l))
+        if i is not None:
+            lg.append(i)
+            lq.append(q)
+            lc.append(float(c))
+
+    opening = Opening(
+        qty=qty,
+        avg_cost=avg,
+        layer_group=np.array(lg, dtype=np.int64),
+        layer_qty=np.array(lq, dtype=np.float64),
+        layer_cost=np.array(lc, dtype=np.float64),
+    )
+    return opening, prior
+
+
+def last_processed_id() -> int:
+    from django.db.models import Max
+    from .models import StockValuation
+
+    return StockValuation.objects.aggregate(m=Max("last_ledger_id"))["m"] or 0
+
+
+def _unprocessed(cols: LedgerColumns) -> LedgerColumns:
+    """Drops rows at or below their own series' last_ledger_id (already valued)."""
+    from .models import StockValuation
+
+    if not len(cols):
+        return cols
+    done = {
+        (p, l): last
+        for p, l, last in StockValuation.objects.filter(
+            product_id__in=set(cols.product_ids.tolist()), location_id__in=set(cols.location_ids.tolist()),
+        ).values_list("product_id", "location_id", "last_ledger_id")
+    }
+    if not done:
+        return cols
+    watermark = np.fromiter(
+        (done.get(k, 0) for k in zip(cols.product_ids.tolist(), cols.location_ids.tolist())),
+        dtype=np.int64, count=len(cols),
+    )
+    return cols.take(cols.ids > watermark)
+
+
+@transaction.atomic
+def revalue(full: bool = False) -> dict:
+    """
+    Brings StockValuation / FifoLayer up to date with the ledger.
+    full=True drops the stored state and revalues every ledger row.
+    Incremental runs re-read RESCAN_IDS ids below the highest processed id,
+    so rows that committed after a later id was valued are still picked up.
+    Series with a new VOID or RETURN row are revalued from their first row: it
+    is netted at the cost its sale was charged, which only the full history has.
+    Returns {"rows": processed ledger rows, "series": touched product/locations}.
+    """
+    from .models import FifoLayer, StockValuation
+
+    if full:
+        FifoLayer.objects.all().delete()
+        StockValuation.objects.all().delete()
+        after = 0
+    else:
+        after = last_processed_id()
+
+    rescan = int(getattr(settings, "VALUATION_RESCAN_IDS", RESCAN_IDS))
+    cols = _unprocessed(load_ledger(after_id=max(after - rescan, 0)))
+    if not len(cols):
+        return {"rows": 0, "series": 0, "last_ledger_id": after}
+
+    redo = set()
+    back = cols.is_void | cols.is_return
+    if not full and back.any():
+        redo = set(zip(cols.product_ids[back].tolist(), cols.location_ids[back].tolist()))
+        history = load_ledger(product_ids={p for p, _ in redo})
+        cols = cols.take(~cols.series_mask(redo)).concat(history.take(history.series_mask(redo)))
+
+    keys, group = group_keys(cols)
+    opening, prior = _load_opening(keys)
+    if redo:
+        fresh = np.array([k in redo for k in map(tuple, keys.tolist())])
+        opening.qty[fresh] = 0.0
+        opening.avg_cost[fresh] = 0.0
+        carried = ~fresh[opening.layer_group]
+        opening.layer_group = opening.layer_group[carried]
+        opening.layer_qty = opening.layer_qty[carried]
+        opening.layer_cost = opening.layer_cost[carried]
+        prior = {i: v for i, v in prior.items() if not fresh[i]}
+    res = compute(cols, keys, group, opening, sources=sale_sources(cols))
+
+    now = timezone.now()
+    vals = []
+    for i, (p, l) in enumerate(keys.tolist()):
+        old = prior.get(i)
+        vals.append(StockValuation(
+            product_id=p,
+            location_id=l,
+            qty=int(round(res.qty[i])),
+            avg_cost=_money(res.avg_cost[i], "0.0001"),
+            wac_value=_money(res.wac_value[i]),
+            fifo_value=_money(res.fifo_value[i]),
+            cogs_wac=(old.cogs_wac if old else Decimal("0")) + _money(res.cogs_wac[i]),
+            cogs_fifo=(old.cogs_fifo if old else Decimal("0")) + _money(res.cogs_fifo[i]),
+            last_ledger_id=int(res.last_ledger_id[i]),
+            updated_at=now,
+        ))
+
+    StockValuation.objects.bulk_create(
+        vals,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["product", "location"],
+        update_fields=["qty", "avg_cost", "wac_value", "fifo_value",
+                       "cogs_wac", "cogs_fifo", "last_ledger_id", "updated_at"],
+    )
+
+    # replace layers of the touched series
+    touched_products = set(keys[:, 0].tolist())
+    touched_locations = set(keys[:, 1].tolist())
+    touched = {tuple(k) for k in keys.tolist()}
+    stale = [
+        pk for pk, p, l in FifoLayer.objects.filter(
+            product_id__in=touched_products, location_id__in=touched_locations,
+        ).values_list("id", "product_id", "location_id")
+        if (p, l) in touched
+    ]
+    for i in range(0, len(stale), 5000):
+        FifoLayer.objects.filter(pk__in=stale[i:i + 5000]).delete()
+
+    FifoLayer.objects.bulk_create(
+        [
+            FifoLayer(
+                product_id=int(keys[grp][0]),
+                location_id=int(keys[grp][1]),
+                ledger_id=int(lid),
+                qty=int(round(q)),
+                unit_cost=_money(c, "0.0001"),
+            )
+            for grp, q, c, lid in zip(
+                res.layer_group.tolist(), res.layer_qty.tolist(),
+                res.layer_cost.tolist(), res.layer_ledger_id.tolist(),
+            )
+        ],
+        batch_size=1000,
+    )
+
+    return {"rows": len(cols), "series": len(keys), "last_ledger_id": max(after, int(cols.ids.max()))}
+
+
+# -----------------------------
+# Reports
+# -----------------------------
+def cogs_between(date_from=None, date_to=None, location_id=None) -> list[dict]:
+    """
+    COGS of sales (OUT rows, net of VOID rows of cancelled invoices and RETURN
+    rows at the cost their sale was charged) in [date_from, date_to) under
+    both methods, per product/location. Costs
+    depend on everything before the window, so the ledger is valued from
+    the start (in memory, nothing is stored).
+    """
+    from .models import StockLedger
+
+    cols = load_ledger(location_id=location_id)
+    if not len(cols):
+        return []
+
+    keys, group = group_keys(cols)
+    res = compute(cols, keys, group, Opening.empty(len(keys)), sources=sale_sources(cols))
+
+    # cancelled / returned sales: rows dated in the window net out at the cost they came back in at
+    moves = StockLedger.objects.filter(movement_type__in=("OUT", "VOID", "RETURN"))
+    if location_id is not None:
+        moves = moves.filter(location_id=location_id)
+    if date_from is not None:
+        moves = moves.filter(date_time__gte=date_from)
+    if date_to is not None:
+        moves = moves.filter(date_time__lt=date_to)
+    window_ids = np.fromiter(moves.values_list("id", flat=True).iterator(chunk_size=20000), dtype=np.int64)
+    in_window = np.isin(cols.ids[res.row_order], window_ids)
+    sold = in_window & cols.is_sale[res.row_order]
+    taken_back = in_window & (cols.is_void | cols.is_return)[res.row_order]
+
+    g = group[res.row_order]
+    G = len(keys)
+    sq = cols.signed_qty[res.row_order]
+    qty = np.bincount(g, weights=np.where(sold, -sq, 0.0) - np.where(taken_back, sq, 0.0), minlength=G)
+    wac = np.bincount(
+        g, weights=np.where(sold, res.row_cost_wac, 0.0) - np.where(taken_back, res.row_back_wac, 0.0), minlength=G,
+    )
+    fifo = np.bincount(
+        g, weights=np.where(sold, res.row_cost_fifo, 0.0) - np.where(taken_back, res.row_back_fifo, 0.0), minlength=G,
+    )
+
+    out = []
+    for i in np.flatnonzero(qty > 0).tolist():
+        out.append({
+            "product_id": int(keys[i][0]),
+            "location_id": int(keys[i][1]),
+            "qty_sold": int(round(qty[i])),
+            "cogs_wac": _money(wac[i]),
+            "cogs_fifo": _money(fifo[i]),
+        })
+    return out
@@ -4,6 +4,7 @@ from __future__ import annotations
 from decimal import Decimal
 
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
@@ -16,6 +17,8 @@ from .models import (
     StockBalance,
     StockLedger,
 )
+from . import locking
+from .realtime import publish_balances
 from .services import ensure_product_barcode
 from .forms import StockLocationForm, CustomerForm
 
@@ -94,7 +97,7 @@ def product_activate(request, pk: int):
 
     if hasattr(product, "is_active"):
         product.is_active = True
-        product.save(update_fields=["is_active"])
+        product.save(update_fields=["is_active", "updated_at"])
         ensure_product_barcode(product, force=True)
         messages.success(request, "Product activated & barcode generated ✅")
     else:
@@ -109,6 +112,52 @@ def product_barcode_print(request, pk: int):
     return render(request, "barcode_print.html", {"p": p})
 
 
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def products_reprice(request):
+    from .models import ProductFamily
+    from .repricing import bulk_reprice, filter_products, preview
+
+    form = request.POST if request.method == "POST" else {}
+    ctx = {
+        "families": ProductFamily.objects.order_by("code"),
+        "f": form,
+        "rows": None,
+        "matched": 0,
+    }
+    if request.method == "GET":
+        return render(request, "products_reprice.html", ctx)
+
+    qs = filter_products(
+        name=(form.get("name") or "").strip(),
+        color=(form.get("color") or "").strip(),
+        size=(form.get("size") or "").strip(),
+        family_id=form.get("family_id") or None,
+        sku_prefix=(form.get("sku_prefix") or "").strip(),
+        active_only=bool(form.get("active_only")),
+    )
+    kwargs = {
+        "field": form.get("field") or "selling_price",
+        "mode": form.get("mode") or "percent",
+        "value": (form.get("value") or "").strip(),
+        "step": (form.get("step") or "").strip() or None,
+    }
+    try:
+        if not kwargs["value"]:
+            raise ValueError("Value is required.")
+        if form.get("action") == "apply":
+            if not any(form.get(k) for k in ("name", "color", "size", "family_id", "sku_prefix")):
+                raise ValueError("Select at least one filter before applying.")
+            changed = bulk_reprice(qs, reason=(form.get("reason") or "").strip(), **kwargs)
+            messages.success(request, f"Repriced ✅ {changed} product(s)")
+            return redirect("products_reprice")
+        ctx["rows"] = preview(qs, **kwargs)
+        ctx["matched"] = qs.count()
+    except ValueError as e:
+        messages.error(request, str(e))
+    return render(request, "products_reprice.html", ctx)
+
+
 # ---------------------------
 # Stock In  (✅ FIX: locations dropdown + stock update)
 # ---------------------------
@@ -136,6 +185,7 @@ def stock_in(request):
         product = get_object_or_404(Product, sku=sku)
 
         with transaction.atomic():
+            locking.lock_stock([(location.pk, product.pk)])
             bal, _ = StockBalance.objects.select_for_update().get_or_create(
                 location=location,
                 product=product,
@@ -158,6 +208,7 @@ def stock_in(request):
                 customer_name="",
                 notes=notes,
             )
+            publish_balances(location.pk, [(product.sku, bal)])
 
         messages.success(request, f"Stock added ✅ {sku} +{qty}")
         return redirect("stock_in")
@@ -165,25 +216,85 @@ def stock_in(request):
     return render(request, "stock_in.html", {"locations": locations})
 
 
+# ---------------------------
+# Stock Transfer (scan list -> /api/transfers/create/)
+# ---------------------------
+def stock_transfer(request):
+    locations = StockLocation.objects.all().order_by("name")
+    return render(request, "stock_transfer.html", {"locations": locations})
+
+
+# ---------------------------
+# Stock Count (scans -> /api/counts/...)
+# ---------------------------
+def stock_count(request):
+    from .models import CountSession
+
+    locations = StockLocation.objects.all().order_by("name")
+    open_sessions = CountSession.objects.filter(status="OPEN").select_related("location").order_by("-id")
+    return render(request, "stock_count.html", {"locations": locations, "open_sessions": open_sessions})
+
+
 # ---------------------------
 # Invoice / Return / Reports (templates required)
 # ---------------------------
+# locations / customers are fetched by the page from /api/locations/ and
+# /api/customers/search/, so the POS payload does not grow with the data
 def invoice_new(request):
-    locations = StockLocation.objects.all().order_by("name")
-    customers = Customer.objects.all().order_by("name")
-    return render(request, "invoice_new.html", {"locations": locations, "customers": customers})
+    return render(request, "invoice_new.html")
 
 
 def return_new(request):
-    locations = StockLocation.objects.all().order_by("name")
-    customers = Customer.objects.all().order_by("name")
-    return render(request, "return_new.html", {"locations": locations, "customers": customers})
+    return render(request, "return_new.html")
 
 
 def reports(request):
     return render(request, "reports.html")
 
 
+# ---------------------------
+# Day closing (Z-report)
+# ---------------------------
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def day_closings(request):
+    from datetime import date
+    from .closing import close_day
+    from .models import DayClosing
+
+    locations = StockLocation.objects.all().order_by("name")
+
+    if request.method == "POST":
+        location = get_object_or_404(StockLocation, pk=request.POST.get("location_id") or 0)
+        try:
+            day = date.fromisoformat(request.POST.get("business_date") or str(timezone.localdate()))
+            closing = close_day(location=location, day=day, force=bool(request.POST.get("force")))
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect("day_closings")
+        messages.success(request, f"Day closed ✅ {closing.location.name} {closing.business_date} · Net {closing.net_total}")
+        return redirect("day_closings")
+
+    closings = DayClosing.objects.select_related("location")[:60]
+    return render(request, "day_closings.html", {
+        "locations": locations,
+        "closings": closings,
+        "today": timezone.localdate(),
+    })
+
+
+def day_closing_pdf(request, pk: int):
+    from django.http import FileResponse
+    from .models import DayClosing
+    from .pdf import day_closing_pdf as render_pdf
+
+    closing = get_object_or_404(DayClosing.objects.select_related("location"), pk=pk)
+    return FileResponse(
+        render_pdf(closing), content_type="application/pdf",
+        filename=f"Z-{closing.location.name}-{closing.business_date}.pdf",
+    )
+
+
 # ---------------------------
 # ✅ Custom Admin UI (your templates)
 # ---------------------------
@@ -29,14 +29,6 @@ def port_is_open(host: str, port: int) -> bool:
 def port_is_free(host: str, port: int) -> bool:
     return not port_is_open(host, port)
 
-def wait_for_port(host: str, port: int, timeout: float = 15.0) -> bool:
-    start = time.time()
-    while time.time() - start < timeout:
-        if port_is_open(host, port):
-            return True
-        time.sleep(0.25)
-    return False
-
 def pick_port(host: str, start_port: int) -> int:
     # try 8000..8010
     for p in range(start_port, start_port + 11):
@@ -44,29 +36,122 @@ def pick_port(host: str, start_port: int) -> int:
             return p
     return start_port  # fallback
 
+class StartupTimer:
+    """Collects startup phase timings: [startup] env 3ms | django 410ms | ..."""
+
+    def __init__(self):
+        self.t0 = self.last = time.perf_counter()
+        self.phases = []
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.phases.append((name, (now - self.last) * 1000))
+        self.last = now
+
+    def report(self):
+        parts = " | ".join(f"{n} {ms:.0f}ms" for n, ms in self.phases)
+        total = (time.perf_counter() - self.t0) * 1000
+        print(f"[startup] {parts} | total {total:.0f}ms")
+
+
+def warm_up(timer: StartupTimer):
+    """
+    Pay the first-request costs before the browser opens:
+    URL resolver, templates, DB connection, product data.
+    """
+    from django.db import connection
+    from django.template.loader import get_template
+    from django.urls import get_resolver, reverse
+
+    get_resolver().url_patterns
+    reverse("dashboard")
+    timer.mark("urls")
+
+    for name in ("base.html", "dashboard.html", "invoice_new.html", "return_new.html", "products.html"):
+        try:
+            get_template(name)
+        except Exception:
+            pass
+    timer.mark("templates")
+
+    try:
+        connection.ensure_connection()
+        timer.mark("db")
+
+        from inventory.models import Product
+        from inventory.pricing import price_book
+        list(Product.objects.filter(is_active=True).values_list("sku", "barcode_value")[:5000])
+        price_book()
+        timer.mark("products")
+    except Exception as e:
+        print(f"[WARN] DB warm-up failed: {e}")
+    finally:
+        # the server's worker threads open their own connections
+        connection.close()
+
+
+def run_server(host: str, port: int, url: str, timer: StartupTimer):
+    import uvicorn
+
+    config = uvicorn.Config(
+        "config.asgi:application",
+        host=host,
+        port=port,
+        loop="asyncio",
+        http="h11",
+        lifespan="off",
+        log_level=os.getenv("APP_LOG_LEVEL", "warning"),
+        timeout_keep_alive=30,
+        # every request runs its sync view in its own worker thread (Django ASGI
+        # handler), so this caps the worker pool; extra requests get a fast 503
+        limit_concurrency=int(os.getenv("APP_MAX_CONCURRENCY", "64")),
+        backlog=128,
+    )
+    server = uvicorn.Server(config)
+
+    # open browser the moment the socket is bound (no port polling)
+    def open_browser_when_ready():
+        deadline = time.time() + 20.0
+        while not server.started and not server.should_exit and time.time() < deadline:
+            time.sleep(0.02)
+        if server.started:
+            timer.mark("listen")
+            timer.report()
+            webbrowser.open(url)
+        else:
+            print(f"[ERROR] Server did not start on {url}. Check console logs.")
+
+    threading.Thread(target=open_browser_when_ready, daemon=True).start()
+    server.run()
+
+
 def main():
+    timer = StartupTimer()
     load_env_from_exe_or_project()
 
     os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # the desktop app is its own server: run maintenance jobs unless SCHEDULER_ENABLED=0
+    os.environ.setdefault("SCHEDULER_ENABLED", "1")
 
     host = os.getenv("APP_HOST", "127.0.0.1")
     base_port = int(os.getenv("APP_PORT", "8000"))
     port = pick_port(host, base_port)
 
     url = f"http://{host}:{port}/"
+    timer.mark("env")
 
-    # open browser only when server is listening
-    def open_browser_when_ready():
-        if wait_for_port(host, port, timeout=20.0):
-            webbrowser.open(url)
-        else:
-            print(f"[ERROR] Server did not start on {url}. Check console logs.")
+    import django
+    django.setup()
+    timer.mark("django")
 
-    threading.Thread(target=open_browser_when_ready, daemon=True).start()
+    warm_up(timer)
+
+    # nightly / periodic maintenance in background threads
+    from inventory import scheduler
+    scheduler.start()
+    timer.mark("scheduler")
 
-    # Start Django server
-    from django.core.management import execute_from_command_line
-    execute_from_command_line([sys.argv[0], "runserver", f"{host}:{port}", "--noreload"])
+    run_server(host, port, url, timer)
 
 if __name__ == "__main__":
     main()